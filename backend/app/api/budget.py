@@ -3,11 +3,20 @@ from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
 from app.database.connection import get_db
 from app.database.models import budget_to_dict, transaction_to_dict, master_budget_to_dict, cost_center_to_dict, oid
+from app.database.budget_spend import recount_budgets
+from app.database.budget_index import budget_index
+from app.database.reference_cache import reference_cache
 from app.utils.json_response import json_response
+from app.utils.pagination import paginate, cursor_headers, PaginationError
+from app.utils.http_cache import cacheable
+from app.utils.dates import doc_date
+from app.services.report_cache import bump_versions
 from datetime import datetime, date
 
 budget_bp = Blueprint('budget', __name__)
 
+LIST_FIELDS = ('cost_center_id', 'amount', 'period_start', 'period_end', 'actual_spent', 'created_at', 'updated_at')
+
 
 def _date_parse(s):
     if isinstance(s, date):
@@ -17,29 +26,7 @@ def _date_parse(s):
     return datetime.strptime(s, '%Y-%m-%d').date() if s else None
 
 
-def _doc_date(doc, key):
-    v = doc.get(key)
-    if v is None:
-        return None
-    if hasattr(v, 'date'):
-        return v
-    if isinstance(v, str):
-        return datetime.strptime(v[:10], '%Y-%m-%d').date()
-    return v
-
-
-def calculate_budget_utilization(db, budget_doc):
-    cc_id = budget_doc.get('cost_center_id')
-    period_start = _doc_date(budget_doc, 'period_start')
-    period_end = _doc_date(budget_doc, 'period_end')
-    amount = budget_doc.get('amount', 0)
-    if not cc_id or not period_start or not period_end:
-        return {'budget_amount': amount, 'actual_spent': 0, 'utilization_percentage': 0, 'remaining_balance': amount, 'is_over_budget': False}
-    transactions = list(db.transactions.find({
-        'cost_center_id': cc_id,
-        'transaction_date': {'$gte': period_start, '$lte': period_end}
-    }))
-    total_spent = sum(t.get('amount', 0) for t in transactions)
+def _utilization(amount, total_spent):
     utilization = (total_spent / amount * 100) if amount > 0 else 0
     return {
         'budget_amount': amount,
@@ -50,8 +37,30 @@ def calculate_budget_utilization(db, budget_doc):
     }
 
 
+def calculate_budgets_utilization(db, budget_docs):
+    """Utilization for many budgets from their actual_spent counters; returns a list aligned with budget_docs.
+
+    Budgets that predate the counter are recounted from the rollups in one batch and backfilled.
+    """
+    missing = [b for b in budget_docs if b.get('actual_spent') is None]
+    if missing:
+        recount_budgets(db, missing)
+    return [_utilization(b.get('amount', 0), b.get('actual_spent', 0)) for b in budget_docs]
+
+
+def calculate_budget_utilization(db, budget_doc):
+    return calculate_budgets_utilization(db, [budget_doc])[0]
+
+
+def cost_center_names(db, cc_ids):
+    """Map cost-center _id -> name from the in-process reference cache."""
+    refs = reference_cache.names(db)
+    return {cc_id: refs.cost_center_name(cc_id) for cc_id in set(cc_ids) if cc_id}
+
+
 @budget_bp.route('/master', methods=['GET'])
 @jwt_required()
+@cacheable
 def get_master_budget():
     try:
         db = get_db()
@@ -93,16 +102,43 @@ def update_master_budget():
 
 @budget_bp.route('/', methods=['GET'])
 @jwt_required()
+@cacheable
 def get_budgets():
     try:
         db = get_db()
-        budgets = list(db.budgets.find({}))
+        budgets, next_cursor = paginate(
+            db.budgets, {}, 'period_start', request.args, allowed_fields=LIST_FIELDS,
+            required_fields=('cost_center_id', 'amount', 'period_end', 'actual_spent')
+        )
+        names = cost_center_names(db, [b.get('cost_center_id') for b in budgets])
         result = []
-        for b in budgets:
-            cc = db.cost_centers.find_one({'_id': b.get('cost_center_id')})
-            name = cc.get('name') if cc else None
-            d = budget_to_dict(b, cost_center_name=name)
-            d.update(calculate_budget_utilization(db, b))
+        for b, u in zip(budgets, calculate_budgets_utilization(db, budgets)):
+            d = budget_to_dict(b, cost_center_name=names.get(b.get('cost_center_id')))
+            d.update(u)
+            result.append(d)
+        return json_response(result, 200, headers=cursor_headers(next_cursor))
+    except PaginationError as e:
+        return json_response({'error': str(e)}, 400)
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+
+@budget_bp.route('/for-transaction', methods=['GET'])
+@jwt_required()
+def get_budgets_for_transaction():
+    """Budgets whose period covers ?transaction_date=YYYY-MM-DD for ?cost_center_id=..."""
+    try:
+        if not request.args.get('cost_center_id') or not request.args.get('transaction_date'):
+            return json_response({'error': 'cost_center_id and transaction_date are required'}, 400)
+        db = get_db()
+        cc_id = oid(request.args['cost_center_id'])
+        budget_ids = budget_index.budgets_for(db, cc_id, _date_parse(request.args['transaction_date']))
+        budgets = list(db.budgets.find({'_id': {'$in': budget_ids}})) if budget_ids else []
+        names = cost_center_names(db, [cc_id])
+        result = []
+        for b, u in zip(budgets, calculate_budgets_utilization(db, budgets)):
+            d = budget_to_dict(b, cost_center_name=names.get(cc_id))
+            d.update(u)
             result.append(d)
         return json_response(result, 200)
     except Exception as e:
@@ -122,8 +158,8 @@ def get_budget(id):
         d = budget_to_dict(budget, cost_center_name=name)
         d.update(calculate_budget_utilization(db, budget))
         cc_id = budget.get('cost_center_id')
-        ps = _doc_date(budget, 'period_start')
-        pe = _doc_date(budget, 'period_end')
+        ps = doc_date(budget, 'period_start')
+        pe = doc_date(budget, 'period_end')
         txns = list(db.transactions.find({
             'cost_center_id': cc_id,
             'transaction_date': {'$gte': ps, '$lte': pe}
@@ -146,25 +182,34 @@ def create_budget():
 
         db = get_db()
         cc_id = oid(data['cost_center_id'])
-        if not db.cost_centers.find_one({'_id': cc_id}):
+        cc = db.cost_centers.find_one({'_id': cc_id})
+        if not cc:
             return json_response({'error': 'Cost center not found'}, 404)
 
         period_start = _date_parse(data['period_start'])
         period_end = _date_parse(data['period_end'])
+        if period_start > period_end:
+            return json_response({'error': 'period_start must be on or before period_end'}, 400)
+        # overlapping budgets are allowed (e.g. monthly ones under an annual one); report them
+        overlaps = budget_index.overlapping(db, cc_id, period_start, period_end)
         doc = {
             'cost_center_id': cc_id,
             'amount': float(data['amount']),
             'period_start': period_start,
             'period_end': period_end,
+            'actual_spent': 0,
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
         }
         r = db.budgets.insert_one(doc)
         doc['_id'] = r.inserted_id
-        cc = db.cost_centers.find_one({'_id': cc_id})
-        d = budget_to_dict(doc, cost_center_name=cc.get('name') if cc else None)
+        budget_index.budget_changed(db, cc_id)
+        recount_budgets(db, [doc])
+        bump_versions('budgets')
+        d = budget_to_dict(doc, cost_center_name=cc.get('name'))
         d.update(calculate_budget_utilization(db, doc))
-        payload = {'message': 'Budget created successfully', 'budget': d}
+        payload = {'message': 'Budget created successfully', 'budget': d,
+                   'overlapping_budget_ids': [str(b) for b in overlaps]}
         return json_response(payload, 201)
     except Exception as e:
         return json_response({'error': str(e)}, 500)
@@ -181,18 +226,32 @@ def update_budget(id):
 
         data = request.get_json()
         updates = {'updated_at': datetime.utcnow()}
+        overlaps = None
         if 'amount' in data:
             updates['amount'] = data['amount']
         if 'period_start' in data:
             updates['period_start'] = _date_parse(data['period_start'])
         if 'period_end' in data:
             updates['period_end'] = _date_parse(data['period_end'])
+        period_changed = 'period_start' in updates or 'period_end' in updates
+        if period_changed:
+            period_start = updates.get('period_start') or doc_date(budget, 'period_start')
+            period_end = updates.get('period_end') or doc_date(budget, 'period_end')
+            if period_start > period_end:
+                return json_response({'error': 'period_start must be on or before period_end'}, 400)
+            overlaps = budget_index.overlapping(db, budget.get('cost_center_id'), period_start, period_end, exclude=budget['_id'])
         db.budgets.update_one({'_id': oid(id)}, {'$set': updates})
         budget = db.budgets.find_one({'_id': oid(id)})
+        if period_changed:
+            budget_index.budget_changed(db, budget.get('cost_center_id'))
+            recount_budgets(db, [budget])
+        bump_versions('budgets')
         cc = db.cost_centers.find_one({'_id': budget.get('cost_center_id')})
         d = budget_to_dict(budget, cost_center_name=cc.get('name') if cc else None)
         d.update(calculate_budget_utilization(db, budget))
         payload = {'message': 'Budget updated successfully', 'budget': d}
+        if overlaps is not None:
+            payload['overlapping_budget_ids'] = [str(b) for b in overlaps]
         return json_response(payload, 200)
     except Exception as e:
         return json_response({'error': str(e)}, 500)
@@ -203,9 +262,11 @@ def update_budget(id):
 def delete_budget(id):
     try:
         db = get_db()
-        r = db.budgets.delete_one({'_id': oid(id)})
-        if r.deleted_count == 0:
+        budget = db.budgets.find_one_and_delete({'_id': oid(id)})
+        if not budget:
             return json_response({'error': 'Budget not found'}, 404)
+        budget_index.budget_changed(db, budget.get('cost_center_id'))
+        bump_versions('budgets')
         return json_response({'message': 'Budget deleted successfully'}, 200)
     except Exception as e:
         return json_response({'error': str(e)}, 500)
@@ -213,6 +274,7 @@ def delete_budget(id):
 
 @budget_bp.route('/summary', methods=['GET'])
 @jwt_required()
+@cacheable
 def get_budget_summary():
     try:
         db = get_db()
@@ -220,8 +282,7 @@ def get_budget_summary():
         total_budget = sum(b.get('amount', 0) for b in budgets)
         total_spent = 0
         over_budget_count = 0
-        for b in budgets:
-            u = calculate_budget_utilization(db, b)
+        for u in calculate_budgets_utilization(db, budgets):
             total_spent += u['actual_spent']
             if u['is_over_budget']:
                 over_budget_count += 1
@@ -1,22 +1,32 @@
 # backend/app/api/cost_centers.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
 from app.database.connection import get_db
 from app.database.models import cost_center_to_dict, oid
+from app.database.reference_cache import reference_cache
+from app.utils.pagination import paginate, cursor_headers, PaginationError, ASCENDING
+from app.utils.json_response import json_response
+from app.utils.http_cache import cacheable
+from app.services.report_cache import bump_versions
 from datetime import datetime
 
 cost_centers_bp = Blueprint('cost_centers', __name__)
 
+LIST_FIELDS = ('name', 'code', 'description', 'created_at', 'updated_at')
+
 
 @cost_centers_bp.route('/', methods=['GET'])
 @jwt_required()
+@cacheable
 def get_cost_centers():
     try:
         db = get_db()
-        cursor = db.cost_centers.find({}).sort('name', 1)
-        return jsonify([cost_center_to_dict(d) for d in cursor]), 200
+        docs, next_cursor = paginate(db.cost_centers, {}, 'name', request.args, direction=ASCENDING, allowed_fields=LIST_FIELDS)
+        return json_response([cost_center_to_dict(d) for d in docs], 200, headers=cursor_headers(next_cursor))
+    except PaginationError as e:
+        return json_response({'error': str(e)}, 400)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @cost_centers_bp.route('/<id>', methods=['GET'])
@@ -26,10 +36,10 @@ def get_cost_center(id):
         db = get_db()
         doc = db.cost_centers.find_one({'_id': oid(id)})
         if not doc:
-            return jsonify({'error': 'Cost center not found'}), 404
-        return jsonify(cost_center_to_dict(doc)), 200
+            return json_response({'error': 'Cost center not found'}, 404)
+        return json_response(cost_center_to_dict(doc), 200)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @cost_centers_bp.route('/', methods=['POST'])
@@ -38,11 +48,11 @@ def create_cost_center():
     try:
         data = request.get_json()
         if not data.get('name') or not data.get('code'):
-            return jsonify({'error': 'Name and code are required'}), 400
+            return json_response({'error': 'Name and code are required'}, 400)
 
         db = get_db()
         if db.cost_centers.find_one({'code': data['code']}):
-            return jsonify({'error': 'Cost center code already exists'}), 400
+            return json_response({'error': 'Cost center code already exists'}, 400)
 
         doc = {
             'name': data['name'],
@@ -52,12 +62,14 @@ def create_cost_center():
         }
         r = db.cost_centers.insert_one(doc)
         doc['_id'] = r.inserted_id
-        return jsonify({
+        reference_cache.invalidate(db, 'cost_centers')
+        bump_versions('cost_centers')
+        return json_response({
             'message': 'Cost center created successfully',
             'cost_center': cost_center_to_dict(doc)
-        }), 201
+        }, 201)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @cost_centers_bp.route('/<id>', methods=['PUT'])
@@ -67,7 +79,7 @@ def update_cost_center(id):
         db = get_db()
         doc = db.cost_centers.find_one({'_id': oid(id)})
         if not doc:
-            return jsonify({'error': 'Cost center not found'}), 404
+            return json_response({'error': 'Cost center not found'}, 404)
 
         data = request.get_json()
         updates = {}
@@ -76,21 +88,23 @@ def update_cost_center(id):
         if 'code' in data:
             if data['code'] != doc.get('code'):
                 if db.cost_centers.find_one({'code': data['code']}):
-                    return jsonify({'error': 'Cost center code already exists'}), 400
+                    return json_response({'error': 'Cost center code already exists'}, 400)
             updates['code'] = data['code']
         if 'description' in data:
             updates['description'] = data['description']
         if not updates:
-            return jsonify({'message': 'No changes', 'cost_center': cost_center_to_dict(doc)}), 200
+            return json_response({'message': 'No changes', 'cost_center': cost_center_to_dict(doc)}, 200)
 
         db.cost_centers.update_one({'_id': oid(id)}, {'$set': updates})
+        reference_cache.invalidate(db, 'cost_centers')
+        bump_versions('cost_centers')
         doc = db.cost_centers.find_one({'_id': oid(id)})
-        return jsonify({
+        return json_response({
             'message': 'Cost center updated successfully',
             'cost_center': cost_center_to_dict(doc)
-        }), 200
+        }, 200)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @cost_centers_bp.route('/<id>', methods=['DELETE'])
@@ -100,14 +114,16 @@ def delete_cost_center(id):
         db = get_db()
         doc = db.cost_centers.find_one({'_id': oid(id)})
         if not doc:
-            return jsonify({'error': 'Cost center not found'}), 404
+            return json_response({'error': 'Cost center not found'}, 404)
 
         cc_id = doc['_id']
         if db.budgets.count_documents({'cost_center_id': cc_id}) > 0 or \
            db.transactions.count_documents({'cost_center_id': cc_id}) > 0:
-            return jsonify({'error': 'Cannot delete cost center that has budgets or transactions'}), 400
+            return json_response({'error': 'Cannot delete cost center that has budgets or transactions'}, 400)
 
         db.cost_centers.delete_one({'_id': oid(id)})
-        return jsonify({'message': 'Cost center deleted successfully'}), 200
+        reference_cache.invalidate(db, 'cost_centers')
+        bump_versions('cost_centers')
+        return json_response({'message': 'Cost center deleted successfully'}, 200)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
@@ -1,19 +1,62 @@
 # backend/app/api/invoices.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.database.connection import get_db
 from app.database.models import invoice_to_dict, user_to_dict, oid
+from app.database.invoice_payments import recount_invoices_paid
+from app.database.sequences import sequences
+from app.utils.pagination import paginate, cursor_headers, PaginationError
+from app.utils.json_response import json_response
+from app.services.report_cache import bump_versions
+from pymongo import ReturnDocument
 from datetime import datetime
-import random
-import string
+import re
 
 invoices_bp = Blueprint('invoices', __name__)
 
+LIST_FIELDS = (
+    'invoice_number', 'customer_id', 'amount', 'paid_amount', 'description', 'due_date', 'status', 'created_at', 'updated_at'
+)
 
-def generate_invoice_number():
+
+def _last_invoice_suffix(db, prefix):
+    """Highest numeric suffix already issued under prefix, so the day's sequence starts above it.
+
+    Suffixes are compared as integers: a string sort puts '-10000' below '-9999'. Only the
+    first reservation of the day in each process calls this, so reading the day's numbers is cheap.
+    """
+    pattern = '^' + re.escape(prefix) + r'\d+$'
+    suffixes = (int(d['invoice_number'][len(prefix):]) for d in db.invoices.find({'invoice_number': {'$regex': pattern}}, {'invoice_number': 1}))
+    return max(suffixes, default=0)
+
+
+def generate_invoice_number(db):
+    """INV-YYYYMMDD-NNNN from a per-day sequence: unique across workers, not gap-free.
+
+    NNNN is zero-padded to four digits and simply grows to five past 9999 (ordering
+    stays numeric, see _last_invoice_suffix). Each process reserves sequences.block_size
+    (50) numbers at a time, so a restart or a worker that stops mid-block skips the rest
+    of its block: expect gaps of up to 49 per process per day.
+    """
     date_str = datetime.now().strftime('%Y%m%d')
-    random_str = ''.join(random.choices(string.digits, k=4))
-    return f"INV-{date_str}-{random_str}"
+    prefix = f"INV-{date_str}-"
+    n = sequences.next(db, f'invoice_number:{date_str}', floor=lambda: _last_invoice_suffix(db, prefix))
+    return f"{prefix}{n:04d}"
+
+
+def invoices_to_dicts(db, invoices):
+    """invoice_to_dict for many invoices: paid_amount comes from the stored counter, emails from one users query."""
+    missing = [inv for inv in invoices if inv.get('paid_amount') is None]
+    if missing:
+        recount_invoices_paid(db, missing)
+    cust_ids = list({inv.get('customer_id') for inv in invoices if inv.get('customer_id')})
+    emails = {}
+    if cust_ids:
+        emails = {u['_id']: u.get('email') for u in db.users.find({'_id': {'$in': cust_ids}}, {'email': 1})}
+    return [
+        invoice_to_dict(inv, customer_email=emails.get(inv.get('customer_id')))
+        for inv in invoices
+    ]
 
 
 @invoices_bp.route('/', methods=['GET'])
@@ -22,18 +65,14 @@ def get_invoices():
     try:
         current_user = get_jwt_identity()
         db = get_db()
-        if current_user['role'] == 'admin':
-            cursor = db.invoices.find({})
-        else:
-            cursor = db.invoices.find({'customer_id': oid(current_user['id'])})
-        out = []
-        for inv in cursor:
-            cust = db.users.find_one({'_id': inv.get('customer_id')})
-            paid = sum(p['amount'] for p in db.payments.find({'invoice_id': inv['_id']}))
-            out.append(invoice_to_dict(inv, customer_email=cust.get('email') if cust else None, paid_amount=paid))
-        return jsonify(out), 200
+        q = {} if current_user['role'] == 'admin' else {'customer_id': oid(current_user['id'])}
+        docs, next_cursor = paginate(db.invoices, q, 'created_at', request.args,
+                                     allowed_fields=LIST_FIELDS, required_fields=('customer_id', 'amount', 'paid_amount'))
+        return json_response(invoices_to_dicts(db, docs), 200, headers=cursor_headers(next_cursor))
+    except PaginationError as e:
+        return json_response({'error': str(e)}, 400)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @invoices_bp.route('/<id>', methods=['GET'])
@@ -44,14 +83,12 @@ def get_invoice(id):
         db = get_db()
         inv = db.invoices.find_one({'_id': oid(id)})
         if not inv:
-            return jsonify({'error': 'Invoice not found'}), 404
+            return json_response({'error': 'Invoice not found'}, 404)
         if current_user['role'] != 'admin' and str(inv.get('customer_id')) != current_user['id']:
-            return jsonify({'error': 'Access denied'}), 403
-        cust = db.users.find_one({'_id': inv.get('customer_id')})
-        paid = sum(p['amount'] for p in db.payments.find({'invoice_id': inv['_id']}))
-        return jsonify(invoice_to_dict(inv, customer_email=cust.get('email') if cust else None, paid_amount=paid)), 200
+            return json_response({'error': 'Access denied'}, 403)
+        return json_response(invoices_to_dicts(db, [inv])[0], 200)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @invoices_bp.route('/', methods=['POST'])
@@ -60,18 +97,18 @@ def create_invoice():
     try:
         current_user = get_jwt_identity()
         if current_user['role'] != 'admin':
-            return jsonify({'error': 'Admin access required'}), 403
+            return json_response({'error': 'Admin access required'}, 403)
 
         data = request.get_json()
         if 'customer_id' not in data or 'amount' not in data:
-            return jsonify({'error': 'customer_id and amount are required'}), 400
+            return json_response({'error': 'customer_id and amount are required'}, 400)
 
         db = get_db()
         cust_id = oid(data['customer_id'])
         if not db.users.find_one({'_id': cust_id}):
-            return jsonify({'error': 'Customer not found'}), 404
+            return json_response({'error': 'Customer not found'}, 404)
 
-        invoice_number = generate_invoice_number()
+        invoice_number = generate_invoice_number(db)
         due_date = None
         if data.get('due_date'):
             due_date = datetime.strptime(data['due_date'], '%Y-%m-%d').date()
@@ -80,19 +117,21 @@ def create_invoice():
             'invoice_number': invoice_number,
             'customer_id': cust_id,
             'amount': float(data['amount']),
+            'paid_amount': 0,
             'status': 'unpaid',
             'due_date': due_date,
             'created_at': datetime.utcnow()
         }
         r = db.invoices.insert_one(doc)
         doc['_id'] = r.inserted_id
+        bump_versions('invoices')
         cust = db.users.find_one({'_id': cust_id})
-        return jsonify({
+        return json_response({
             'message': 'Invoice created successfully',
-            'invoice': invoice_to_dict(doc, customer_email=cust.get('email') if cust else None, paid_amount=0)
-        }), 201
+            'invoice': invoice_to_dict(doc, customer_email=cust.get('email') if cust else None)
+        }, 201)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @invoices_bp.route('/<id>/status', methods=['PUT'])
@@ -101,28 +140,27 @@ def update_invoice_status(id):
     try:
         current_user = get_jwt_identity()
         if current_user['role'] != 'admin':
-            return jsonify({'error': 'Admin access required'}), 403
+            return json_response({'error': 'Admin access required'}, 403)
 
         data = request.get_json()
         if 'status' not in data:
-            return jsonify({'error': 'status is required'}), 400
+            return json_response({'error': 'status is required'}, 400)
         if data['status'] not in ('unpaid', 'partial', 'paid'):
-            return jsonify({'error': "status must be 'unpaid', 'partial', or 'paid'"}), 400
+            return json_response({'error': "status must be 'unpaid', 'partial', or 'paid'"}, 400)
 
         db = get_db()
-        inv = db.invoices.find_one({'_id': oid(id)})
+        inv = db.invoices.find_one_and_update(
+            {'_id': oid(id)}, {'$set': {'status': data['status']}}, return_document=ReturnDocument.AFTER
+        )
         if not inv:
-            return jsonify({'error': 'Invoice not found'}), 404
-        db.invoices.update_one({'_id': oid(id)}, {'$set': {'status': data['status']}})
-        inv = db.invoices.find_one({'_id': oid(id)})
-        paid = sum(p['amount'] for p in db.payments.find({'invoice_id': inv['_id']}))
-        cust = db.users.find_one({'_id': inv.get('customer_id')})
-        return jsonify({
+            return json_response({'error': 'Invoice not found'}, 404)
+        bump_versions('invoices')
+        return json_response({
             'message': 'Invoice status updated',
-            'invoice': invoice_to_dict(inv, customer_email=cust.get('email') if cust else None, paid_amount=paid)
-        }), 200
+            'invoice': invoices_to_dicts(db, [inv])[0]
+        }, 200)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @invoices_bp.route('/customer/<customer_id>', methods=['GET'])
@@ -131,26 +169,21 @@ def get_customer_invoices(customer_id):
     try:
         current_user = get_jwt_identity()
         if current_user['role'] != 'admin':
-            return jsonify({'error': 'Admin access required'}), 403
+            return json_response({'error': 'Admin access required'}, 403)
 
         db = get_db()
         cid = oid(customer_id)
         invoices = list(db.invoices.find({'customer_id': cid}))
         total_amount = sum(inv.get('amount', 0) for inv in invoices)
-        total_paid = 0
-        out = []
-        for inv in invoices:
-            paid = sum(p['amount'] for p in db.payments.find({'invoice_id': inv['_id']}))
-            total_paid += paid
-            cust = db.users.find_one({'_id': inv.get('customer_id')})
-            out.append(invoice_to_dict(inv, customer_email=cust.get('email') if cust else None, paid_amount=paid))
-        return jsonify({
+        out = invoices_to_dicts(db, invoices)
+        total_paid = sum(d['paid_amount'] for d in out)
+        return json_response({
             'customer_id': customer_id,
             'total_invoices': len(invoices),
             'total_amount': total_amount,
             'total_paid': total_paid,
             'total_balance': total_amount - total_paid,
             'invoices': out
-        }), 200
+        }, 200)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
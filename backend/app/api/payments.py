@@ -1,8 +1,15 @@
 # backend/app/api/payments.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.database.connection import get_db
-from app.database.models import payment_to_dict, invoice_to_dict, oid
+from app.database.models import payment_to_dict, oid
+from app.database.invoice_payments import apply_payment
+from app.database.webhook_events import record_event
+from app.services.payment_gateway import GatewayBusy, GatewayTimeout, payment_idempotency_key
+from app.services.report_cache import bump_versions
+from app.api.invoices import invoices_to_dicts
+from app.utils.pagination import paginate, cursor_headers, PaginationError
+from app.utils.json_response import json_response
 from datetime import datetime
 import stripe
 import os
@@ -13,6 +20,8 @@ payments_bp = Blueprint('payments', __name__)
 stripe.api_key = os.getenv('STRIPE_SECRET_KEY', 'sk_test_4eC39HqLyjWDarjtT1zdp7dc')
 STRIPE_PUBLISHABLE_KEY = os.getenv('STRIPE_PUBLISHABLE_KEY', 'pk_test_TYooMQauvdEDq54NiTphI7jx')
 
+LIST_FIELDS = ('invoice_id', 'amount', 'payment_method', 'payment_date', 'transaction_id', 'status', 'created_at')
+
 
 @payments_bp.route('/', methods=['GET'])
 @jwt_required()
@@ -21,17 +30,21 @@ def get_payments():
         current_user = get_jwt_identity()
         db = get_db()
         if current_user['role'] == 'admin':
-            cursor = db.payments.find({})
+            q = {}
         else:
-            inv_ids = [inv['_id'] for inv in db.invoices.find({'customer_id': oid(current_user['id'])})]
-            cursor = db.payments.find({'invoice_id': {'$in': inv_ids}})
+            inv_ids = [inv['_id'] for inv in db.invoices.find({'customer_id': oid(current_user['id'])}, {'_id': 1})]
+            q = {'invoice_id': {'$in': inv_ids}}
+        docs, next_cursor = paginate(db.payments, q, 'payment_date', request.args,
+                                     allowed_fields=LIST_FIELDS, required_fields=('invoice_id',))
         out = []
-        for p in cursor:
+        for p in docs:
             inv = db.invoices.find_one({'_id': p.get('invoice_id')})
             out.append(payment_to_dict(p, invoice_number=inv.get('invoice_number') if inv else None))
-        return jsonify(out), 200
+        return json_response(out, 200, headers=cursor_headers(next_cursor))
+    except PaginationError as e:
+        return json_response({'error': str(e)}, 400)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @payments_bp.route('/invoice/<invoice_id>', methods=['GET'])
@@ -41,23 +54,23 @@ def get_invoice_payments(invoice_id):
         db = get_db()
         inv = db.invoices.find_one({'_id': oid(invoice_id)})
         if not inv:
-            return jsonify({'error': 'Invoice not found'}), 404
+            return json_response({'error': 'Invoice not found'}, 404)
         current_user = get_jwt_identity()
         if current_user['role'] != 'admin' and str(inv.get('customer_id')) != current_user['id']:
-            return jsonify({'error': 'Access denied'}), 403
+            return json_response({'error': 'Access denied'}, 403)
 
         payments = list(db.payments.find({'invoice_id': inv['_id']}))
         total_paid = sum(p['amount'] for p in payments)
         out = [payment_to_dict(p, invoice_number=inv.get('invoice_number')) for p in payments]
-        return jsonify({
+        return json_response({
             'invoice_id': str(inv['_id']),
             'invoice_amount': inv.get('amount', 0),
             'total_paid': total_paid,
             'balance': inv.get('amount', 0) - total_paid,
             'payments': out
-        }), 200
+        }, 200)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @payments_bp.route('/create-payment-intent', methods=['POST'])
@@ -66,18 +79,23 @@ def create_payment_intent():
     try:
         data = request.get_json()
         if not data.get('invoice_id') or not data.get('amount'):
-            return jsonify({'error': 'invoice_id and amount are required'}), 400
+            return json_response({'error': 'invoice_id and amount are required'}, 400)
 
         db = get_db()
         inv = db.invoices.find_one({'_id': oid(data['invoice_id'])})
         if not inv:
-            return jsonify({'error': 'Invoice not found'}), 404
+            return json_response({'error': 'Invoice not found'}, 404)
         current_user = get_jwt_identity()
         if current_user['role'] != 'admin' and str(inv.get('customer_id')) != current_user['id']:
-            return jsonify({'error': 'Access denied'}), 403
-
-        intent = stripe.PaymentIntent.create(
-            amount=int(data['amount'] * 100),
+            return json_response({'error': 'Access denied'}, 403)
+
+        amount_cents = int(data['amount'] * 100)
+        nonce = request.headers.get('Idempotency-Key') or data.get('idempotency_key') or ''
+        gateway = current_app.extensions['payment_gateway']
+        intent = gateway.call(
+            'create_payment_intent',
+            idempotency_key=payment_idempotency_key(inv['_id'], amount_cents, inv.get('paid_amount'), nonce),
+            amount=amount_cents,
             currency='usd',
             metadata={
                 'invoice_id': str(inv['_id']),
@@ -86,16 +104,18 @@ def create_payment_intent():
             },
             description=f"Payment for invoice {inv.get('invoice_number', '')}"
         )
-        paid = sum(p['amount'] for p in db.payments.find({'invoice_id': inv['_id']}))
-        cust = db.users.find_one({'_id': inv.get('customer_id')})
-        return jsonify({
-            'client_secret': intent.client_secret,
+        return json_response({
+            'client_secret': intent['client_secret'],
             'publishable_key': STRIPE_PUBLISHABLE_KEY,
             'amount': data['amount'],
-            'invoice': invoice_to_dict(inv, customer_email=cust.get('email') if cust else None, paid_amount=paid)
-        }), 200
+            'invoice': invoices_to_dicts(db, [inv])[0]
+        }, 200)
+    except GatewayBusy:
+        return json_response({'error': 'Payment provider is busy, please retry shortly'}, 503, headers={'Retry-After': '1'})
+    except GatewayTimeout:
+        return json_response({'error': 'Payment provider did not respond in time'}, 504)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @payments_bp.route('/record-payment', methods=['POST'])
@@ -104,17 +124,17 @@ def record_payment():
     try:
         current_user = get_jwt_identity()
         if current_user['role'] != 'admin':
-            return jsonify({'error': 'Admin access required'}), 403
+            return json_response({'error': 'Admin access required'}, 403)
 
         data = request.get_json()
         for f in ['invoice_id', 'amount', 'payment_method']:
             if f not in data:
-                return jsonify({'error': f'{f} is required'}), 400
+                return json_response({'error': f'{f} is required'}, 400)
 
         db = get_db()
         inv = db.invoices.find_one({'_id': oid(data['invoice_id'])})
         if not inv:
-            return jsonify({'error': 'Invoice not found'}), 404
+            return json_response({'error': 'Invoice not found'}, 404)
 
         doc = {
             'invoice_id': inv['_id'],
@@ -126,55 +146,38 @@ def record_payment():
             'created_at': datetime.utcnow()
         }
         db.payments.insert_one(doc)
-        total_paid = sum(p['amount'] for p in db.payments.find({'invoice_id': inv['_id']}))
-        status = 'paid' if total_paid >= inv.get('amount', 0) else ('partial' if total_paid > 0 else 'unpaid')
-        db.invoices.update_one({'_id': inv['_id']}, {'$set': {'status': status}})
-        inv = db.invoices.find_one({'_id': inv['_id']})
-        paid = sum(p['amount'] for p in db.payments.find({'invoice_id': inv['_id']}))
-        cust = db.users.find_one({'_id': inv.get('customer_id')})
-        return jsonify({
+        inv = apply_payment(db, inv['_id'], doc['amount']) or inv
+        bump_versions('payments', 'invoices')
+        return json_response({
             'message': 'Payment recorded successfully',
             'payment': payment_to_dict(doc, invoice_number=inv.get('invoice_number')),
-            'invoice': invoice_to_dict(inv, customer_email=cust.get('email') if cust else None, paid_amount=paid)
-        }), 201
+            'invoice': invoices_to_dicts(db, [inv])[0]
+        }, 201)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @payments_bp.route('/stripe-webhook', methods=['POST'])
 def stripe_webhook():
+    """Record the event and acknowledge; payments are applied by the background workers."""
     try:
         payload = request.get_data(as_text=True)
         sig_header = request.headers.get('Stripe-Signature')
         event = json.loads(payload)
-        if isinstance(event, dict) and event.get('type') == 'payment_intent.succeeded':
-            payment_intent = event.get('data', {}).get('object', {})
-            invoice_id = payment_intent.get('metadata', {}).get('invoice_id')
-            amount = payment_intent.get('amount', 0) / 100
-            if invoice_id:
-                db = get_db()
-                inv = db.invoices.find_one({'_id': oid(invoice_id)})
-                if inv:
-                    db.payments.insert_one({
-                        'invoice_id': inv['_id'],
-                        'amount': amount,
-                        'payment_method': 'stripe',
-                        'transaction_id': payment_intent.get('id'),
-                        'status': 'completed',
-                        'payment_date': datetime.utcnow(),
-                        'created_at': datetime.utcnow()
-                    })
-                    total_paid = sum(p['amount'] for p in db.payments.find({'invoice_id': inv['_id']}))
-                    status = 'paid' if total_paid >= inv.get('amount', 0) else 'partial'
-                    db.invoices.update_one({'_id': inv['_id']}, {'$set': {'status': status}})
-        return jsonify({'status': 'success'}), 200
+        if not isinstance(event, dict):
+            return json_response({'error': 'Invalid event payload'}, 400)
+        created = record_event(get_db(), event)
+        pool = current_app.extensions.get('webhook_workers')
+        if created and pool:
+            pool.notify()
+        return json_response({'status': 'success', 'duplicate': not created}, 200)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @payments_bp.route('/test-stripe', methods=['GET'])
 def test_stripe():
-    return jsonify({
+    return json_response({
         'status': 'Stripe integration ready',
         'mode': 'test',
         'publishable_key': STRIPE_PUBLISHABLE_KEY,
@@ -1,22 +1,29 @@
 # backend/app/api/products.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
 from app.database.connection import get_db
 from app.database.models import product_to_dict, oid
+from app.database.reference_cache import reference_cache
+from app.utils.pagination import paginate, cursor_headers, PaginationError, ASCENDING
+from app.utils.json_response import json_response
 from datetime import datetime
 
 products_bp = Blueprint('products', __name__)
 
+LIST_FIELDS = ('name', 'sku', 'price', 'category', 'description', 'created_at', 'updated_at')
+
 
 @products_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_products():
     try:
         db = get_db()
-        cursor = db.products.find({}).sort('name', 1)
-        return jsonify([product_to_dict(d) for d in cursor]), 200
+        docs, next_cursor = paginate(db.products, {}, 'name', request.args, direction=ASCENDING, allowed_fields=LIST_FIELDS)
+        return json_response([product_to_dict(d) for d in docs], 200, headers=cursor_headers(next_cursor))
+    except PaginationError as e:
+        return json_response({'error': str(e)}, 400)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @products_bp.route('/<id>', methods=['GET'])
@@ -26,10 +33,10 @@ def get_product(id):
         db = get_db()
         doc = db.products.find_one({'_id': oid(id)})
         if not doc:
-            return jsonify({'error': 'Product not found'}), 404
-        return jsonify(product_to_dict(doc)), 200
+            return json_response({'error': 'Product not found'}, 404)
+        return json_response(product_to_dict(doc), 200)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @products_bp.route('/', methods=['POST'])
@@ -38,11 +45,11 @@ def create_product():
     try:
         data = request.get_json()
         if not data.get('name'):
-            return jsonify({'error': 'Product name is required'}), 400
+            return json_response({'error': 'Product name is required'}, 400)
 
         db = get_db()
         if data.get('sku') and db.products.find_one({'sku': data['sku']}):
-            return jsonify({'error': 'Product SKU already exists'}), 400
+            return json_response({'error': 'Product SKU already exists'}, 400)
 
         doc = {
             'name': data['name'],
@@ -54,12 +61,13 @@ def create_product():
         }
         r = db.products.insert_one(doc)
         doc['_id'] = r.inserted_id
-        return jsonify({
+        reference_cache.invalidate(db, 'products')
+        return json_response({
             'message': 'Product created successfully',
             'product': product_to_dict(doc)
-        }), 201
+        }, 201)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @products_bp.route('/<id>', methods=['PUT'])
@@ -69,7 +77,7 @@ def update_product(id):
         db = get_db()
         doc = db.products.find_one({'_id': oid(id)})
         if not doc:
-            return jsonify({'error': 'Product not found'}), 404
+            return json_response({'error': 'Product not found'}, 404)
 
         data = request.get_json()
         updates = {}
@@ -77,7 +85,7 @@ def update_product(id):
             updates['name'] = data['name']
         if 'sku' in data:
             if data['sku'] != doc.get('sku') and db.products.find_one({'sku': data['sku']}):
-                return jsonify({'error': 'Product SKU already exists'}), 400
+                return json_response({'error': 'Product SKU already exists'}, 400)
             updates['sku'] = data['sku']
         if 'category' in data:
             updates['category'] = data['category']
@@ -87,13 +95,14 @@ def update_product(id):
             updates['description'] = data['description']
         if updates:
             db.products.update_one({'_id': oid(id)}, {'$set': updates})
+            reference_cache.invalidate(db, 'products')
         doc = db.products.find_one({'_id': oid(id)})
-        return jsonify({
+        return json_response({
             'message': 'Product updated successfully',
             'product': product_to_dict(doc)
-        }), 200
+        }, 200)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @products_bp.route('/<id>', methods=['DELETE'])
@@ -103,11 +112,12 @@ def delete_product(id):
         db = get_db()
         doc = db.products.find_one({'_id': oid(id)})
         if not doc:
-            return jsonify({'error': 'Product not found'}), 404
+            return json_response({'error': 'Product not found'}, 404)
         pid = doc['_id']
         if db.transactions.count_documents({'product_id': pid}) > 0:
-            return jsonify({'error': 'Cannot delete product that has transactions'}), 400
+            return json_response({'error': 'Cannot delete product that has transactions'}, 400)
         db.products.delete_one({'_id': oid(id)})
-        return jsonify({'message': 'Product deleted successfully'}), 200
+        reference_cache.invalidate(db, 'products')
+        return json_response({'message': 'Product deleted successfully'}, 200)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
@@ -1,112 +1,202 @@
 # backend/app/api/reports.py
-from flask import Blueprint, request
+from flask import Blueprint, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.database.connection import get_db
-from app.database.models import transaction_to_dict, budget_to_dict, invoice_to_dict, oid
+from app.database.models import transaction_to_dict, budget_to_dict, oid
+from app.database.rollups import ROLLUPS
+from app.database.slow_queries import PERF_SLOW_QUERIES
+from app.api.budget import calculate_budgets_utilization, cost_center_names
+from app.api.invoices import invoices_to_dicts
 from app.utils.json_response import json_response
+from app.utils.streaming import export_format, stream_rows, ExportFormatError, EXPORT_BATCH_SIZE
+from app.utils.dates import DateArgError, date_arg, doc_date
+from app.utils.pagination import PaginationError, int_arg
+from app.utils.http_cache import cacheable, etag_headers
+from app.services.report_cache import cached_report
+from app.services.singleflight import coalesced
+from app.services.admission import admit
+from utils.constants import Constants
 from datetime import datetime, timedelta
 from collections import defaultdict
 
 reports_bp = Blueprint('reports', __name__)
 
 
-def _doc_date(doc, key):
-    v = doc.get(key)
-    if v is None:
-        return None
-    if hasattr(v, 'date'):
-        return v.date() if hasattr(v, 'date') else v
-    if isinstance(v, str):
-        return datetime.strptime(v[:10], '%Y-%m-%d').date()
-    return v
+def _transaction_filter(date_field='transaction_date'):
+    """Build a transactions (or rollups, date_field='day') query from optional start_date/end_date/cost_center_id args."""
+    q = {}
+    start_date = date_arg(request.args, 'start_date')
+    end_date = date_arg(request.args, 'end_date')
+    if start_date:
+        q.setdefault(date_field, {})['$gte'] = start_date
+    if end_date:
+        q.setdefault(date_field, {})['$lte'] = end_date
+    if request.args.get('cost_center_id'):
+        q['cost_center_id'] = oid(request.args.get('cost_center_id'))
+    return q
 
 
 @reports_bp.route('/chart-data', methods=['GET'])
 @jwt_required()
+@cacheable
+@cached_report('transactions')
+@admit('report')
 def chart_data():
     try:
         db = get_db()
-        transactions = list(db.transactions.find({}).sort('transaction_date', 1))
-        if not transactions:
+        # Raw rows are opt-in (?include_transactions=true) and paginated with page/page_size.
+        include_transactions = request.args.get('include_transactions', '').lower() in ('1', 'true', 'yes')
+        if include_transactions:
+            page = max(int_arg(request.args, 'page', 1), 1)
+            page_size = min(max(int_arg(request.args, 'page_size', Constants.DEFAULT_PAGE_SIZE), 1), Constants.MAX_PAGE_SIZE)
+        pipeline = [
+            {'$match': _transaction_filter(date_field='day')},
+            {'$group': {
+                '_id': {
+                    'month': {'$dateToString': {'format': '%Y-%m', 'date': '$day'}},
+                    'type': '$type'
+                },
+                'total': {'$sum': '$amount'}
+            }}
+        ]
+        by_month = defaultdict(lambda: {'purchase': 0, 'sale': 0, 'total': 0})
+        for row in db[ROLLUPS].aggregate(pipeline):
+            month_key = row['_id'].get('month') or 'Unknown'
+            by_month[month_key][row['_id'].get('type', '')] = row['total']
+            by_month[month_key]['total'] += row['total']
+        if not by_month:
             return json_response({
                 'labels': [], 'datasets': [], 'has_data': False,
                 'message': 'No transaction data yet. Add transactions to see the chart.'
             }, 200)
-        by_month = defaultdict(lambda: {'purchase': 0, 'sale': 0, 'total': 0})
-        months_seen = set()
-        for t in transactions:
-            dt = _doc_date(t, 'transaction_date')
-            month_key = dt.strftime('%Y-%m') if dt else 'Unknown'
-            months_seen.add(month_key)
-            by_month[month_key][t.get('type', '')] += t.get('amount', 0)
-            by_month[month_key]['total'] += t.get('amount', 0)
-        labels = sorted(months_seen)
-        return json_response({
+        labels = sorted(by_month)
+        payload = {
             'labels': labels,
             'datasets': [
                 {'label': 'Purchases', 'data': [by_month[m]['purchase'] for m in labels], 'backgroundColor': '#ef4444'},
                 {'label': 'Sales', 'data': [by_month[m]['sale'] for m in labels], 'backgroundColor': '#22c55e'},
                 {'label': 'Total', 'data': [by_month[m]['total'] for m in labels], 'backgroundColor': '#3b82f6'}
             ],
-            'has_data': True,
-            'transactions': [transaction_to_dict(t) for t in transactions]
-        }, 200)
+            'has_data': True
+        }
+        if include_transactions:
+            cursor = db.transactions.find(_transaction_filter()).sort([('transaction_date', 1), ('_id', 1)]).skip((page - 1) * page_size).limit(page_size + 1)
+            rows = list(cursor)
+            payload['transactions'] = [transaction_to_dict(t) for t in rows[:page_size]]
+            payload['pagination'] = {'page': page, 'page_size': page_size, 'has_more': len(rows) > page_size}
+        return json_response(payload, 200)
+    except (DateArgError, PaginationError) as e:
+        return json_response({'error': str(e)}, 400)
     except Exception as e:
         return json_response({'error': str(e)}, 500)
 
 
+def _report_response(payload):
+    """200 response for a report; the ETag covers the data, not the generation timestamp."""
+    headers = etag_headers(payload)
+    payload['timestamp'] = datetime.utcnow().isoformat()
+    return json_response(payload, 200, headers=headers)
+
+
+def _budget_period_filter():
+    """Budgets overlapping the optional start_date/end_date window (and cost_center_id)."""
+    q = {}
+    start_date = date_arg(request.args, 'start_date')
+    end_date = date_arg(request.args, 'end_date')
+    if end_date:
+        q['period_start'] = {'$lte': end_date}
+    if start_date:
+        q['period_end'] = {'$gte': start_date}
+    if request.args.get('cost_center_id'):
+        q['cost_center_id'] = oid(request.args.get('cost_center_id'))
+    return q
+
+
+def _budget_actuals_pipeline(match):
+    """Budgets with their actual_spent counter joined to their cost-center name."""
+    return [
+        {'$match': match},
+        {'$lookup': {'from': 'cost_centers', 'localField': 'cost_center_id', 'foreignField': '_id', 'as': 'cost_center'}},
+        {'$project': {
+            'cost_center_id': 1,
+            'amount': 1,
+            'period_start': 1,
+            'period_end': 1,
+            'actual_spent': {'$ifNull': ['$actual_spent', 0]},
+            'cost_center_name': {'$arrayElemAt': ['$cost_center.name', 0]}
+        }}
+    ]
+
+
+BUDGET_VS_ACTUAL_COLUMNS = [
+    'budget_id', 'cost_center_id', 'cost_center_name', 'budget_amount', 'actual_spent',
+    'variance', 'utilization_percentage', 'period_start', 'period_end'
+]
+
+
+def _budget_vs_actual_row(row):
+    ps = doc_date(row, 'period_start')
+    pe = doc_date(row, 'period_end')
+    amt = row.get('amount', 0)
+    actual_spent = row.get('actual_spent', 0)
+    utilization = (actual_spent / amt * 100) if amt > 0 else 0
+    return {
+        'budget_id': str(row['_id']),
+        'cost_center_id': str(row.get('cost_center_id')),
+        'cost_center_name': row.get('cost_center_name'),
+        'budget_amount': amt,
+        'actual_spent': actual_spent,
+        'variance': amt - actual_spent,
+        'utilization_percentage': round(utilization, 2),
+        'period_start': ps.isoformat() if ps else None,
+        'period_end': pe.isoformat() if pe else None
+    }
+
+
 @reports_bp.route('/budget-vs-actual', methods=['GET'])
 @jwt_required()
+@cacheable
+@cached_report('budgets', 'cost_centers', 'transactions')
+@coalesced
+@admit('report')
 def budget_vs_actual_report():
     try:
         db = get_db()
-        budgets = list(db.budgets.find({}))
+        fmt = export_format(request.args)
+        cursor = db.budgets.aggregate(_budget_actuals_pipeline(_budget_period_filter()), batchSize=EXPORT_BATCH_SIZE)
+        if fmt:
+            rows = (_budget_vs_actual_row(row) for row in cursor)
+            return stream_rows(rows, fmt, BUDGET_VS_ACTUAL_COLUMNS, 'budget-vs-actual')
         report_data = []
         total_budget = 0
         total_actual = 0
-        for budget in budgets:
-            cc_id = budget.get('cost_center_id')
-            ps = _doc_date(budget, 'period_start')
-            pe = _doc_date(budget, 'period_end')
-            amt = budget.get('amount', 0)
-            txns = list(db.transactions.find({
-                'cost_center_id': cc_id,
-                'transaction_date': {'$gte': ps, '$lte': pe}
-            }))
-            actual_spent = sum(t.get('amount', 0) for t in txns)
-            utilization = (actual_spent / amt * 100) if amt > 0 else 0
-            cc = db.cost_centers.find_one({'_id': cc_id})
-            report_data.append({
-                'budget_id': str(budget['_id']),
-                'cost_center_id': str(cc_id),
-                'cost_center_name': cc.get('name') if cc else None,
-                'budget_amount': amt,
-                'actual_spent': actual_spent,
-                'variance': amt - actual_spent,
-                'utilization_percentage': round(utilization, 2),
-                'period_start': ps.isoformat() if ps else None,
-                'period_end': pe.isoformat() if pe else None
-            })
-            total_budget += amt
-            total_actual += actual_spent
+        for row in cursor:
+            d = _budget_vs_actual_row(row)
+            report_data.append(d)
+            total_budget += d['budget_amount']
+            total_actual += d['actual_spent']
         total_variance = total_budget - total_actual
         total_utilization = (total_actual / total_budget * 100) if total_budget > 0 else 0
-        return json_response({
+        return _report_response({
             'summary': {
                 'total_budget': total_budget,
                 'total_actual': total_actual,
                 'total_variance': total_variance,
                 'overall_utilization': round(total_utilization, 2)
             },
-            'details': report_data,
-            'timestamp': datetime.utcnow().isoformat()
-        }, 200)
+            'details': report_data
+        })
+    except (ExportFormatError, DateArgError) as e:
+        return json_response({'error': str(e)}, 400)
     except Exception as e:
         return json_response({'error': str(e)}, 500)
 
 
 @reports_bp.route('/financial-summary', methods=['GET'])
 @jwt_required()
+@cacheable
+@cached_report('transactions', 'invoices', 'payments')
+@admit('report')
 def financial_summary():
     try:
         current_user = get_jwt_identity()
@@ -120,10 +210,10 @@ def financial_summary():
         end_dt = datetime.combine(end_date, datetime.max.time())
 
         pipeline_txn = [
-            {'$match': {'transaction_date': {'$gte': start_date, '$lte': end_date}}},
+            {'$match': {'day': {'$gte': start_date, '$lte': end_date}}},
             {'$group': {'_id': '$type', 'total': {'$sum': '$amount'}}}
         ]
-        agg = list(db.transactions.aggregate(pipeline_txn))
+        agg = list(db[ROLLUPS].aggregate(pipeline_txn))
         by_type = {x['_id']: x['total'] for x in agg}
         total_sales = by_type.get('sale', 0)
         total_purchases = by_type.get('purchase', 0)
@@ -147,7 +237,7 @@ def financial_summary():
         })
         payment_count = db.payments.count_documents({'payment_date': {'$gte': start_dt, '$lte': end_dt}})
 
-        return json_response({
+        return _report_response({
             'period': {'start_date': start_date.isoformat(), 'end_date': end_date.isoformat()},
             'summary': {
                 'total_sales': total_sales,
@@ -162,15 +252,46 @@ def financial_summary():
                 'invoices_paid': paid_invoices,
                 'payments_received': payment_count,
                 'payment_rate': round((paid_invoices / invoice_count * 100) if invoice_count > 0 else 0, 2)
-            },
-            'timestamp': datetime.utcnow().isoformat()
-        }, 200)
+            }
+        })
     except Exception as e:
         return json_response({'error': str(e)}, 500)
 
 
+PERFORMANCE_COLUMNS = [
+    'cost_center_id', 'cost_center_name', 'cost_center_code', 'total_transactions', 'purchase_count', 'sale_count',
+    'total_spent', 'budget_amount', 'budget_count', 'utilization_percentage', 'remaining_budget', 'is_over_budget'
+]
+
+
+def _performance_row(cc):
+    txn = cc.get('txn') or {}
+    budget = cc.get('budget') or {}
+    total_spent = txn.get('total', 0)
+    amt = budget.get('amount', 0)
+    utilization = (total_spent / amt * 100) if amt > 0 else 0
+    return {
+        'cost_center_id': str(cc['_id']),
+        'cost_center_name': cc.get('name'),
+        'cost_center_code': cc.get('code'),
+        'total_transactions': txn.get('count', 0),
+        'purchase_count': txn.get('purchase_count', 0),
+        'sale_count': txn.get('sale_count', 0),
+        'total_spent': total_spent,
+        'budget_amount': amt,
+        'budget_count': budget.get('count', 0),
+        'utilization_percentage': round(utilization, 2),
+        'remaining_budget': amt - total_spent,
+        'is_over_budget': total_spent > amt
+    }
+
+
 @reports_bp.route('/cost-center-performance', methods=['GET'])
 @jwt_required()
+@cacheable
+@cached_report('cost_centers', 'transactions', 'budgets')
+@coalesced
+@admit('report')
 def cost_center_performance():
     try:
         current_user = get_jwt_identity()
@@ -178,94 +299,126 @@ def cost_center_performance():
             return json_response({'error': 'Admin access required'}, 403)
 
         db = get_db()
-        cost_centers = list(db.cost_centers.find({}))
-        performance_data = []
-        for cc in cost_centers:
-            cc_id = cc['_id']
-            budget = db.budgets.find_one({'cost_center_id': cc_id})
-            transactions = list(db.transactions.find({'cost_center_id': cc_id}))
-            total_spent = sum(t.get('amount', 0) for t in transactions)
-            amt = budget.get('amount', 0) if budget else 0
-            utilization = (total_spent / amt * 100) if amt > 0 else 0
-            remaining = amt - total_spent
-            purchase_count = sum(1 for t in transactions if t.get('type') == 'purchase')
-            sale_count = sum(1 for t in transactions if t.get('type') == 'sale')
-            performance_data.append({
-                'cost_center_id': str(cc_id),
-                'cost_center_name': cc.get('name'),
-                'cost_center_code': cc.get('code'),
-                'total_transactions': len(transactions),
-                'purchase_count': purchase_count,
-                'sale_count': sale_count,
-                'total_spent': total_spent,
-                'budget_amount': amt,
-                'utilization_percentage': round(utilization, 2),
-                'remaining_budget': remaining,
-                'is_over_budget': total_spent > amt
-            })
-        return json_response({
-            'cost_centers': performance_data,
-            'timestamp': datetime.utcnow().isoformat()
-        }, 200)
+        start_date = date_arg(request.args, 'start_date')
+        end_date = date_arg(request.args, 'end_date')
+        rollup_match = {'$expr': {'$eq': ['$cost_center_id', '$$cc_id']}}
+        budget_match = {'$expr': {'$eq': ['$cost_center_id', '$$cc_id']}}
+        if start_date or end_date:
+            rollup_match['day'] = {}
+        if start_date:
+            rollup_match['day']['$gte'] = start_date
+            budget_match['period_end'] = {'$gte': start_date}
+        if end_date:
+            rollup_match['day']['$lte'] = end_date
+            budget_match['period_start'] = {'$lte': end_date}
+        pipeline = [
+            {'$lookup': {
+                'from': ROLLUPS,
+                'let': {'cc_id': '$_id'},
+                'pipeline': [
+                    {'$match': rollup_match},
+                    {'$group': {
+                        '_id': None,
+                        'count': {'$sum': '$count'},
+                        'total': {'$sum': '$amount'},
+                        'purchase_count': {'$sum': {'$cond': [{'$eq': ['$type', 'purchase']}, '$count', 0]}},
+                        'sale_count': {'$sum': {'$cond': [{'$eq': ['$type', 'sale']}, '$count', 0]}}
+                    }}
+                ],
+                'as': 'txn_stats'
+            }},
+            {'$lookup': {
+                'from': 'budgets',
+                'let': {'cc_id': '$_id'},
+                'pipeline': [
+                    {'$match': budget_match},
+                    {'$group': {'_id': None, 'amount': {'$sum': '$amount'}, 'count': {'$sum': 1}}}
+                ],
+                'as': 'budget_stats'
+            }},
+            {'$project': {
+                'name': 1,
+                'code': 1,
+                'txn': {'$ifNull': [{'$arrayElemAt': ['$txn_stats', 0]}, {}]},
+                'budget': {'$ifNull': [{'$arrayElemAt': ['$budget_stats', 0]}, {}]}
+            }},
+            {'$sort': {'name': 1}}
+        ]
+        fmt = export_format(request.args)
+        cursor = db.cost_centers.aggregate(pipeline, batchSize=EXPORT_BATCH_SIZE)
+        if fmt:
+            return stream_rows((_performance_row(cc) for cc in cursor), fmt, PERFORMANCE_COLUMNS, 'cost-center-performance')
+        performance_data = [_performance_row(cc) for cc in cursor]
+        return _report_response({
+            'period': {
+                'start_date': start_date.isoformat() if start_date else None,
+                'end_date': end_date.isoformat() if end_date else None
+            },
+            'cost_centers': performance_data
+        })
+    except (ExportFormatError, DateArgError) as e:
+        return json_response({'error': str(e)}, 400)
     except Exception as e:
         return json_response({'error': str(e)}, 500)
 
 
+def _facet_value(facets, name, field):
+    rows = facets.get(name) or []
+    return rows[0].get(field, 0) if rows else 0
+
+
 @reports_bp.route('/dashboard-stats', methods=['GET'])
 @jwt_required()
+@cacheable
+@cached_report('transactions', 'invoices', 'payments', 'budgets', 'cost_centers')
+@coalesced
+@admit('report')
 def dashboard_stats():
     try:
         db = get_db()
-        total_budgets = db.budgets.count_documents({})
-        total_transactions = db.transactions.count_documents({})
-        total_invoices = db.invoices.count_documents({})
+        today = datetime.now().date()
+        txn_stats = next(db[ROLLUPS].aggregate([{'$facet': {
+            'total': [{'$group': {'_id': None, 'n': {'$sum': '$count'}}}],
+            'today': [
+                {'$match': {'day': today}},
+                {'$group': {
+                    '_id': None,
+                    'count': {'$sum': '$count'},
+                    'sales': {'$sum': {'$cond': [{'$eq': ['$type', 'sale']}, '$amount', 0]}}
+                }}
+            ]
+        }}]), {})
+        total_transactions = _facet_value(txn_stats, 'total', 'n')
+        today_transactions = _facet_value(txn_stats, 'today', 'count')
+        today_sales = _facet_value(txn_stats, 'today', 'sales')
+
+        inv_stats = next(db.invoices.aggregate([{'$facet': {
+            'total': [{'$count': 'n'}],
+            'recent_unpaid': [
+                {'$match': {'status': {'$in': ['unpaid', 'partial']}}},
+                {'$sort': {'due_date': 1}},
+                {'$limit': 5}
+            ]
+        }}]), {})
+        total_invoices = _facet_value(inv_stats, 'total', 'n')
+        recent_invoices = inv_stats.get('recent_unpaid', [])
         total_payments = db.payments.count_documents({})
+        recent_out = invoices_to_dicts(db, recent_invoices)
 
-        today = datetime.now().date()
-        today_transactions = db.transactions.count_documents({'transaction_date': today})
-        pipeline = [
-            {'$match': {'type': 'sale', 'transaction_date': today}},
-            {'$group': {'_id': None, 'total': {'$sum': '$amount'}}}
-        ]
-        agg = list(db.transactions.aggregate(pipeline))
-        today_sales = agg[0]['total'] if agg else 0
-
-        recent_invoices = list(db.invoices.find(
-            {'status': {'$in': ['unpaid', 'partial']}}
-        ).sort('due_date', 1).limit(5))
-        paid_map = {}
-        for inv in recent_invoices:
-            paid_map[inv['_id']] = sum(p['amount'] for p in db.payments.find({'invoice_id': inv['_id']}))
-        recent_out = []
-        for inv in recent_invoices:
-            cust = db.users.find_one({'_id': inv.get('customer_id')})
-            recent_out.append(invoice_to_dict(inv, customer_email=cust.get('email') if cust else None, paid_amount=paid_map.get(inv['_id'], 0)))
-
-        budgets = list(db.budgets.find({}))
-        alert_budgets = []
-        for budget in budgets:
-            cc_id = budget.get('cost_center_id')
-            ps = _doc_date(budget, 'period_start')
-            pe = _doc_date(budget, 'period_end')
-            txns = list(db.transactions.find({
-                'cost_center_id': cc_id,
-                'transaction_date': {'$gte': ps, '$lte': pe}
-            }))
-            actual_spent = sum(t.get('amount', 0) for t in txns)
-            amt = budget.get('amount', 0)
-            utilization = (actual_spent / amt * 100) if amt > 0 else 0
-            if utilization >= 90:
-                cc = db.cost_centers.find_one({'_id': cc_id})
-                alert_budgets.append({
-                    'budget_id': str(budget['_id']),
-                    'cost_center': cc.get('name') if cc else None,
-                    'budget_amount': amt,
-                    'actual_spent': actual_spent,
-                    'utilization': round(utilization, 2),
-                    'remaining': amt - actual_spent
-                })
+        budgets = list(db.budgets.find({}, {'cost_center_id': 1, 'amount': 1, 'period_start': 1, 'period_end': 1, 'actual_spent': 1}))
+        total_budgets = len(budgets)
+        alerts = [(b, u) for b, u in zip(budgets, calculate_budgets_utilization(db, budgets)) if u['utilization_percentage'] >= 90]
+        names = cost_center_names(db, [b.get('cost_center_id') for b, _ in alerts])
+        alert_budgets = [{
+            'budget_id': str(b['_id']),
+            'cost_center': names.get(b.get('cost_center_id')),
+            'budget_amount': u['budget_amount'],
+            'actual_spent': u['actual_spent'],
+            'utilization': u['utilization_percentage'],
+            'remaining': u['remaining_balance']
+        } for b, u in alerts]
 
-        return json_response({
+        return _report_response({
             'summary': {
                 'total_budgets': total_budgets,
                 'total_transactions': total_transactions,
@@ -275,8 +428,69 @@ def dashboard_stats():
                 'today_sales': today_sales
             },
             'alerts': {'budget_alerts': alert_budgets, 'alert_count': len(alert_budgets)},
-            'recent_unpaid_invoices': recent_out,
-            'timestamp': datetime.utcnow().isoformat()
+            'recent_unpaid_invoices': recent_out
+        })
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+
+@reports_bp.route('/runtime-stats', methods=['GET'])
+@jwt_required()
+def runtime_stats():
+    """Report cache, single-flight, admission and slow-query log counters for this worker."""
+    try:
+        current_user = get_jwt_identity()
+        if current_user['role'] != 'admin':
+            return json_response({'error': 'Admin access required'}, 403)
+        ext = current_app.extensions
+        return json_response({
+            name: ext[name].stats() if ext.get(name) else None
+            for name in ('report_cache', 'singleflight', 'admission', 'slow_queries')
         }, 200)
     except Exception as e:
         return json_response({'error': str(e)}, 500)
+
+
+@reports_bp.route('/slow-queries', methods=['GET'])
+@jwt_required()
+def slow_queries():
+    """Recent slow find/aggregate commands and a per-shape summary (admin only).
+
+    Query params: limit (default 50, max 500), collection.
+    """
+    try:
+        current_user = get_jwt_identity()
+        if current_user['role'] != 'admin':
+            return json_response({'error': 'Admin access required'}, 403)
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        except ValueError:
+            return json_response({'error': 'limit must be an integer'}, 400)
+        query = {}
+        if request.args.get('collection'):
+            query['collection'] = request.args['collection']
+        log = get_db()[PERF_SLOW_QUERIES]
+        recent = list(log.find(query, {'_id': 0}).sort('$natural', -1).limit(limit))
+        by_shape = list(log.aggregate([
+            {'$match': query},
+            {'$sort': {'at': 1}},
+            {'$group': {
+                '_id': '$shape_key',
+                'collection': {'$last': '$collection'},
+                'command': {'$last': '$command'},
+                'shape': {'$last': '$shape'},
+                'count': {'$sum': 1},
+                'avg_ms': {'$avg': '$duration_ms'},
+                'max_ms': {'$max': '$duration_ms'},
+                'last_at': {'$last': '$at'},
+                'plan': {'$last': '$plan'}
+            }},
+            {'$sort': {'count': -1, 'max_ms': -1}},
+            {'$limit': limit}
+        ]))
+        for row in by_shape:
+            row['shape_key'] = row.pop('_id')
+            row['avg_ms'] = round(row['avg_ms'], 2)
+        return json_response({'recent': recent, 'by_shape': by_shape}, 200)
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
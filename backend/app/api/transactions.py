@@ -3,21 +3,35 @@ from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
 from app.database.connection import get_db
 from app.database.models import transaction_to_dict, cost_center_to_dict, product_to_dict, oid
+from app.database.rollups import record_transaction_change, new_deltas, add_delta, apply_deltas
+from app.database.budget_spend import record_spend_change, record_spend_inserts
+from app.database.reference_cache import reference_cache
+from app.services.report_cache import bump_versions
 from app.utils.json_response import json_response
+from app.utils.pagination import paginate, cursor_headers, field_projection, PaginationError
+from app.utils.streaming import export_format, stream_rows, ExportFormatError, EXPORT_BATCH_SIZE
+from app.utils.dates import DateArgError, date_arg
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
 from datetime import datetime
+import csv
+import json
+import math
 
 transactions_bp = Blueprint('transactions', __name__)
 
+LIST_FIELDS = ('type', 'amount', 'quantity', 'description', 'transaction_date', 'status',
+               'cost_center_id', 'product_id', 'created_at', 'updated_at')
 
-def _doc_date(doc, key):
-    v = doc.get(key)
-    if v is None:
-        return None
-    if hasattr(v, 'date'):
-        return v
-    if isinstance(v, str):
-        return datetime.strptime(v[:10], '%Y-%m-%d').date()
-    return v
+IMPORT_CHUNK = 1000
+IMPORT_MAX_ERRORS = 1000
+
+
+def _record_change(db, old=None, new=None):
+    """Keep transaction_rollups and budget actual_spent counters in step with a write."""
+    record_transaction_change(db, old=old, new=new)
+    record_spend_change(db, old=old, new=new)
+    bump_versions('transactions')
 
 
 @transactions_bp.route('/', methods=['GET'])
@@ -30,18 +44,29 @@ def get_transactions():
             q['type'] = request.args.get('type')
         if request.args.get('cost_center_id'):
             q['cost_center_id'] = oid(request.args.get('cost_center_id'))
-        if request.args.get('start_date'):
-            q.setdefault('transaction_date', {})['$gte'] = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date()
-        if request.args.get('end_date'):
-            q.setdefault('transaction_date', {})['$lte'] = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date()
-
-        cursor = db.transactions.find(q).sort('transaction_date', -1)
-        out = []
-        for t in cursor:
-            cc = db.cost_centers.find_one({'_id': t.get('cost_center_id')})
-            pr = db.products.find_one({'_id': t.get('product_id')}) if t.get('product_id') else None
-            out.append(transaction_to_dict(t, cost_center_name=cc.get('name') if cc else None, product_name=pr.get('name') if pr else None))
-        return json_response(out, 200)
+        start_date = date_arg(request.args, 'start_date')
+        end_date = date_arg(request.args, 'end_date')
+        if start_date:
+            q.setdefault('transaction_date', {})['$gte'] = start_date
+        if end_date:
+            q.setdefault('transaction_date', {})['$lte'] = end_date
+
+        fmt = export_format(request.args)
+        if fmt:
+            # streamed export of the whole filtered result (?format=csv|ndjson), not one page
+            projection = field_projection(request.args, LIST_FIELDS)
+            cursor = db.transactions.find(q, projection).sort([('transaction_date', -1), ('_id', -1)]).batch_size(EXPORT_BATCH_SIZE)
+            refs = reference_cache.names(db)
+            fields = [f for f in LIST_FIELDS if projection is None or f in projection]
+            columns = ['id'] + fields + ['cost_center_name', 'product_name']
+            return stream_rows((transaction_to_dict(t, refs=refs) for t in cursor), fmt, columns, 'transactions')
+
+        docs, next_cursor = paginate(db.transactions, q, 'transaction_date', request.args, allowed_fields=LIST_FIELDS)
+        refs = reference_cache.names(db)
+        out = [transaction_to_dict(t, refs=refs) for t in docs]
+        return json_response(out, 200, headers=cursor_headers(next_cursor))
+    except (PaginationError, ExportFormatError, DateArgError) as e:
+        return json_response({'error': str(e)}, 400)
     except Exception as e:
         return json_response({'error': str(e)}, 500)
 
@@ -54,9 +79,7 @@ def get_transaction(id):
         t = db.transactions.find_one({'_id': oid(id)})
         if not t:
             return json_response({'error': 'Transaction not found'}, 404)
-        cc = db.cost_centers.find_one({'_id': t.get('cost_center_id')})
-        pr = db.products.find_one({'_id': t.get('product_id')}) if t.get('product_id') else None
-        return json_response(transaction_to_dict(t, cost_center_name=cc.get('name') if cc else None, product_name=pr.get('name') if pr else None), 200)
+        return json_response(transaction_to_dict(t, refs=reference_cache.names(db)), 200)
     except Exception as e:
         return json_response({'error': str(e)}, 500)
 
@@ -75,10 +98,10 @@ def create_transaction():
 
         db = get_db()
         cc_id = oid(data['cost_center_id'])
-        if not db.cost_centers.find_one({'_id': cc_id}):
+        if not reference_cache.contains(db, 'cost_centers', cc_id):
             return json_response({'error': 'Cost center not found'}, 404)
         product_id = oid(data.get('product_id')) if data.get('product_id') else None
-        if product_id and not db.products.find_one({'_id': product_id}):
+        if product_id and not reference_cache.contains(db, 'products', product_id):
             return json_response({'error': 'Product not found'}, 404)
 
         txn_date = datetime.strptime(data['transaction_date'], '%Y-%m-%d').date()
@@ -99,17 +122,197 @@ def create_transaction():
         }
         r = db.transactions.insert_one(doc)
         doc['_id'] = r.inserted_id
-        cc = db.cost_centers.find_one({'_id': cc_id})
-        pr = db.products.find_one({'_id': product_id}) if product_id else None
+        _record_change(db, new=doc)
         payload = {
             'message': 'Transaction created successfully',
-            'transaction': transaction_to_dict(doc, cost_center_name=cc.get('name') if cc else None, product_name=pr.get('name') if pr else None)
+            'transaction': transaction_to_dict(doc, refs=reference_cache.names(db))
         }
         return json_response(payload, 201)
     except Exception as e:
         return json_response({'error': str(e)}, 500)
 
 
+def _text_lines(stream):
+    first = True
+    for raw in stream:
+        yield raw.decode('utf-8-sig' if first else 'utf-8')
+        first = False
+
+
+def _import_rows(fmt, stream):
+    """Yield (line number, row) from a CSV or NDJSON body without buffering it; row is None if unparseable."""
+    lines = _text_lines(stream)
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for n, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield n, row
+
+
+def _import_quantity(value):
+    """Whole-number quantity from a CSV string or NDJSON number; missing means 1."""
+    if value is None or value == '':
+        return 1
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError('quantity must be a whole number')
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    raise ValueError('quantity must be a whole number')
+
+
+class _ImportRowParser:
+    """Row -> transaction document, checking references against the in-memory reference cache."""
+
+    def __init__(self, db):
+        self.db = db
+        self.refs = reference_cache.names(db)
+        self._refreshed = set()
+        self._dates = {}
+        self._ids = {}
+
+    def _oid(self, value, field):
+        # NDJSON can carry objects/lists here; they are not ids (and not hashable memo keys)
+        if not isinstance(value, str):
+            raise ValueError(f'{field} must be a string id')
+        if value not in self._ids:
+            self._ids[value] = oid(str(value))
+        return self._ids[value]
+
+    def _date(self, value):
+        if not isinstance(value, str):
+            return None
+        if value not in self._dates:
+            try:
+                self._dates[value] = datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+            except ValueError:
+                self._dates[value] = None
+        return self._dates[value]
+
+    def _known(self, name, _id):
+        if _id is not None and self.refs.contains(name, _id):
+            return True
+        if _id is None or name in self._refreshed:
+            return False
+        # first miss per collection: reload it once in case it was written since the last sync
+        self._refreshed.add(name)
+        found = reference_cache.contains(self.db, name, _id)
+        self.refs = reference_cache.names(self.db)
+        return found
+
+    def parse(self, row, now):
+        if not isinstance(row, dict):
+            raise ValueError('row is not a valid record')
+        for f in ('type', 'amount', 'cost_center_id', 'transaction_date'):
+            if row.get(f) in (None, ''):
+                raise ValueError(f'{f} is required')
+        if row['type'] not in ('purchase', 'sale'):
+            raise ValueError("type must be 'purchase' or 'sale'")
+        if isinstance(row['amount'], bool):
+            raise ValueError('amount must be a number')
+        try:
+            amount = float(row['amount'])
+        except (TypeError, ValueError):
+            raise ValueError('amount must be a number')
+        if not math.isfinite(amount):
+            raise ValueError('amount must be a finite number')
+        cc_id = self._oid(row['cost_center_id'], 'cost_center_id')
+        if not self._known('cost_centers', cc_id):
+            raise ValueError('Cost center not found')
+        product_id = self._oid(row['product_id'], 'product_id') if row.get('product_id') else None
+        if row.get('product_id') and not self._known('products', product_id):
+            raise ValueError('Product not found')
+        txn_date = self._date(row['transaction_date'])
+        if txn_date is None:
+            raise ValueError('transaction_date must be YYYY-MM-DD')
+        status = row.get('status') or 'paid'
+        if status not in ('paid', 'not_paid', 'partially_paid'):
+            status = 'paid'
+        quantity = _import_quantity(row.get('quantity'))
+        return {
+            'type': row['type'],
+            'amount': amount,
+            'status': status,
+            'cost_center_id': cc_id,
+            'product_id': product_id,
+            'quantity': quantity,
+            'description': row.get('description') or '',
+            'transaction_date': txn_date,
+            'created_at': now
+        }
+
+
+def _insert_chunk(db, docs, lines, errors):
+    """Unordered insert of one chunk; rollups and budget counters are updated for the rows that landed."""
+    failed = set()
+    try:
+        db.transactions.insert_many(docs, ordered=False)
+    except BulkWriteError as bwe:
+        for err in bwe.details.get('writeErrors', []):
+            failed.add(err['index'])
+            if len(errors) <= IMPORT_MAX_ERRORS:
+                errors.append({'row': lines[err['index']], 'error': err.get('errmsg', 'write failed')})
+    inserted = [d for i, d in enumerate(docs) if i not in failed]
+    deltas = new_deltas()
+    for d in inserted:
+        add_delta(deltas, d)
+    apply_deltas(db, deltas)
+    record_spend_inserts(db, inserted)
+    bump_versions('transactions')
+    return len(inserted)
+
+
+@transactions_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_transactions():
+    """Bulk-load transactions from a streamed CSV (header row) or NDJSON body; ?format=csv|ndjson."""
+    try:
+        fmt = request.args.get('format') or ('csv' if 'csv' in (request.content_type or '') else 'ndjson')
+        if fmt not in ('csv', 'ndjson'):
+            return json_response({'error': "format must be 'csv' or 'ndjson'"}, 400)
+        db = get_db()
+        parser = _ImportRowParser(db)
+        now = datetime.utcnow()
+        inserted = 0
+        rows = 0
+        errors = []
+        docs, lines = [], []
+        for line, row in _import_rows(fmt, request.stream):
+            rows += 1
+            try:
+                docs.append(parser.parse(row, now))
+                lines.append(line)
+            except ValueError as e:
+                if len(errors) <= IMPORT_MAX_ERRORS:
+                    errors.append({'row': line, 'error': str(e)})
+            if len(docs) >= IMPORT_CHUNK:
+                inserted += _insert_chunk(db, docs, lines, errors)
+                docs, lines = [], []
+        if docs:
+            inserted += _insert_chunk(db, docs, lines, errors)
+        return json_response({
+            'rows': rows,
+            'inserted': inserted,
+            'failed': rows - inserted,
+            'errors': errors[:IMPORT_MAX_ERRORS],
+            'errors_truncated': len(errors) > IMPORT_MAX_ERRORS
+        }, 200)
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+
 @transactions_bp.route('/<id>', methods=['PUT'])
 @jwt_required()
 def update_transaction(id):
@@ -129,12 +332,12 @@ def update_transaction(id):
             updates['amount'] = data['amount']
         if 'cost_center_id' in data:
             cc_id = oid(data['cost_center_id'])
-            if not db.cost_centers.find_one({'_id': cc_id}):
+            if not reference_cache.contains(db, 'cost_centers', cc_id):
                 return json_response({'error': 'Cost center not found'}, 404)
             updates['cost_center_id'] = cc_id
         if 'product_id' in data:
             pid = oid(data['product_id']) if data['product_id'] else None
-            if pid and not db.products.find_one({'_id': pid}):
+            if pid and not reference_cache.contains(db, 'products', pid):
                 return json_response({'error': 'Product not found'}, 404)
             updates['product_id'] = pid
         if 'quantity' in data:
@@ -146,13 +349,13 @@ def update_transaction(id):
         if 'status' in data and data['status'] in ('paid', 'not_paid', 'partially_paid'):
             updates['status'] = data['status']
         if updates:
-            db.transactions.update_one({'_id': oid(id)}, {'$set': updates})
-        t = db.transactions.find_one({'_id': oid(id)})
-        cc = db.cost_centers.find_one({'_id': t.get('cost_center_id')})
-        pr = db.products.find_one({'_id': t.get('product_id')}) if t.get('product_id') else None
+            old = db.transactions.find_one_and_update({'_id': oid(id)}, {'$set': updates}, return_document=ReturnDocument.BEFORE)
+            if old:
+                t = dict(old, **updates)
+                _record_change(db, old=old, new=t)
         payload = {
             'message': 'Transaction updated successfully',
-            'transaction': transaction_to_dict(t, cost_center_name=cc.get('name') if cc else None, product_name=pr.get('name') if pr else None)
+            'transaction': transaction_to_dict(t, refs=reference_cache.names(db))
         }
         return json_response(payload, 200)
     except Exception as e:
@@ -164,9 +367,10 @@ def update_transaction(id):
 def delete_transaction(id):
     try:
         db = get_db()
-        r = db.transactions.delete_one({'_id': oid(id)})
-        if r.deleted_count == 0:
+        old = db.transactions.find_one_and_delete({'_id': oid(id)})
+        if not old:
             return json_response({'error': 'Transaction not found'}, 404)
+        _record_change(db, old=old)
         return json_response({'message': 'Transaction deleted successfully'}, 200)
     except Exception as e:
         return json_response({'error': str(e)}, 500)
@@ -184,12 +388,9 @@ def get_transaction_summary():
         total_purchase = agg[0]['purchase'] if agg else 0
         total_sales = agg[0]['sale'] if agg else 0
         total_transactions = db.transactions.count_documents({})
-        recent = list(db.transactions.find({}).sort('transaction_date', -1).limit(10))
-        out = []
-        for t in recent:
-            cc = db.cost_centers.find_one({'_id': t.get('cost_center_id')})
-            pr = db.products.find_one({'_id': t.get('product_id')}) if t.get('product_id') else None
-            out.append(transaction_to_dict(t, cost_center_name=cc.get('name') if cc else None, product_name=pr.get('name') if pr else None))
+        recent = db.transactions.find({}).sort('transaction_date', -1).limit(10)
+        refs = reference_cache.names(db)
+        out = [transaction_to_dict(t, refs=refs) for t in recent]
         payload = {
             'total_transactions': total_transactions,
             'total_purchase': total_purchase,
@@ -0,0 +1,86 @@
+# backend/app/database/budget_index.py - in-process interval index over budget periods
+"""
+Answers "which budgets of cost center X cover day D" (and period overlap checks) from
+one interval tree per cost center instead of scanning budgets or transactions.
+
+The index is process-local. It is rebuilt in full when the 'budgets' version stamp
+moves because another worker wrote, and patched per cost center when this process
+writes a budget through budget_changed(). Writers that bypass the stamp (the Mongo
+shell, an import) are picked up by the max_age reload, as in ReferenceCache; scripts
+that insert budgets call bump_version(db, 'budgets') themselves. Spend counters do not
+rely on it: budget_spend queries budgets directly on every transaction write.
+"""
+import threading
+import time
+from collections import defaultdict
+from app.database.rollups import as_day
+from app.database.versions import bump_version, get_version
+from app.utils.interval_tree import IntervalTree
+
+_PROJECTION = {'cost_center_id': 1, 'period_start': 1, 'period_end': 1}
+
+
+def _tree(docs):
+    intervals = []
+    for b in docs:
+        ps = as_day(b.get('period_start'))
+        pe = as_day(b.get('period_end'))
+        if ps and pe:
+            intervals.append((ps, pe, b['_id']))
+    return IntervalTree(intervals)
+
+
+class BudgetIndex:
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._trees = {}
+        self._version = None
+        self._loaded_at = 0.0
+
+    def _reload(self, db, version):
+        by_cc = defaultdict(list)
+        for b in db.budgets.find({}, _PROJECTION):
+            by_cc[b.get('cost_center_id')].append(b)
+        self._trees = {cc_id: _tree(docs) for cc_id, docs in by_cc.items()}
+        self._version = version
+        self._loaded_at = time.monotonic()
+
+    def _stale(self, version):
+        return version != self._version or time.monotonic() - self._loaded_at >= self.max_age
+
+    def sync(self, db):
+        """Rebuild if any worker has written budgets since the last load (one indexed read) or after max_age seconds."""
+        version = get_version(db, 'budgets')
+        if self._stale(version):
+            with self._lock:
+                if self._stale(version):
+                    self._reload(db, version)
+        return self
+
+    def budget_changed(self, db, cost_center_id):
+        """Call after creating, updating or deleting a budget; bumps the version and patches one cost center."""
+        version = bump_version(db, 'budgets')
+        with self._lock:
+            if self._version == version - 1:
+                docs = list(db.budgets.find({'cost_center_id': cost_center_id}, _PROJECTION))
+                self._trees[cost_center_id] = _tree(docs)
+                self._version = version
+            else:
+                self._reload(db, version)
+
+    def budgets_for(self, db, cost_center_id, day):
+        """_ids of budgets of cost_center_id whose period contains day."""
+        day = as_day(day)
+        tree = self.sync(db)._trees.get(cost_center_id)
+        return tree.stab(day) if tree and day else []
+
+    def overlapping(self, db, cost_center_id, period_start, period_end, exclude=None):
+        """_ids of budgets of cost_center_id whose period overlaps [period_start, period_end]."""
+        tree = self.sync(db)._trees.get(cost_center_id)
+        if not tree:
+            return []
+        return [bid for bid in tree.overlap(as_day(period_start), as_day(period_end)) if bid != exclude]
+
+
+budget_index = BudgetIndex()
@@ -0,0 +1,176 @@
+# backend/app/database/budget_spend.py - denormalized actual_spent counters on budgets
+"""
+Each budget document carries actual_spent: the summed amount of transactions in its
+cost center with transaction_date inside [period_start, period_end]. Transaction
+writes adjust it with $inc; budgets created or re-periodised are recounted from
+transaction_rollups, and reconcile_budget_spend detects (and optionally fixes) drift.
+
+The budgets a write touches are found by a range match on the (cost_center_id,
+period_start, period_end) index, not the process-local budget_index, so a budget
+created on another worker is counted from its first transaction. Every $inc also
+bumps spend_seq; a recount only $sets actual_spent if spend_seq is unchanged since
+it started and retries otherwise, so it cannot overwrite a concurrent increment.
+A transaction whose rollup lands before a recount reads the rollups but whose $inc
+lands after the recount finishes is counted twice; reconcile repairs that.
+"""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from pymongo import UpdateOne
+from app.database.rollups import ROLLUPS, as_day, as_amount
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _window(budget_doc):
+    cc_id = budget_doc.get('cost_center_id')
+    ps = as_day(budget_doc.get('period_start'))
+    pe = as_day(budget_doc.get('period_end'))
+    return (cc_id, ps, pe) if cc_id and ps and pe else None
+
+
+def compute_budgets_spent(db, budget_docs):
+    """Spend for many budgets from one grouped rollups aggregation; returns a list aligned with budget_docs.
+
+    Rollups are summed per (cost_center_id, day) on the server, then each budget
+    takes the prefix-sum difference over its period, so overlapping budgets are fine.
+    """
+    windows = [_window(b) for b in budget_docs]
+    active = [w for w in windows if w]
+    daily = defaultdict(list)
+    if active:
+        pipeline = [
+            {'$match': {
+                'cost_center_id': {'$in': list({w[0] for w in active})},
+                'day': {'$gte': min(w[1] for w in active), '$lte': max(w[2] for w in active)}
+            }},
+            {'$group': {'_id': {'cc': '$cost_center_id', 'day': '$day'}, 'total': {'$sum': '$amount'}}}
+        ]
+        for row in db[ROLLUPS].aggregate(pipeline):
+            day = as_day(row['_id'].get('day'))
+            if day is not None:
+                daily[row['_id'].get('cc')].append((day, row['total']))
+    prefix = {}
+    for cc_id, rows in daily.items():
+        rows.sort(key=lambda r: r[0])
+        sums = [0]
+        for _, total in rows:
+            sums.append(sums[-1] + total)
+        prefix[cc_id] = ([r[0] for r in rows], sums)
+    out = []
+    for w in windows:
+        spent = 0
+        if w and w[0] in prefix:
+            days, sums = prefix[w[0]]
+            spent = sums[bisect_right(days, w[2])] - sums[bisect_left(days, w[1])]
+        out.append(spent)
+    return out
+
+
+def _seqs(db, ids):
+    return {b['_id']: b.get('spend_seq') for b in db.budgets.find({'_id': {'$in': ids}}, {'spend_seq': 1})}
+
+
+def recount_budgets(db, budget_docs, attempts=3):
+    """Recompute and $set actual_spent for the given budgets; returns the new values.
+
+    A budget incremented while it was being recounted is recounted again (up to attempts times).
+    """
+    pending = {b['_id']: b for b in budget_docs if b.get('_id')}
+    spent_by_id = {}
+    for _ in range(attempts):
+        if not pending:
+            break
+        ids = list(pending)
+        seqs = _seqs(db, ids)
+        spent = compute_budgets_spent(db, [pending[i] for i in ids])
+        db.budgets.bulk_write(
+            [UpdateOne({'_id': i, 'spend_seq': seqs.get(i)}, {'$set': {'actual_spent': s}}) for i, s in zip(ids, spent)],
+            ordered=False
+        )
+        spent_by_id.update(zip(ids, spent))
+        moved = {i for i, seq in _seqs(db, ids).items() if seq != seqs.get(i)}
+        pending = {i: pending[i] for i in ids if i in moved}
+    if pending:
+        logger.warning("actual_spent recount kept racing writes on %d budgets; run budgets reconcile", len(pending))
+    out = []
+    for b in budget_docs:
+        s = spent_by_id.get(b.get('_id'))
+        if s is None:
+            s = compute_budgets_spent(db, [b])[0]
+        b['actual_spent'] = s
+        out.append(s)
+    return out
+
+
+def _covering(cc_id, first_day, last_day):
+    """Budgets of cc_id whose period overlaps [first_day, last_day] and already carry a counter."""
+    return {'cost_center_id': cc_id, 'period_start': {'$lte': last_day}, 'period_end': {'$gte': first_day},
+            'actual_spent': {'$ne': None}}
+
+
+def _inc_spend(db, cc_id, day, amount):
+    if not cc_id or day is None or not amount:
+        return
+    db.budgets.update_many(_covering(cc_id, day, day), {'$inc': {'actual_spent': amount, 'spend_seq': 1}})
+
+
+def record_spend_change(db, old=None, new=None):
+    """Adjust actual_spent on every budget covering a created (new), deleted (old) or moved/edited transaction."""
+    deltas = defaultdict(float)
+    if old:
+        deltas[(old.get('cost_center_id'), as_day(old.get('transaction_date')))] -= as_amount(old)
+    if new:
+        deltas[(new.get('cost_center_id'), as_day(new.get('transaction_date')))] += as_amount(new)
+    for (cc_id, day), amount in deltas.items():
+        _inc_spend(db, cc_id, day, amount)
+
+
+def record_spend_inserts(db, docs):
+    """record_spend_change for many newly inserted transactions: one budgets query and one bulk write."""
+    by_key = defaultdict(float)
+    for d in docs:
+        by_key[(d.get('cost_center_id'), as_day(d.get('transaction_date')))] += as_amount(d)
+    days_by_cc = defaultdict(list)
+    for (cc_id, day), amount in by_key.items():
+        if cc_id and day is not None and amount:
+            days_by_cc[cc_id].append(day)
+    if not days_by_cc:
+        return
+    query = {'$or': [_covering(cc_id, min(days), max(days)) for cc_id, days in days_by_cc.items()]}
+    ops = []
+    for b in db.budgets.find(query, {'cost_center_id': 1, 'period_start': 1, 'period_end': 1}):
+        ps, pe = as_day(b.get('period_start')), as_day(b.get('period_end'))
+        amount = sum(by_key[(b['cost_center_id'], day)] for day in days_by_cc[b['cost_center_id']] if ps <= day <= pe)
+        if amount:
+            # only if the period is still the one matched; a re-periodised budget is recounted instead
+            ops.append(UpdateOne(
+                {'_id': b['_id'], 'period_start': b['period_start'], 'period_end': b['period_end']},
+                {'$inc': {'actual_spent': amount, 'spend_seq': 1}}
+            ))
+    if ops:
+        db.budgets.bulk_write(ops, ordered=False)
+
+
+def reconcile_budget_spend(db, fix=False, tolerance=0.005):
+    """Compare every budget's actual_spent with a recount from rollups; returns drifted budgets."""
+    budgets = list(db.budgets.find({}, {'cost_center_id': 1, 'period_start': 1, 'period_end': 1, 'actual_spent': 1}))
+    drift = []
+    for b, expected in zip(budgets, compute_budgets_spent(db, budgets)):
+        stored = b.get('actual_spent')
+        if stored is None or abs(stored - expected) > tolerance:
+            drift.append({'budget_id': b['_id'], 'stored': stored, 'expected': expected})
+    if fix and drift:
+        db.budgets.bulk_write(
+            [UpdateOne({'_id': d['budget_id']}, {'$set': {'actual_spent': d['expected']}}) for d in drift],
+            ordered=False
+        )
+        logger.info("Reconciled actual_spent on %d budgets", len(drift))
+    return drift
+
+
+def ensure_budget_spend(db):
+    """Backfill actual_spent on budgets written before the counter existed."""
+    missing = list(db.budgets.find({'actual_spent': {'$exists': False}}, {'cost_center_id': 1, 'period_start': 1, 'period_end': 1}))
+    if missing:
+        recount_budgets(db, missing)
@@ -1,7 +1,17 @@
 # backend/app/database/connection.py - MongoDB (online) for Flask app
+from datetime import date, datetime
+from bson.codec_options import TypeEncoder, TypeRegistry
 from flask import current_app
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+from app.database.rollups import create_rollup_indexes, ensure_rollups
+from app.database.budget_spend import ensure_budget_spend
+from app.database.invoice_payments import ensure_invoice_paid
+from app.database.webhook_events import create_webhook_indexes
+from app.database.reference_cache import reference_cache
+from app.utils.request_stats import query_counter
+from app.utils.metrics import pool_metrics, command_metrics
+from app.database.slow_queries import slow_queries
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,18 +33,36 @@ def _mask_uri(uri):
         return uri
 
 
+class _DateEncoder(TypeEncoder):
+    """Store datetime.date values (transaction_date, period_start, ...) as BSON dates at midnight."""
+    python_type = date
+
+    def transform_python(self, value):
+        return datetime(value.year, value.month, value.day)
+
+
 def init_mongodb(app):
     """Initialize MongoDB connection using MONGO_URI and MONGO_DB_NAME from config."""
     uri = app.config.get('MONGO_URI', 'mongodb://localhost:27017/')
     db_name = app.config.get('MONGO_DB_NAME', 'shiv_furniture_db')
     try:
-        client = MongoClient(uri, serverSelectionTimeoutMS=5000, maxPoolSize=50)
+        client = MongoClient(
+            uri,
+            serverSelectionTimeoutMS=5000,
+            maxPoolSize=50,
+            type_registry=TypeRegistry([_DateEncoder()]),
+            event_listeners=[query_counter, command_metrics, pool_metrics, slow_queries]
+        )
         client.admin.command('ping')
         db = client[db_name]
         app.config['MONGO_CLIENT'] = client
         app.config['MONGO_DB'] = db
         logger.info(f"Connected to MongoDB: {db_name}")
         create_indexes(db)
+        ensure_rollups(db)
+        ensure_budget_spend(db)
+        ensure_invoice_paid(db)
+        reference_cache.warm(db)
         return db
     except (ConnectionFailure, ServerSelectionTimeoutError) as e:
         logger.error(f"Failed to connect to MongoDB: {e}")
@@ -70,4 +98,15 @@ def create_indexes(db):
     db.invoices.create_index('due_date')
     db.payments.create_index('invoice_id')
     db.payments.create_index('payment_date')
+    # (sort key, _id) indexes backing keyset pagination on the list endpoints
+    db.transactions.create_index([('transaction_date', -1), ('_id', -1)])
+    db.transactions.create_index([('cost_center_id', 1), ('transaction_date', -1), ('_id', -1)])
+    db.invoices.create_index([('created_at', -1), ('_id', -1)])
+    db.invoices.create_index([('customer_id', 1), ('created_at', -1), ('_id', -1)])
+    db.payments.create_index([('payment_date', -1), ('_id', -1)])
+    db.budgets.create_index([('period_start', -1), ('_id', -1)])
+    db.cost_centers.create_index([('name', 1), ('_id', 1)])
+    db.products.create_index([('name', 1), ('_id', 1)])
+    create_rollup_indexes(db.transaction_rollups)
+    create_webhook_indexes(db)
     logger.info("MongoDB indexes created successfully")
@@ -0,0 +1,86 @@
+# backend/app/database/invoice_payments.py - denormalized paid_amount counters on invoices
+"""
+Each invoice carries paid_amount: the summed amount of its payments. A payment adds to
+it and re-derives status in a single find_one_and_update, so concurrent payments on the
+same invoice cannot lose an increment or leave a stale status. Invoices written before
+the counter existed are recounted from payments, and reconcile_invoice_paid detects (and
+optionally fixes) drift.
+"""
+from pymongo import ReturnDocument, UpdateOne
+import logging
+
+logger = logging.getLogger(__name__)
+
+_STATUS = {'$switch': {
+    'branches': [
+        {'case': {'$gte': ['$paid_amount', {'$ifNull': ['$amount', 0]}]}, 'then': 'paid'},
+        {'case': {'$gt': ['$paid_amount', 0]}, 'then': 'partial'}
+    ],
+    'default': 'unpaid'
+}}
+
+
+def compute_invoices_paid(db, invoice_ids):
+    """Payment totals for many invoices from one grouped query; {invoice_id: total}."""
+    if not invoice_ids:
+        return {}
+    pipeline = [
+        {'$match': {'invoice_id': {'$in': list(invoice_ids)}}},
+        {'$group': {'_id': '$invoice_id', 'total': {'$sum': '$amount'}}}
+    ]
+    return {r['_id']: r['total'] for r in db.payments.aggregate(pipeline)}
+
+
+def recount_invoices_paid(db, invoice_docs):
+    """Recompute and $set paid_amount for the given invoices (status is left alone)."""
+    paid = compute_invoices_paid(db, [inv['_id'] for inv in invoice_docs])
+    ops = [UpdateOne({'_id': inv['_id']}, {'$set': {'paid_amount': paid.get(inv['_id'], 0)}}) for inv in invoice_docs]
+    if ops:
+        db.invoices.bulk_write(ops, ordered=False)
+    for inv in invoice_docs:
+        inv['paid_amount'] = paid.get(inv['_id'], 0)
+
+
+def apply_payment(db, invoice_id, amount):
+    """Add amount to paid_amount and derive status in one atomic update; returns the updated invoice or None.
+
+    Call after inserting the payment. An invoice without a counter yet is recounted
+    from payments, which already include the new one.
+    """
+    inv = db.invoices.find_one_and_update(
+        {'_id': invoice_id, 'paid_amount': {'$exists': True}},
+        [{'$set': {'paid_amount': {'$add': ['$paid_amount', amount]}}}, {'$set': {'status': _STATUS}}],
+        return_document=ReturnDocument.AFTER
+    )
+    if inv is None and db.invoices.count_documents({'_id': invoice_id}, limit=1):
+        recount_invoices_paid(db, [{'_id': invoice_id}])
+        inv = db.invoices.find_one_and_update(
+            {'_id': invoice_id}, [{'$set': {'status': _STATUS}}], return_document=ReturnDocument.AFTER
+        )
+    return inv
+
+
+def reconcile_invoice_paid(db, fix=False, tolerance=0.005):
+    """Compare every invoice's paid_amount with a recount from payments; returns drifted invoices."""
+    invoices = list(db.invoices.find({}, {'paid_amount': 1}))
+    paid = compute_invoices_paid(db, [inv['_id'] for inv in invoices])
+    drift = []
+    for inv in invoices:
+        stored = inv.get('paid_amount')
+        expected = paid.get(inv['_id'], 0)
+        if stored is None or abs(stored - expected) > tolerance:
+            drift.append({'invoice_id': inv['_id'], 'stored': stored, 'expected': expected})
+    if fix and drift:
+        db.invoices.bulk_write(
+            [UpdateOne({'_id': d['invoice_id']}, {'$set': {'paid_amount': d['expected']}}) for d in drift],
+            ordered=False
+        )
+        logger.info("Reconciled paid_amount on %d invoices", len(drift))
+    return drift
+
+
+def ensure_invoice_paid(db):
+    """Backfill paid_amount on invoices written before the counter existed."""
+    missing = list(db.invoices.find({'paid_amount': {'$exists': False}}, {'_id': 1}))
+    if missing:
+        recount_invoices_paid(db, missing)
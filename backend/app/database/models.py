@@ -1,5 +1,4 @@
 # backend/app/database/models.py - MongoDB document helpers (no SQLAlchemy)
-from datetime import datetime, date
 from werkzeug.security import generate_password_hash, check_password_hash
 from bson import ObjectId
 
@@ -15,32 +14,11 @@ def _id_str(doc):
     return d
 
 
-def _serialize_dates(d):
-    """Convert datetime/date to ISO string for JSON (handles nested dicts/lists)."""
-    if d is None:
-        return d
-    for k, v in list(d.items()):
-        if isinstance(v, datetime):
-            d[k] = v.isoformat()
-        elif isinstance(v, date) and not isinstance(v, datetime):
-            d[k] = v.isoformat()
-        elif isinstance(v, dict):
-            _serialize_dates(v)
-        elif isinstance(v, list):
-            for i, item in enumerate(v):
-                if isinstance(item, (datetime, date)):
-                    v[i] = item.isoformat()
-                elif isinstance(item, dict):
-                    _serialize_dates(item)
-    return d
-
-
 # ---------- User ----------
 def user_to_dict(doc):
     if not doc:
         return None
     d = _id_str(doc)
-    _serialize_dates(d)
     d.pop('password_hash', None)
     return d
 
@@ -58,7 +36,6 @@ def cost_center_to_dict(doc):
     if not doc:
         return None
     d = _id_str(doc)
-    _serialize_dates(d)
     return d
 
 
@@ -67,7 +44,6 @@ def product_to_dict(doc):
     if not doc:
         return None
     d = _id_str(doc)
-    _serialize_dates(d)
     return d
 
 
@@ -76,7 +52,6 @@ def budget_to_dict(doc, cost_center_name=None):
     if not doc:
         return None
     d = _id_str(doc)
-    _serialize_dates(d)
     if cost_center_name is not None:
         d['cost_center_name'] = cost_center_name
     return d
@@ -87,16 +62,20 @@ def master_budget_to_dict(doc):
     if not doc:
         return None
     d = _id_str(doc)
-    _serialize_dates(d)
     return d
 
 
 # ---------- Transaction ----------
-def transaction_to_dict(doc, cost_center_name=None, product_name=None):
+def transaction_to_dict(doc, cost_center_name=None, product_name=None, refs=None):
+    """refs: optional ReferenceNames snapshot used to fill in names not passed explicitly."""
     if not doc:
         return None
+    if refs is not None:
+        if cost_center_name is None:
+            cost_center_name = refs.cost_center_name(doc.get('cost_center_id'))
+        if product_name is None:
+            product_name = refs.product_name(doc.get('product_id'))
     d = _id_str(doc)
-    _serialize_dates(d)
     if cost_center_name is not None:
         d['cost_center_name'] = cost_center_name
     if product_name is not None:
@@ -105,13 +84,15 @@ def transaction_to_dict(doc, cost_center_name=None, product_name=None):
 
 
 # ---------- Invoice ----------
-def invoice_to_dict(doc, customer_email=None, paid_amount=0):
+def invoice_to_dict(doc, customer_email=None, paid_amount=None):
+    """paid_amount defaults to the counter stored on the invoice."""
     if not doc:
         return None
     d = _id_str(doc)
-    _serialize_dates(d)
     if customer_email is not None:
         d['customer_email'] = customer_email
+    if paid_amount is None:
+        paid_amount = d.get('paid_amount') or 0
     d['paid_amount'] = paid_amount
     d['balance'] = d.get('amount', 0) - paid_amount
     return d
@@ -122,7 +103,6 @@ def payment_to_dict(doc, invoice_number=None):
     if not doc:
         return None
     d = _id_str(doc)
-    _serialize_dates(d)
     if invoice_number is not None:
         d['invoice_number'] = invoice_number
     return d
@@ -137,19 +117,3 @@ def oid(s):
     except Exception:
         return None
 
-
-def sanitize_for_json(obj):
-    """Return a JSON-serializable copy: date/datetime -> ISO string, ObjectId -> str. Use before jsonify."""
-    if obj is None:
-        return None
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    if isinstance(obj, date) and not isinstance(obj, datetime):
-        return obj.isoformat()
-    if isinstance(obj, dict):
-        return {k: sanitize_for_json(v) for k, v in obj.items()}
-    if isinstance(obj, (list, tuple)):
-        return [sanitize_for_json(v) for v in obj]
-    if isinstance(obj, ObjectId):
-        return str(obj)
-    return obj
@@ -0,0 +1,87 @@
+# backend/app/database/reference_cache.py - in-process id -> name maps for small reference collections
+"""
+cost_centers and products are small and rarely written, so each worker keeps their
+_id -> name maps in memory. The maps are stamped with the collection_versions of both
+collections: write handlers call invalidate(), and every other worker reloads on its
+next names() once it sees the stamp move. Writers that bypass the handlers are picked
+up by the max_age reload, and existence checks reload once on a miss.
+"""
+import threading
+import time
+from app.database.versions import bump_version, get_versions
+
+REFERENCE_COLLECTIONS = ('cost_centers', 'products')
+
+
+class ReferenceNames:
+    """Immutable snapshot of the reference maps handed to request code."""
+
+    def __init__(self, maps, version):
+        self._maps = maps
+        self.version = version
+
+    def cost_center_name(self, cc_id):
+        return self._maps['cost_centers'].get(cc_id)
+
+    def product_name(self, product_id):
+        return self._maps['products'].get(product_id) if product_id else None
+
+    def contains(self, name, _id):
+        return _id in self._maps[name]
+
+
+class ReferenceCache:
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._maps = {name: {} for name in REFERENCE_COLLECTIONS}
+        self._versions = {name: None for name in REFERENCE_COLLECTIONS}
+        self._snapshot = None
+
+    def _load(self, db, name, version):
+        self._maps[name] = {d['_id']: d.get('name') for d in db[name].find({}, {'name': 1})}
+        self._versions[name] = version
+
+    def warm(self, db):
+        """Bulk-load every reference collection (one find each)."""
+        versions = get_versions(db, REFERENCE_COLLECTIONS)
+        with self._lock:
+            for name in REFERENCE_COLLECTIONS:
+                self._load(db, name, versions[name])
+            self._loaded_at = time.monotonic()
+            self._snapshot = None
+
+    def names(self, db):
+        """Current snapshot, reloading only the collections whose version stamp moved."""
+        versions = get_versions(db, REFERENCE_COLLECTIONS)
+        snapshot = self._snapshot
+        if snapshot is not None and all(versions[n] == self._versions[n] for n in REFERENCE_COLLECTIONS):
+            if time.monotonic() - self._loaded_at < self.max_age:
+                return snapshot
+            self.warm(db)
+        with self._lock:
+            for name in REFERENCE_COLLECTIONS:
+                if versions[name] != self._versions[name]:
+                    self._load(db, name, versions[name])
+            self._snapshot = ReferenceNames(dict(self._maps), tuple(self._versions[n] for n in REFERENCE_COLLECTIONS))
+            return self._snapshot
+
+    def contains(self, db, name, _id):
+        """Existence check against the cache, reloading that collection once on a miss."""
+        if self.names(db).contains(name, _id):
+            return True
+        with self._lock:
+            self._versions[name] = None
+            self._snapshot = None
+        return self.names(db).contains(name, _id)
+
+    def invalidate(self, db, name):
+        """Call after a write to cost_centers or products."""
+        bump_version(db, name)
+        with self._lock:
+            self._versions[name] = None
+            self._snapshot = None
+
+
+reference_cache = ReferenceCache()
@@ -0,0 +1,218 @@
+# backend/app/database/rollups.py - daily transaction rollups
+"""
+transaction_rollups holds one document per (cost_center_id, type, day) with the
+summed amount and count of transactions for that day. Write handlers keep it in
+step with $inc; rebuild_rollups/verify_rollups recompute it from transactions.
+
+A rebuild swaps in a fresh copy, so an $inc that lands between the recompute and
+the swap is lost. Each rebuild is therefore followed by repair_rollups, which fixes
+rows that still disagree with a recompute, so a rebuild (including the automatic one
+on first start) is safe while other workers accept writes. The rebuild holds a lease
+in collection_versions, so only one process rebuilds at a time. On first start, the
+other workers wait for it to finish before they serve requests.
+
+Amounts are summed as doubles on both sides: $convert in the recompute matches
+as_amount, so legacy rows with string amounts do not show up as drift.
+"""
+import time
+from collections import defaultdict
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.database.versions import acquire_lease, release_lease, lease_held
+from app.utils.dates import as_date as as_day
+import logging
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS = 'transaction_rollups'
+REBUILD_LEASE_SECONDS = 600
+REPAIR_PASSES = 2
+REPAIR_SETTLE_SECONDS = 1.0
+
+
+def as_amount(doc):
+    try:
+        return float(doc.get('amount') or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def rollup_key(doc):
+    """(cost_center_id, type, day) bucket a transaction document falls into."""
+    return (doc.get('cost_center_id'), doc.get('type'), as_day(doc.get('transaction_date')))
+
+
+def add_delta(deltas, doc, sign=1):
+    """Accumulate +doc (sign=1) or -doc (sign=-1) into a {key: [amount, count]} map."""
+    bucket = deltas[rollup_key(doc)]
+    bucket[0] += sign * as_amount(doc)
+    bucket[1] += sign
+
+
+def new_deltas():
+    return defaultdict(lambda: [0.0, 0])
+
+
+def apply_deltas(db, deltas):
+    """Upsert accumulated deltas into transaction_rollups in one unordered bulk write."""
+    ops = []
+    for (cc_id, typ, day), (amount, count) in deltas.items():
+        if not amount and not count:
+            continue
+        ops.append(UpdateOne(
+            {'cost_center_id': cc_id, 'type': typ, 'day': day},
+            {'$inc': {'amount': amount, 'count': count}},
+            upsert=True
+        ))
+    if ops:
+        db[ROLLUPS].bulk_write(ops, ordered=False)
+
+
+def record_transaction_change(db, old=None, new=None):
+    """Apply a create (new only), delete (old only) or update (old -> new) to the rollups."""
+    deltas = new_deltas()
+    if old:
+        add_delta(deltas, old, -1)
+    if new:
+        add_delta(deltas, new, 1)
+    apply_deltas(db, deltas)
+
+
+def _expected_rollups(db):
+    pipeline = [
+        {'$group': {
+            '_id': {'cc': '$cost_center_id', 'type': '$type', 'date': '$transaction_date'},
+            'amount': {'$sum': {'$convert': {'input': '$amount', 'to': 'double', 'onError': 0, 'onNull': 0}}},
+            'count': {'$sum': 1}
+        }}
+    ]
+    expected = new_deltas()
+    for row in db.transactions.aggregate(pipeline, allowDiskUse=True):
+        key = (row['_id'].get('cc'), row['_id'].get('type'), as_day(row['_id'].get('date')))
+        expected[key][0] += row['amount']
+        expected[key][1] += row['count']
+    return expected
+
+
+def create_rollup_indexes(collection):
+    collection.create_index([('cost_center_id', 1), ('type', 1), ('day', 1)], unique=True)
+    collection.create_index('day')
+
+
+def rebuild_rollups(db):
+    """Recompute transaction_rollups from scratch and swap it in.
+
+    Returns the row count, or None if another process holds the rebuild lease.
+    """
+    owner = acquire_lease(db, ROLLUPS, REBUILD_LEASE_SECONDS)
+    if owner is None:
+        return None
+    try:
+        rows = _rebuild(db, owner)
+        repaired = repair_rollups(db)
+        if repaired:
+            logger.warning("Repaired %d %s rows written to during the rebuild", repaired, ROLLUPS)
+        return rows
+    finally:
+        release_lease(db, ROLLUPS, owner)
+
+
+def _rebuild(db, owner):
+    expected = _expected_rollups(db)
+    tmp = db['%s_rebuild_%s' % (ROLLUPS, owner[:8])]
+    tmp.drop()
+    docs = [
+        {'cost_center_id': cc_id, 'type': typ, 'day': day, 'amount': amount, 'count': count}
+        for (cc_id, typ, day), (amount, count) in expected.items()
+    ]
+    create_rollup_indexes(tmp)
+    for i in range(0, len(docs), 1000):
+        tmp.insert_many(docs[i:i + 1000], ordered=False)
+    if docs:
+        tmp.rename(ROLLUPS, dropTarget=True)
+    else:
+        db[ROLLUPS].delete_many({})
+        tmp.drop()
+    logger.info("Rebuilt %s: %d rows", ROLLUPS, len(docs))
+    return len(docs)
+
+
+def verify_rollups(db, tolerance=0.005):
+    """Compare stored rollups with a fresh recompute; returns a list of mismatch dicts."""
+    expected = _expected_rollups(db)
+    mismatches = []
+    seen = set()
+    for row in db[ROLLUPS].find({}):
+        key = (row.get('cost_center_id'), row.get('type'), as_day(row.get('day')))
+        seen.add(key)
+        exp_amount, exp_count = expected.get(key, (0.0, 0))
+        if abs(row.get('amount', 0) - exp_amount) > tolerance or row.get('count', 0) != exp_count:
+            mismatches.append({'key': key, 'stored': (row.get('amount', 0), row.get('count', 0)), 'expected': (exp_amount, exp_count)})
+    for key, (amount, count) in expected.items():
+        if key not in seen:
+            mismatches.append({'key': key, 'stored': None, 'expected': (amount, count)})
+    return mismatches
+
+
+def _repair_ops(mismatches):
+    ops = []
+    for m in mismatches:
+        cc_id, typ, day = m['key']
+        key = {'cost_center_id': cc_id, 'type': typ, 'day': day}
+        amount, count = m['expected']
+        if m['stored'] is None:
+            ops.append(UpdateOne(key, {'$setOnInsert': {'amount': amount, 'count': count}}, upsert=True))
+        else:
+            stored_amount, stored_count = m['stored']
+            # only if no $inc has moved the row since it was read
+            ops.append(UpdateOne(dict(key, amount=stored_amount, count=stored_count),
+                                 {'$inc': {'amount': amount - stored_amount, 'count': count - stored_count}}))
+    return ops
+
+
+def repair_rollups(db, passes=REPAIR_PASSES, settle=REPAIR_SETTLE_SECONDS):
+    """Fix rollup rows that disagree with a recompute; returns how many were repaired.
+
+    A mismatch is only repaired once two verify passes settle seconds apart report it
+    unchanged (a transaction whose $inc is still in flight differs between passes), and
+    each fix is conditional on the row not having moved, so concurrent $incs are kept.
+    """
+    repaired = 0
+    previous = None
+    for i in range(passes + 1):
+        current = {m['key']: m for m in verify_rollups(db)}
+        if not current:
+            break
+        if previous is not None:
+            ops = _repair_ops([m for key, m in current.items() if previous.get(key) == m])
+            if ops:
+                try:
+                    r = db[ROLLUPS].bulk_write(ops, ordered=False)
+                    repaired += r.modified_count + r.upserted_count
+                except BulkWriteError as bwe:
+                    # an upsert raced a concurrent $inc creating the row; the next pass sees it
+                    if any(e.get('code') != 11000 for e in bwe.details.get('writeErrors', [])):
+                        raise
+                    repaired += bwe.details.get('nModified', 0) + bwe.details.get('nUpserted', 0)
+        previous = current
+        if i < passes:
+            time.sleep(settle)
+    return repaired
+
+
+def ensure_rollups(db):
+    """Build the rollups on first start against an existing transactions collection.
+
+    A worker that finds another one rebuilding waits (up to the lease length) until it
+    is done, and rebuilds itself if the other one died without finishing.
+    """
+    if db[ROLLUPS].estimated_document_count() > 0 or db.transactions.estimated_document_count() == 0:
+        return
+    if rebuild_rollups(db) is not None:
+        return
+    logger.info("Waiting for another process to finish rebuilding %s", ROLLUPS)
+    deadline = time.monotonic() + REBUILD_LEASE_SECONDS
+    while lease_held(db, ROLLUPS) and time.monotonic() < deadline:
+        time.sleep(1)
+    if db[ROLLUPS].estimated_document_count() == 0:
+        rebuild_rollups(db)
@@ -0,0 +1,71 @@
+# backend/app/database/sequences.py - MongoDB-backed sequence counters with per-process block reservation
+"""
+sequences holds {_id: <sequence name>, value: <last reserved number>}. Each worker
+reserves a block of numbers with one find_one_and_update $inc and hands them out from
+memory; the lock is only taken to reserve the next block. Numbers are unique across
+workers but not gap-free: a block left unused when a process exits is skipped.
+
+Names of the form '<family>:<period>' (invoice_number:20261017) are per-period
+sequences: reserving the first block of a new period drops this process's blocks
+for the family's other periods, so the in-memory map does not grow by one entry a day.
+"""
+import itertools
+import threading
+from pymongo import ReturnDocument
+
+SEQUENCES = 'sequences'
+
+
+class _Block:
+    def __init__(self, start, end):
+        self._counter = itertools.count(start)
+        self.end = end
+
+    def take(self):
+        """Next number in the block or None once exhausted (next() on itertools.count is atomic)."""
+        n = next(self._counter)
+        return n if n < self.end else None
+
+
+class SequenceAllocator:
+    def __init__(self, block_size=50):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._blocks = {}
+
+    def _retire_siblings(self, name):
+        family, sep, _ = name.rpartition(':')
+        if sep:
+            for other in [k for k in self._blocks if k != name and k.rpartition(':')[0] == family]:
+                del self._blocks[other]
+
+    def _reserve(self, db, name, floor):
+        if name not in self._blocks:
+            self._retire_siblings(name)
+            if floor is not None:
+                # first reservation by this process: never hand out numbers at or below floor()
+                db[SEQUENCES].update_one({'_id': name}, {'$max': {'value': floor()}}, upsert=True)
+        doc = db[SEQUENCES].find_one_and_update(
+            {'_id': name},
+            {'$inc': {'value': self.block_size}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return _Block(doc['value'] - self.block_size + 1, doc['value'] + 1)
+
+    def next(self, db, name, floor=None):
+        """Next number of sequence name. floor: optional callable giving the highest number already in use."""
+        block = self._blocks.get(name)
+        n = block.take() if block else None
+        while n is None:
+            with self._lock:
+                block = self._blocks.get(name)
+                n = block.take() if block else None
+                if n is None:
+                    block = self._reserve(db, name, floor)
+                    self._blocks[name] = block
+                    n = block.take()
+        return n
+
+
+sequences = SequenceAllocator()
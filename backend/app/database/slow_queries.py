@@ -0,0 +1,189 @@
+# backend/app/database/slow_queries.py - slow find/aggregate log with query plans
+"""
+slow_queries is a pymongo CommandListener registered in init_mongodb. Once started,
+every find or aggregate that takes at least SLOW_COMMAND_MS is reduced to its shape
+(field names, operators and sort order kept, literal values replaced by '?') and
+handed to a background thread. That thread optionally runs explain (queryPlanner
+verbosity, at most once per shape every EXPLAIN_INTERVAL seconds) to note whether the
+winning plan used COLLSCAN or IXSCAN, then appends the entry to the capped
+perf_slow_queries collection. Nothing is written from the request thread; if the
+queue is full, entries are dropped and counted.
+"""
+import hashlib
+import logging
+import queue
+import threading
+from datetime import datetime
+from time import monotonic
+from flask import has_request_context, request
+from pymongo import monitoring
+from pymongo.errors import CollectionInvalid
+from app.utils.serialization import dumps_str
+
+logger = logging.getLogger(__name__)
+
+PERF_SLOW_QUERIES = 'perf_slow_queries'
+EXPLAIN_INTERVAL = 600
+_TRACKED = ('find', 'aggregate')
+_STRUCTURAL_KEYS = ('$sort', 'sort', 'projection', '$project', 'hint', 'from', 'localField', 'foreignField', 'as', 'path')
+_FIND_KEYS = ('filter', 'sort', 'projection', 'limit', 'skip', 'hint')
+
+
+def _strip(value, key=None):
+    if key in _STRUCTURAL_KEYS:
+        return value
+    if isinstance(value, dict):
+        return {k: _strip(v, k) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(v, (dict, list, tuple)) for v in value):
+            return [_strip(v) for v in value]
+        return ['?'] if value else []
+    if isinstance(value, str) and value.startswith('$'):
+        return value
+    return '?'
+
+
+def command_shape(command_name, command):
+    """The command with literal values stripped: {'filter': {'cost_center_id': '?'}, 'sort': {...}}."""
+    if command_name == 'find':
+        return _strip({k: command[k] for k in _FIND_KEYS if k in command})
+    return {'pipeline': _strip(list(command.get('pipeline', [])))}
+
+
+def _explain_command(collection, command_name, command):
+    if command_name == 'find':
+        inner = {'find': collection}
+        inner.update((k, command[k]) for k in _FIND_KEYS if k in command)
+    else:
+        inner = {'aggregate': collection, 'pipeline': list(command.get('pipeline', [])), 'cursor': {}}
+    return {'explain': inner, 'verbosity': 'queryPlanner'}
+
+
+def plan_summary(explain):
+    """{'stages': [...], 'indexes': [...], 'collscan': bool} from the winning plan(s) of an explain result."""
+    stages, indexes = [], []
+
+    def walk(node, in_plan):
+        if isinstance(node, dict):
+            if in_plan and 'stage' in node:
+                stages.append(node['stage'])
+                if node.get('indexName'):
+                    indexes.append(node['indexName'])
+            for k, v in node.items():
+                if k == 'rejectedPlans':
+                    continue
+                walk(v, in_plan or k == 'winningPlan')
+        elif isinstance(node, list):
+            for v in node:
+                walk(v, in_plan)
+
+    walk(explain, False)
+    return {'stages': stages, 'indexes': sorted(set(indexes)), 'collscan': 'COLLSCAN' in stages}
+
+
+class SlowQueryRecorder(monitoring.CommandListener):
+    def __init__(self):
+        self.threshold_micros = None
+        self.explain = False
+        self.dropped = 0
+        self._pending = {}
+        self._queue = queue.Queue(maxsize=1000)
+        self._explained = {}
+        self._db = None
+        self._thread = None
+
+    def start(self, db, threshold_ms=100, explain=True, log_bytes=16 * 1024 * 1024):
+        ensure_slow_query_log(db, log_bytes)
+        self._db = db
+        self.explain = explain
+        self.threshold_micros = threshold_ms * 1000
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='slow-query-log', daemon=True)
+            self._thread.start()
+        return self
+
+    def started(self, event):
+        if (self.threshold_micros is not None and event.command_name in _TRACKED
+                and event.command.get(event.command_name) != PERF_SLOW_QUERIES):
+            self._pending[event.request_id] = (event.command, has_request_context() and request.endpoint)
+
+    def succeeded(self, event):
+        entry = self._pending.pop(event.request_id, None)
+        if entry is None or event.duration_micros < self.threshold_micros:
+            return
+        command, endpoint = entry
+        try:
+            self._queue.put_nowait((event.command_name, event.database_name, command, endpoint,
+                                    event.duration_micros, datetime.utcnow()))
+        except queue.Full:
+            self.dropped += 1
+
+    def failed(self, event):
+        self._pending.pop(event.request_id, None)
+
+    def stats(self):
+        return {'queued': self._queue.qsize(), 'dropped': self.dropped, 'explained_shapes': len(self._explained)}
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self._record(*item)
+            except Exception:
+                logger.exception("Could not record slow query")
+
+    def _record(self, command_name, database_name, command, endpoint, duration_micros, at):
+        collection = command.get(command_name)
+        if not isinstance(collection, str):
+            collection = database_name
+        shape = dumps_str(command_shape(command_name, command))
+        shape_key = hashlib.sha1(('%s|%s|%s' % (collection, command_name, shape)).encode()).hexdigest()[:16]
+        doc = {
+            'at': at,
+            'command': command_name,
+            'collection': collection,
+            'shape': shape,
+            'shape_key': shape_key,
+            'duration_ms': round(duration_micros / 1000.0, 2),
+            'endpoint': endpoint or None,
+            'plan': self._plan(shape_key, collection, command_name, command) if self.explain else None
+        }
+        self._db[PERF_SLOW_QUERIES].insert_one(doc)
+
+    def _plan(self, shape_key, collection, command_name, command):
+        cached = self._explained.get(shape_key)
+        if cached is not None and monotonic() - cached[0] < EXPLAIN_INTERVAL:
+            return cached[1]
+        try:
+            plan = plan_summary(self._db.command(_explain_command(collection, command_name, command)))
+        except Exception as e:
+            plan = {'error': str(e)}
+        self._explained[shape_key] = (monotonic(), plan)
+        return plan
+
+
+slow_queries = SlowQueryRecorder()
+
+
+def ensure_slow_query_log(db, size_bytes=16 * 1024 * 1024):
+    """Create the capped perf_slow_queries collection if it does not exist."""
+    if PERF_SLOW_QUERIES in db.list_collection_names():
+        return
+    try:
+        db.create_collection(PERF_SLOW_QUERIES, capped=True, size=size_bytes)
+    except CollectionInvalid:
+        pass
+
+
+def init_slow_query_log(app):
+    """Start recording from SLOW_COMMAND_MS / SLOW_QUERY_EXPLAIN / SLOW_QUERY_LOG_BYTES config (SLOW_QUERY_LOG=0 disables)."""
+    if not app.config.get('SLOW_QUERY_LOG', True):
+        return None
+    slow_queries.start(
+        app.config['MONGO_DB'],
+        threshold_ms=app.config.get('SLOW_COMMAND_MS', 100),
+        explain=app.config.get('SLOW_QUERY_EXPLAIN', True),
+        log_bytes=app.config.get('SLOW_QUERY_LOG_BYTES', 16 * 1024 * 1024)
+    )
+    app.extensions['slow_queries'] = slow_queries
+    return slow_queries
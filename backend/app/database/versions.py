@@ -0,0 +1,58 @@
+# backend/app/database/versions.py - per-collection write version stamps
+"""
+collection_versions holds {_id: <collection name>, version: <int>}. Write handlers bump
+the stamp so process-local caches in every worker can tell when their copy is stale.
+It also holds leases ({_id: 'lease:<name>', owner, expires_at}) that let one process
+at a time run a job such as a rollup rebuild.
+"""
+import uuid
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+VERSIONS = 'collection_versions'
+
+
+def bump_version(db, name):
+    """Atomically increment and return the version stamp for a collection."""
+    doc = db[VERSIONS].find_one_and_update(
+        {'_id': name},
+        {'$inc': {'version': 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return doc['version']
+
+
+def get_versions(db, names):
+    """Current version stamps for several collections in one query (0 if never written)."""
+    found = {d['_id']: d.get('version', 0) for d in db[VERSIONS].find({'_id': {'$in': list(names)}})}
+    return {name: found.get(name, 0) for name in names}
+
+
+def get_version(db, name):
+    return get_versions(db, [name])[name]
+
+
+def acquire_lease(db, name, seconds):
+    """Take the lease on name for seconds; returns an owner token, or None if another process holds it."""
+    owner = uuid.uuid4().hex
+    now = datetime.utcnow()
+    try:
+        db[VERSIONS].find_one_and_update(
+            {'_id': 'lease:' + name, '$or': [{'expires_at': {'$lt': now}}, {'owner': None}]},
+            {'$set': {'owner': owner, 'expires_at': now + timedelta(seconds=seconds)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return None
+    return owner
+
+
+def release_lease(db, name, owner):
+    db[VERSIONS].update_one({'_id': 'lease:' + name, 'owner': owner}, {'$set': {'owner': None, 'expires_at': None}})
+
+
+def lease_held(db, name):
+    doc = db[VERSIONS].find_one({'_id': 'lease:' + name})
+    return bool(doc and doc.get('owner') and doc.get('expires_at') and doc['expires_at'] > datetime.utcnow())
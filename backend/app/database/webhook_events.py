@@ -0,0 +1,54 @@
+# backend/app/database/webhook_events.py - raw Stripe webhook events awaiting processing
+"""
+webhook_events stores each delivered event as received. The _id is the payment intent
+id for payment_intent.succeeded (the event id otherwise), so a redelivery is a
+duplicate-key no-op; app/services/stripe_events.py applies pending events.
+"""
+import logging
+from datetime import datetime
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_EVENTS = 'webhook_events'
+PAYMENT_SUCCEEDED = 'payment_intent.succeeded'
+
+
+def create_webhook_indexes(db):
+    db[WEBHOOK_EVENTS].create_index([('status', 1), ('received_at', 1)])
+    db[WEBHOOK_EVENTS].create_index('claim')
+    try:
+        db.payments.create_index(
+            'transaction_id',
+            unique=True,
+            name='stripe_transaction_id_unique',
+            partialFilterExpression={'payment_method': 'stripe', 'transaction_id': {'$type': 'string'}}
+        )
+    except (DuplicateKeyError, OperationFailure) as e:
+        logger.warning("Could not create unique index on payments.transaction_id (duplicate Stripe payments?): %s", e)
+
+
+def event_intent(event):
+    """The event's data.object (the PaymentIntent for payment_intent events)."""
+    obj = (event.get('data') or {}).get('object') or {}
+    return obj if isinstance(obj, dict) else {}
+
+
+def record_event(db, event):
+    """Store a raw webhook event; returns False if it was already recorded."""
+    intent_id = event_intent(event).get('id')
+    key = intent_id if event.get('type') == PAYMENT_SUCCEEDED and intent_id else event.get('id')
+    doc = {
+        'type': event.get('type'),
+        'payload': event,
+        'status': 'pending' if event.get('type') == PAYMENT_SUCCEEDED else 'ignored',
+        'attempts': 0,
+        'received_at': datetime.utcnow()
+    }
+    if key:
+        doc['_id'] = key
+    try:
+        db[WEBHOOK_EVENTS].insert_one(doc)
+        return True
+    except DuplicateKeyError:
+        return False
@@ -5,7 +5,6 @@ Set MONGO_URI and MONGO_DB_NAME in .env (e.g. MongoDB Atlas connection string).
 """
 import sys
 import os
-from datetime import date, datetime
 
 _backend_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if _backend_root not in sys.path:
@@ -13,63 +12,6 @@ if _backend_root not in sys.path:
 
 from flask import Flask, jsonify
 from flask_cors import CORS
-
-def _sanitize_for_json(obj):
-    """Recursively convert date/datetime/ObjectId to JSON-serializable types."""
-    if obj is None:
-        return None
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    if isinstance(obj, date):
-        return obj.isoformat()
-    if isinstance(obj, dict):
-        return {k: _sanitize_for_json(v) for k, v in obj.items()}
-    if isinstance(obj, (list, tuple)):
-        return [_sanitize_for_json(v) for v in obj]
-    try:
-        from bson import ObjectId
-        if isinstance(obj, ObjectId):
-            return str(obj)
-    except ImportError:
-        pass
-    return obj
-
-try:
-    from flask.json.provider import DefaultJSONProvider
-    from bson import ObjectId
-
-    class CustomJSONProvider(DefaultJSONProvider):
-        """JSON provider: sanitize payload then serialize so date/datetime never reach encoder."""
-        def default(self, o):
-            if isinstance(o, datetime):
-                return o.isoformat()
-            if isinstance(o, date):
-                return o.isoformat()
-            if isinstance(o, ObjectId):
-                return str(o)
-            return super().default(o)
-
-        def dumps(self, obj, **kwargs):
-            return super().dumps(_sanitize_for_json(obj), **kwargs)
-
-    def _install_json_provider(app):
-        app.json = CustomJSONProvider(app)
-except ImportError:
-    import json
-    from bson import ObjectId
-
-    class CustomJSONEncoder(json.JSONEncoder):
-        def default(self, o):
-            if isinstance(o, datetime):
-                return o.isoformat()
-            if isinstance(o, date):
-                return o.isoformat()
-            if isinstance(o, ObjectId):
-                return str(o)
-            return super().default(o)
-
-    def _install_json_provider(app):
-        app.json_encoder = CustomJSONEncoder
 from flask_jwt_extended import JWTManager
 from dotenv import load_dotenv
 
@@ -81,39 +23,56 @@ if os.path.isfile(_env_path):
     load_dotenv(_env_path)
 
 from app.database.connection import init_mongodb
+from app.database.slow_queries import init_slow_query_log
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.serialization import install_json_provider
+from app.utils.http_cache import init_http_cache
+from app.utils.request_stats import init_request_stats
+from app.utils.metrics import init_metrics
+from app.services.report_cache import init_report_cache
+from app.services.singleflight import init_singleflight
+from app.services.admission import init_admission
+from app.services.stripe_events import start_webhook_workers
+from app.services.payment_gateway import init_payment_gateway
 
 
 def create_app():
     """Application factory pattern - uses MongoDB (online)."""
     app = Flask(__name__)
-    _install_json_provider(app)
-
-    # Force every JSON response through sanitizer so date/datetime never reach the encoder
-    _orig_dumps = app.json.dumps
-    def _safe_dumps(obj, **kwargs):
-        return _orig_dumps(_sanitize_for_json(obj), **kwargs)
-    app.json.dumps = _safe_dumps
-
-    # Also patch global jsonify so every jsonify() call (from any blueprint) sanitizes first
-    import flask.json as _flask_json
-    _orig_jsonify = _flask_json.jsonify
-    def _safe_jsonify(*args, **kwargs):
-        if not args and not kwargs:
-            return _orig_jsonify(*args, **kwargs)
-        from flask import current_app
-        obj = current_app.json._prepare_response_obj(args, kwargs)
-        if obj is not None:
-            return _orig_jsonify(_sanitize_for_json(obj))
-        return _orig_jsonify(*args, **kwargs)
-    _flask_json.jsonify = _safe_jsonify
+    install_json_provider(app)
 
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-me')
     app.config['MONGO_URI'] = os.getenv('MONGO_URI', 'mongodb://localhost:27017/')
     app.config['MONGO_DB_NAME'] = os.getenv('MONGO_DB_NAME', 'shiv_furniture_db')
-
-    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    app.config['WEBHOOK_WORKERS'] = int(os.getenv('WEBHOOK_WORKERS', '2'))
+    app.config['PAYMENT_GATEWAY_WORKERS'] = int(os.getenv('PAYMENT_GATEWAY_WORKERS', '8'))
+    app.config['PAYMENT_GATEWAY_QUEUE'] = int(os.getenv('PAYMENT_GATEWAY_QUEUE', '8'))
+    app.config['PAYMENT_GATEWAY_TIMEOUT'] = float(os.getenv('PAYMENT_GATEWAY_TIMEOUT', '10'))
+    app.config['STRIPE_API_BASE'] = os.getenv('STRIPE_API_BASE')
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+    app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', '6'))
+    app.config['REPORT_CACHE_URL'] = os.getenv('REPORT_CACHE_URL', '')
+    app.config['REPORT_CACHE_MAX_BYTES'] = int(os.getenv('REPORT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+    app.config['REPORT_CACHE_TTL'] = int(os.getenv('REPORT_CACHE_TTL', '600'))
+    app.config['SINGLEFLIGHT_TIMEOUT'] = float(os.getenv('SINGLEFLIGHT_TIMEOUT', '30'))
+    app.config['ADMISSION_REPORT_LIMIT'] = int(os.getenv('ADMISSION_REPORT_LIMIT', '4'))
+    app.config['ADMISSION_REPORT_QUEUE'] = int(os.getenv('ADMISSION_REPORT_QUEUE', '8'))
+    app.config['ADMISSION_CRUD_LIMIT'] = int(os.getenv('ADMISSION_CRUD_LIMIT', '32'))
+    app.config['ADMISSION_CRUD_QUEUE'] = int(os.getenv('ADMISSION_CRUD_QUEUE', '64'))
+    app.config['ADMISSION_QUEUE_TIMEOUT'] = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '5'))
+    app.config['ADMISSION_RETRY_AFTER'] = int(os.getenv('ADMISSION_RETRY_AFTER', '1'))
+    app.config['QUERY_COUNT_WARN'] = int(os.getenv('QUERY_COUNT_WARN', '25'))
+    app.config['SLOW_COMMAND_MS'] = int(os.getenv('SLOW_COMMAND_MS', '100'))
+    app.config['SLOW_QUERY_LOG'] = int(os.getenv('SLOW_QUERY_LOG', '1'))
+    app.config['SLOW_QUERY_EXPLAIN'] = int(os.getenv('SLOW_QUERY_EXPLAIN', '1'))
+    app.config['SLOW_QUERY_LOG_BYTES'] = int(os.getenv('SLOW_QUERY_LOG_BYTES', str(16 * 1024 * 1024)))
+
+    CORS(app, resources={r"/api/*": {"origins": "*"}}, expose_headers=[NEXT_CURSOR_HEADER])
     jwt = JWTManager(app)
+    init_metrics(app)
+    init_http_cache(app)
+    init_request_stats(app)
 
     @jwt.invalid_token_loader
     def invalid_token_callback(error):
@@ -129,6 +88,12 @@ def create_app():
 
     init_mongodb(app)
     print("[OK] MongoDB connected")
+    init_slow_query_log(app)
+    init_report_cache(app)
+    init_singleflight(app)
+    init_admission(app)
+    start_webhook_workers(app)
+    init_payment_gateway(app)
 
     try:
         from app.api.auth import auth_bp
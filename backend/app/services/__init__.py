@@ -0,0 +1 @@
+# backend/app/services/__init__.py
\ No newline at end of file
@@ -0,0 +1,177 @@
+# backend/app/services/admission.py - per-class concurrency limits for API requests
+"""
+Every API request is admitted through a concurrency class before its view runs:
+
+  report - heavy aggregation routes, marked with @admit('report'). The check runs
+           inside the report cache and single-flight wrappers, so cache hits and
+           coalesced waiters do not take a slot.
+  crud   - every other blueprint route, admitted by a before_request hook.
+
+A streamed response (CSV/NDJSON export) keeps its slot until the body has been sent.
+
+Each class allows `limit` requests to run at once and `queue` more to wait, for at
+most ADMISSION_QUEUE_TIMEOUT seconds. Anything beyond that is shed right away with
+503 + Retry-After, so a burst of reports cannot take every worker thread and pooled
+MongoDB connection while cheap requests queue behind it. Queue wait times are
+recorded per class as a histogram (see stats()).
+"""
+import threading
+import time
+from functools import wraps
+from flask import Response, current_app, g, request
+from app.utils.json_response import json_response
+
+WAIT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class AdmissionClass:
+    def __init__(self, name, limit, queue, queue_timeout=5.0):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.running = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+        self.wait_count = 0
+        self.wait_sum = 0.0
+
+    def acquire(self):
+        """True once a slot is held; False if the request should be shed."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.waiting >= self.queue:
+                    self.rejected += 1
+                    return False
+                self.waiting += 1
+            start = time.monotonic()
+            acquired = self._slots.acquire(timeout=self.queue_timeout)
+            waited = time.monotonic() - start
+            with self._lock:
+                self.waiting -= 1
+                if not acquired:
+                    self.rejected += 1
+                    return False
+                self._observe_wait(waited)
+        else:
+            with self._lock:
+                self._observe_wait(0.0)
+        with self._lock:
+            self.running += 1
+            self.admitted += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.running -= 1
+        self._slots.release()
+
+    def _observe_wait(self, seconds):
+        self.wait_count += 1
+        self.wait_sum += seconds
+        for i, bound in enumerate(WAIT_BUCKETS):
+            if seconds <= bound:
+                self.wait_buckets[i] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'queue': self.queue,
+                'running': self.running,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'wait_seconds': {
+                    'count': self.wait_count,
+                    'sum': round(self.wait_sum, 6),
+                    'buckets': dict(zip(WAIT_BUCKETS, self.wait_buckets))
+                }
+            }
+
+
+class AdmissionController:
+    def __init__(self, classes, retry_after=1):
+        self.classes = dict((c.name, c) for c in classes)
+        self.retry_after = retry_after
+
+    def enter(self, name):
+        """False when the request should be shed; True once admitted (release with leave()).
+
+        Classes that are not configured are not limited.
+        """
+        cls = self.classes.get(name)
+        return cls is None or cls.acquire()
+
+    def leave(self, name):
+        cls = self.classes.get(name)
+        if cls is not None:
+            cls.release()
+
+    def busy_response(self):
+        return json_response({'error': 'Server is busy, please retry shortly'}, 503,
+                             headers={'Retry-After': str(self.retry_after)})
+
+    def stats(self):
+        return dict((name, c.stats()) for name, c in self.classes.items())
+
+
+def admit(class_name):
+    """Run the view inside admission class class_name instead of the default crud class."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            controller = current_app.extensions.get('admission')
+            if controller is None:
+                return view(*args, **kwargs)
+            if not controller.enter(class_name):
+                return controller.busy_response()
+            streamed = False
+            try:
+                resp = view(*args, **kwargs)
+                if isinstance(resp, Response) and resp.is_streamed:
+                    # the body (and its cursor getMores) runs after the view returns: hold the slot until it closes
+                    resp.call_on_close(lambda: controller.leave(class_name))
+                    streamed = True
+                return resp
+            finally:
+                if not streamed:
+                    controller.leave(class_name)
+        wrapper.admission_class = class_name
+        return wrapper
+    return decorator
+
+
+def init_admission(app):
+    """Build the report/crud classes from ADMISSION_* config; a limit of 0 leaves a class unlimited."""
+    timeout = app.config.get('ADMISSION_QUEUE_TIMEOUT', 5.0)
+    classes = []
+    for name in ('report', 'crud'):
+        limit = app.config.get('ADMISSION_%s_LIMIT' % name.upper(), 0)
+        if limit > 0:
+            classes.append(AdmissionClass(name, limit, app.config.get('ADMISSION_%s_QUEUE' % name.upper(), limit), timeout))
+    controller = AdmissionController(classes, retry_after=app.config.get('ADMISSION_RETRY_AFTER', 1))
+    app.extensions['admission'] = controller
+
+    @app.before_request
+    def _admit_crud():
+        if request.method == 'OPTIONS' or not request.blueprint:
+            return None
+        view = app.view_functions.get(request.endpoint)
+        if view is None or getattr(view, 'admission_class', None):
+            return None
+        if not controller.enter('crud'):
+            return controller.busy_response()
+        g.admission_class = 'crud'
+        return None
+
+    @app.teardown_request
+    def _release_crud(exc):
+        if g.pop('admission_class', None):
+            controller.leave('crud')
+
+    return controller
@@ -0,0 +1,127 @@
+# backend/app/services/payment_gateway.py - bounded, time-limited calls to the payment provider
+"""
+Payment-provider calls run on a small dedicated thread pool instead of directly in the
+request thread. Each call waits at most PAYMENT_GATEWAY_TIMEOUT seconds for its result,
+and when every worker and queue slot is taken new calls fail fast with GatewayBusy
+(the API answers 503 + Retry-After) instead of piling up WSGI threads behind Stripe.
+
+The client is pluggable: anything with create_payment_intent(**params) works. The
+default StripePaymentClient uses the stripe SDK with a pooled HTTP client, and
+STRIPE_API_BASE can point it at a local fake (scripts/fake_stripe.py).
+
+A timed-out call cannot be cancelled once it is running, so the provider may still
+create the PaymentIntent after the API has answered 504. Callers therefore pass an
+idempotency_key (see payment_idempotency_key); a retry with the same key gets the
+intent the abandoned call created instead of a second one.
+"""
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import stripe
+
+
+class GatewayBusy(Exception):
+    """Every worker and queue slot is in use."""
+
+
+class GatewayTimeout(Exception):
+    """The provider did not answer within the call timeout."""
+
+
+def _pooled_http_client(timeout):
+    """requests-based stripe HTTP client (keeps connections alive per thread) if available."""
+    cls = getattr(stripe, 'RequestsClient', None)
+    if cls is None:
+        cls = getattr(getattr(stripe, 'http_client', None), 'RequestsClient', None)
+    try:
+        return cls(timeout=timeout) if cls else None
+    except Exception:
+        return None
+
+
+def payment_idempotency_key(invoice_id, amount_cents, paid_amount, nonce=''):
+    """Stable key for one payment attempt on an invoice.
+
+    paid_amount is part of the key so a later payment of the same amount, after the
+    first one has been recorded, gets a new intent; nonce is the client's own
+    Idempotency-Key, if it sends one.
+    """
+    raw = '%s|%d|%s|%s' % (invoice_id, amount_cents, paid_amount or 0, nonce or '')
+    return 'invoice-payment-' + hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+class StripePaymentClient:
+    def __init__(self, api_key=None, api_base=None, timeout=10.0):
+        self.api_key = api_key
+        if api_base:
+            stripe.api_base = api_base
+        http_client = _pooled_http_client(timeout)
+        if http_client is not None:
+            stripe.default_http_client = http_client
+        stripe.max_network_retries = 0
+
+    def create_payment_intent(self, idempotency_key=None, **params):
+        if idempotency_key:
+            params['idempotency_key'] = idempotency_key
+        if self.api_key:
+            params['api_key'] = self.api_key
+        return stripe.PaymentIntent.create(**params)
+
+
+class PaymentGateway:
+    def __init__(self, client, workers=8, queue_size=8, timeout=10.0):
+        self.client = client
+        self.timeout = timeout
+        self.capacity = workers + queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='payment-gateway')
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def call(self, method, *args, **kwargs):
+        """Run client.<method>(...) on the pool; raises GatewayBusy or GatewayTimeout."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise GatewayBusy()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(getattr(self.client, method), *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise GatewayTimeout()
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': self._in_flight, 'capacity': self.capacity, 'rejected': self.rejected, 'timeouts': self.timeouts}
+
+
+def init_payment_gateway(app, client=None):
+    """Create the process-wide gateway from PAYMENT_GATEWAY_* / STRIPE_API_BASE config."""
+    timeout = app.config.get('PAYMENT_GATEWAY_TIMEOUT', 10.0)
+    if client is None:
+        client = StripePaymentClient(api_base=app.config.get('STRIPE_API_BASE'), timeout=timeout)
+    gateway = PaymentGateway(
+        client,
+        workers=app.config.get('PAYMENT_GATEWAY_WORKERS', 8),
+        queue_size=app.config.get('PAYMENT_GATEWAY_QUEUE', 8),
+        timeout=timeout
+    )
+    app.extensions['payment_gateway'] = gateway
+    return gateway
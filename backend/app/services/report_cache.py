@@ -0,0 +1,232 @@
+# backend/app/services/report_cache.py - versioned cache for report responses
+"""
+Report responses are cached under (endpoint, query args, role, day, versions of the
+collections the report reads). Write handlers call bump_versions('transactions', ...)
+after they change a collection; the next report request then builds a different key
+and recomputes, while entries for the old versions age out of the backend. Nothing is
+ever served for a version that has moved, even if a write lands while a report is
+being computed.
+
+Backends:
+  MemoryBackend - in-process LRU bounded by total body bytes (default). Its version
+                  counters are the shared stamps in collection_versions, so a write
+                  handled by one worker changes the keys every worker builds.
+  RedisBackend  - shared store for several workers (REPORT_CACHE_URL=redis://...).
+                  Entries expire after REPORT_CACHE_TTL and the server's maxmemory
+                  policy handles eviction. Any redis-py compatible client works
+                  (fakeredis for local runs).
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+from flask import current_app, request, make_response, Response
+from app.utils.http_cache import body_etag
+from app.services.singleflight import request_key
+from app.database.versions import bump_version, get_versions
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """Entries in this process; versions from collection_versions in db (process-local counters if db is None)."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=600, db=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.db = db
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def versions(self, names):
+        if self.db is not None:
+            stamps = get_versions(self.db, names)
+            return [stamps[n] for n in names]
+        with self._lock:
+            return [self._versions.get(n, 0) for n in names]
+
+    def bump(self, names):
+        if self.db is not None:
+            for n in names:
+                bump_version(self.db, n)
+            return
+        with self._lock:
+            for n in names:
+                self._versions[n] = self._versions.get(n, 0) + 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, value = self._entries.pop(key)
+        self._size -= len(value)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._size, 'evictions': self.evictions}
+
+
+class RedisBackend:
+    def __init__(self, client, ttl=600, prefix='report_cache:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def versions(self, names):
+        values = self.client.mget([self.prefix + 'v:' + n for n in names])
+        return [int(v or 0) for v in values]
+
+    def bump(self, names):
+        pipe = self.client.pipeline(transaction=False)
+        for n in names:
+            pipe.incr(self.prefix + 'v:' + n)
+        pipe.execute()
+
+    def get(self, key):
+        return self.client.get(self.prefix + 'e:' + key)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + 'e:' + key, value, ex=self.ttl)
+
+    def stats(self):
+        return {}
+
+
+class ReportCache:
+    """Key building, entry encoding and hit/miss counters on top of a backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, collections):
+        versions = self.backend.versions(collections)
+        parts = [
+            request_key(),
+            date.today().isoformat(),
+            ','.join('%s:%d' % pair for pair in zip(collections, versions))
+        ]
+        return body_etag('|'.join(parts).encode())
+
+    def get(self, key):
+        """Cached Response for key, or None."""
+        try:
+            value = self.backend.get(key)
+        except Exception:
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        etag, _, body = value.partition(b'\n')
+        resp = Response(body, status=200, mimetype='application/json')
+        resp.set_etag(etag.decode())
+        return resp
+
+    def store(self, key, resp):
+        etag, weak = resp.get_etag()
+        body = resp.get_data()
+        if not etag or weak:
+            etag = body_etag(body)
+            resp.set_etag(etag)
+        try:
+            self.backend.set(key, etag.encode() + b'\n' + body)
+        except Exception:
+            pass
+
+    def bump(self, *collections):
+        try:
+            self.backend.bump(collections)
+        except Exception:
+            logger.exception("Could not bump report cache versions for %s", ', '.join(collections))
+
+    def stats(self):
+        with self._lock:
+            out = {'hits': self.hits, 'misses': self.misses}
+        out.update(self.backend.stats())
+        return out
+
+
+def cached_report(*collections):
+    """Cache a GET view's 200 JSON responses until one of collections is written."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get('report_cache')
+            if cache is None or request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+            try:
+                key = cache.key(collections)
+            except Exception:
+                logger.exception("Report cache unavailable; computing %s uncached", request.endpoint)
+                return view(*args, **kwargs)
+            hit = cache.get(key)
+            if hit is not None:
+                return hit
+            resp = make_response(view(*args, **kwargs))
+            if resp.status_code == 200 and not resp.is_streamed and resp.mimetype == 'application/json':
+                cache.store(key, resp)
+            return resp
+        return wrapper
+    return decorator
+
+
+def bump_versions(*collections):
+    """Invalidate cached reports that read any of collections (call after a write)."""
+    cache = current_app.extensions.get('report_cache')
+    if cache is not None:
+        cache.bump(*collections)
+
+
+def init_report_cache(app, client=None):
+    """Create the process-wide cache from REPORT_CACHE_* config; REPORT_CACHE_URL=off disables it."""
+    url = app.config.get('REPORT_CACHE_URL') or ''
+    ttl = app.config.get('REPORT_CACHE_TTL', 600)
+    if url == 'off':
+        return None
+    if client is None and url:
+        if redis is None:
+            raise RuntimeError("REPORT_CACHE_URL is set but the redis package is not installed")
+        client = redis.Redis.from_url(url)
+    if client is not None:
+        backend = RedisBackend(client, ttl=ttl)
+    else:
+        backend = MemoryBackend(max_bytes=app.config.get('REPORT_CACHE_MAX_BYTES', 64 * 1024 * 1024), ttl=ttl,
+                                db=app.config.get('MONGO_DB'))
+    cache = ReportCache(backend)
+    app.extensions['report_cache'] = cache
+    return cache
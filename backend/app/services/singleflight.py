@@ -0,0 +1,100 @@
+# backend/app/services/singleflight.py - coalescing of concurrent identical requests
+"""
+When several identical requests (same endpoint, query args and JWT role) arrive while
+one of them is already being computed, the later ones wait for that computation and
+answer with a copy of its response instead of running the view again. The registry
+is per worker process. A waiter gives up after SINGLEFLIGHT_TIMEOUT seconds and runs
+the view itself, as it also does when the leader's response was not a plain 200
+(an error, a shed request or a streamed export).
+"""
+import threading
+from functools import wraps
+from flask import current_app, request, make_response, Response
+from flask_jwt_extended import get_jwt_identity
+
+
+def request_key():
+    """endpoint | sorted query args | JWT role for the current request."""
+    args = '&'.join('%s=%s' % (k, v) for k, v in sorted(request.args.items(multi=True)))
+    return '|'.join([request.endpoint or '', args, (get_jwt_identity() or {}).get('role', '')])
+
+
+class _Call:
+    __slots__ = ('done', 'result')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    def __init__(self, timeout=30.0):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    def do(self, key, fn):
+        """Run fn() once for concurrent callers of key; returns (result, shared).
+
+        Waiters get the leader's result with shared=True. If the leader raised, returned
+        None or took longer than the timeout, a waiter runs fn() itself.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+        if not leader:
+            finished = call.done.wait(self.timeout)
+            with self._lock:
+                if finished and call.result is not None:
+                    self.coalesced += 1
+                    return call.result, True
+                if not finished:
+                    self.timeouts += 1
+            return fn(), False
+        try:
+            call.result = fn()
+            return call.result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': len(self._calls), 'leaders': self.leaders, 'coalesced': self.coalesced, 'timeouts': self.timeouts}
+
+
+def coalesced(view):
+    """Share one computation of a GET view between concurrent identical requests."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        flight = current_app.extensions.get('singleflight')
+        if flight is None or request.method not in ('GET', 'HEAD'):
+            return view(*args, **kwargs)
+        own = {}
+
+        def compute():
+            resp = make_response(view(*args, **kwargs))
+            own['resp'] = resp
+            if resp.is_streamed or resp.status_code != 200:
+                return None
+            return resp.get_data(), resp.status_code, list(resp.headers)
+
+        snapshot, shared = flight.do(request_key(), compute)
+        if not shared:
+            return own['resp']
+        body, status, headers = snapshot
+        return Response(body, status=status, headers=headers)
+    return wrapper
+
+
+def init_singleflight(app):
+    flight = SingleFlight(timeout=app.config.get('SINGLEFLIGHT_TIMEOUT', 30.0))
+    app.extensions['singleflight'] = flight
+    return flight
@@ -0,0 +1,217 @@
+# backend/app/services/stripe_events.py - background processing of recorded Stripe webhook events
+"""
+The webhook handler only records the raw event (app/database/webhook_events.py) and
+acknowledges. A small pool of background threads claims pending events in batches,
+inserts their payments with insert_many(ordered=False) and applies one paid_amount
+update per invoice. payments.transaction_id is uniquely indexed for Stripe payments:
+if a batch is retried after a crash, payments that already exist are skipped and
+their invoices are recounted from payments instead of incremented, so nothing is
+counted twice.
+
+Each event is validated on its own (intent id, amount, metadata.invoice_id); a bad
+one is marked failed with the reason instead of failing the events claimed with it.
+"""
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from app.database.invoice_payments import apply_payment, recount_invoices_paid
+from app.database.models import oid
+from app.database.webhook_events import WEBHOOK_EVENTS, event_intent
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+REQUEUE_INTERVAL = 60
+
+
+def _claim(db, batch_size):
+    ids = [e['_id'] for e in db[WEBHOOK_EVENTS].find({'status': 'pending'}, {'_id': 1}).sort('received_at', 1).limit(batch_size)]
+    if not ids:
+        return []
+    claim = ObjectId()
+    db[WEBHOOK_EVENTS].update_many(
+        {'_id': {'$in': ids}, 'status': 'pending'},
+        {'$set': {'status': 'processing', 'claim': claim, 'claimed_at': datetime.utcnow()}, '$inc': {'attempts': 1}}
+    )
+    return list(db[WEBHOOK_EVENTS].find({'claim': claim, 'status': 'processing'}))
+
+
+def parse_intent(event):
+    """(intent id, invoice ObjectId, amount in currency units) from a stored event; raises ValueError if unusable."""
+    intent = event_intent(event)
+    intent_id = intent.get('id')
+    if not isinstance(intent_id, str) or not intent_id:
+        raise ValueError('missing payment intent id')
+    amount = intent.get('amount')
+    if isinstance(amount, bool) or not isinstance(amount, (int, float)) or not math.isfinite(amount) or amount <= 0:
+        raise ValueError('invalid amount: %r' % (amount,))
+    metadata = intent.get('metadata')
+    if not isinstance(metadata, dict):
+        raise ValueError('missing metadata')
+    invoice_id = oid(metadata.get('invoice_id')) if isinstance(metadata.get('invoice_id'), str) else None
+    if invoice_id is None:
+        raise ValueError('invalid metadata.invoice_id: %r' % (metadata.get('invoice_id'),))
+    return intent_id, invoice_id, amount / 100
+
+
+def _apply(db, events):
+    """Insert payments for claimed events and update invoice counters; returns {event _id: error} for failures."""
+    failed = {}
+    parsed = {}
+    for e in events:
+        try:
+            parsed[e['_id']] = parse_intent(e.get('payload') or {})
+        except ValueError as err:
+            failed[e['_id']] = str(err)
+    found = {inv['_id'] for inv in db.invoices.find({'_id': {'$in': [p[1] for p in parsed.values()]}}, {'_id': 1})}
+    payments = []
+    for e in events:
+        if e['_id'] not in parsed:
+            continue
+        intent_id, invoice_id, amount = parsed[e['_id']]
+        if invoice_id not in found:
+            failed[e['_id']] = 'invoice not found'
+            continue
+        now = datetime.utcnow()
+        payments.append({
+            'invoice_id': invoice_id,
+            'amount': amount,
+            'payment_method': 'stripe',
+            'transaction_id': intent_id,
+            'status': 'completed',
+            'payment_date': now,
+            'created_at': now
+        })
+    duplicates = set()
+    if payments:
+        try:
+            db.payments.insert_many(payments, ordered=False)
+        except BulkWriteError as bwe:
+            for err in bwe.details.get('writeErrors', []):
+                if err.get('code') != 11000:
+                    raise
+                duplicates.add(err['index'])
+    paid = defaultdict(float)
+    recount = set()
+    for i, p in enumerate(payments):
+        if i in duplicates:
+            recount.add(p['invoice_id'])
+        else:
+            paid[p['invoice_id']] += p['amount']
+    for invoice_id, amount in paid.items():
+        if invoice_id not in recount:
+            apply_payment(db, invoice_id, amount)
+    if recount:
+        recount_invoices_paid(db, [{'_id': i} for i in recount])
+        for invoice_id in recount:
+            apply_payment(db, invoice_id, 0)
+    return failed
+
+
+def process_batch(db, batch_size=100):
+    """Claim and apply up to batch_size pending events; returns how many were claimed."""
+    events = _claim(db, batch_size)
+    if not events:
+        return 0
+    ids = [e['_id'] for e in events]
+    try:
+        failed = _apply(db, events)
+    except Exception as e:
+        logger.exception("Webhook batch failed; releasing %d events", len(ids))
+        db[WEBHOOK_EVENTS].update_many(
+            {'_id': {'$in': ids}, 'attempts': {'$lt': MAX_ATTEMPTS}},
+            {'$set': {'status': 'pending', 'last_error': str(e)}, '$unset': {'claim': ''}}
+        )
+        db[WEBHOOK_EVENTS].update_many(
+            {'_id': {'$in': ids}, 'status': 'processing'},
+            {'$set': {'status': 'failed', 'last_error': str(e)}}
+        )
+        return len(ids)
+    now = datetime.utcnow()
+    for event_id, error in failed.items():
+        db[WEBHOOK_EVENTS].update_one({'_id': event_id}, {'$set': {'status': 'failed', 'last_error': error, 'processed_at': now}})
+    done = [i for i in ids if i not in failed]
+    if done:
+        db[WEBHOOK_EVENTS].update_many({'_id': {'$in': done}}, {'$set': {'status': 'done', 'processed_at': now}})
+    return len(ids)
+
+
+def requeue_stale(db, older_than=300):
+    """Release events claimed by a worker that died mid-batch."""
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than)
+    r = db[WEBHOOK_EVENTS].update_many(
+        {'status': 'processing', 'claimed_at': {'$lt': cutoff}},
+        {'$set': {'status': 'pending'}, '$unset': {'claim': ''}}
+    )
+    return r.modified_count
+
+
+class WebhookWorkerPool:
+    """Background threads draining webhook_events; notify() wakes them after a new event is recorded."""
+
+    def __init__(self, db, workers=2, batch_size=100, poll_interval=1.0, report_cache=None):
+        self.db = db
+        self.report_cache = report_cache
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._requeue_lock = threading.Lock()
+        self._last_requeue = float('-inf')
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name='webhook-worker-%d' % i, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def notify(self):
+        self._wake.set()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout)
+
+    def _requeue_if_due(self):
+        """Run requeue_stale every REQUEUE_INTERVAL seconds (one thread per pool), busy or idle."""
+        with self._requeue_lock:
+            if time.monotonic() - self._last_requeue < REQUEUE_INTERVAL:
+                return
+            self._last_requeue = time.monotonic()
+        released = requeue_stale(self.db)
+        if released:
+            logger.warning("Requeued %d webhook events left in processing", released)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._requeue_if_due()
+                claimed = process_batch(self.db, self.batch_size)
+                if claimed and self.report_cache is not None:
+                    self.report_cache.bump('payments', 'invoices')
+            except Exception:
+                logger.exception("Webhook worker error")
+                claimed = 0
+            if not claimed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+def start_webhook_workers(app):
+    """Start the pool for this process unless WEBHOOK_WORKERS is 0."""
+    workers = app.config.get('WEBHOOK_WORKERS', 2)
+    if workers <= 0:
+        return None
+    pool = WebhookWorkerPool(app.config['MONGO_DB'], workers=workers, report_cache=app.extensions.get('report_cache')).start()
+    app.extensions['webhook_workers'] = pool
+    return pool
@@ -0,0 +1,36 @@
+# backend/app/utils/dates.py
+"""
+Date helpers shared by the API and the derived-data modules. Stored dates may be BSON
+datetimes (midnight), datetime.date values or legacy 'YYYY-MM-DD...' strings.
+"""
+from datetime import date, datetime
+
+
+class DateArgError(ValueError):
+    """Bad start_date/end_date style query argument; handlers answer 400 with the message."""
+
+
+def as_date(v):
+    """datetime.date for a stored date value, or None if it is missing or not a date."""
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    if isinstance(v, str) and v:
+        return datetime.strptime(v[:10], '%Y-%m-%d').date()
+    return None
+
+
+def doc_date(doc, key):
+    return as_date(doc.get(key))
+
+
+def date_arg(args, name):
+    """Optional ?name=YYYY-MM-DD query argument as a date; raises DateArgError if malformed."""
+    v = args.get(name)
+    if not v:
+        return None
+    try:
+        return datetime.strptime(v, '%Y-%m-%d').date()
+    except ValueError:
+        raise DateArgError(f'{name} must be YYYY-MM-DD')
@@ -0,0 +1,129 @@
+# backend/app/utils/http_cache.py
+"""
+Conditional GET and compression for read endpoints that opt in with @cacheable.
+
+The view runs as usual, then the response gets a strong ETag: the one the view set
+itself (e.g. from a data version) or a hash of the JSON body. A request whose
+If-None-Match matches is answered 304 with no body. init_http_cache(app) registers
+an after_request hook that gzip- or brotli-compresses opted-in bodies larger than
+COMPRESS_MIN_SIZE, per Accept-Encoding. brotli is used only when the package is
+installed. Compressed variants carry the ETag with a -gzip/-br suffix, which is
+stripped again when If-None-Match is compared.
+"""
+import hashlib
+import zlib
+from functools import wraps
+from flask import g, request, make_response
+from app.utils.serialization import dumps
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_ENCODING_SUFFIX = {'br': '-br', 'gzip': '-gzip'}
+
+
+def body_etag(data):
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def etag_headers(data):
+    """ETag header for a payload, for views whose body also carries volatile fields (timestamps)."""
+    return {'ETag': '"%s"' % body_etag(dumps(data))}
+
+
+def _base_etag(tag):
+    for suffix in _ENCODING_SUFFIX.values():
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)]
+    return tag
+
+
+def _matching_tag(etag):
+    """The If-None-Match tag (possibly an encoded variant) naming etag, or None."""
+    inm = request.if_none_match
+    if not inm:
+        return None
+    if inm.star_tag:
+        return etag
+    for tag in inm.as_set():
+        if _base_etag(tag) == etag:
+            return tag
+    return None
+
+
+def cacheable(view):
+    """Opt a GET view into ETag / If-None-Match handling and response compression."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        resp = make_response(view(*args, **kwargs))
+        if request.method not in ('GET', 'HEAD') or resp.status_code != 200 or resp.is_streamed:
+            return resp
+        etag, weak = resp.get_etag()
+        if not etag or weak:
+            etag = body_etag(resp.get_data())
+        resp.set_etag(etag)
+        resp.headers['Cache-Control'] = 'private, no-cache'
+        resp.vary.add('Accept-Encoding')
+        matched = _matching_tag(etag)
+        if matched:
+            resp.set_etag(matched)
+            resp.status_code = 304
+            resp.set_data(b'')
+            resp.headers.pop('Content-Type', None)
+            return resp
+        g.compress_response = True
+        return resp
+    return wrapper
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _gzip(data, level):
+    # wbits=31 writes a gzip container with mtime 0, so equal bodies compress identically
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_response(resp, min_size, level):
+    """Encode an opted-in response body per Accept-Encoding when it is at least min_size bytes."""
+    if resp.status_code != 200 or resp.is_streamed or resp.direct_passthrough:
+        return resp
+    if 'Content-Encoding' in resp.headers or resp.content_length is None or resp.content_length < min_size:
+        return resp
+    encoding = _choose_encoding()
+    if encoding is None:
+        return resp
+    data = resp.get_data()
+    if encoding == 'br':
+        body = brotli.compress(data, quality=min(level, 11))
+    else:
+        body = _gzip(data, level)
+    if len(body) >= len(data):
+        return resp
+    resp.set_data(body)
+    resp.headers['Content-Encoding'] = encoding
+    etag, weak = resp.get_etag()
+    if etag:
+        resp.set_etag(etag + _ENCODING_SUFFIX[encoding], weak=weak)
+    return resp
+
+
+def init_http_cache(app):
+    """Register the compression hook; sized by COMPRESS_MIN_SIZE / COMPRESS_LEVEL config."""
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    level = app.config.get('COMPRESS_LEVEL', 6)
+
+    @app.after_request
+    def _compress(resp):
+        if g.get('compress_response'):
+            return compress_response(resp, min_size, level)
+        return resp
@@ -0,0 +1,52 @@
+# backend/app/utils/interval_tree.py
+"""Static augmented interval tree over closed [start, end] intervals."""
+
+
+class IntervalTree:
+    """Built once from (start, end, value) triples; answers stabbing and overlap queries in O(log n + k).
+
+    Intervals are kept sorted by start in a flat list; the implicit balanced BST rooted at the
+    middle element stores, per node, the largest end in its subtree so whole branches can be skipped.
+    """
+
+    def __init__(self, intervals=()):
+        self._items = sorted(intervals, key=lambda i: (i[0], i[1]))
+        self._max_end = [None] * len(self._items)
+        self._build(0, len(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def _build(self, lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        max_end = self._items[mid][1]
+        for child in (self._build(lo, mid), self._build(mid + 1, hi)):
+            if child is not None and child > max_end:
+                max_end = child
+        self._max_end[mid] = max_end
+        return max_end
+
+    def _query(self, lo, hi, start, end, out):
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        if self._max_end[mid] < start:
+            return
+        self._query(lo, mid, start, end, out)
+        s, e, value = self._items[mid]
+        if s <= end:
+            if e >= start:
+                out.append(value)
+            self._query(mid + 1, hi, start, end, out)
+
+    def overlap(self, start, end):
+        """Values of every interval sharing at least one point with [start, end]."""
+        out = []
+        self._query(0, len(self._items), start, end, out)
+        return out
+
+    def stab(self, point):
+        """Values of every interval containing point."""
+        return self.overlap(point, point)
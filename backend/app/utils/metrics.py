@@ -0,0 +1,290 @@
+# backend/app/utils/metrics.py
+"""
+Process-wide counters for GET /metrics (Prometheus text format 0.0.4).
+
+Request path: before_request stamps a start time and bumps the in-flight gauge,
+after_request adds the latency to a fixed-bucket histogram keyed by blueprint and
+route and counts the status; both take one uncontended lock, a few microseconds in
+all. pool_metrics (ConnectionPoolListener) and command_metrics (CommandListener) are
+registered on the MongoClient in init_mongodb and track pool size, checked-out
+connections, checkout waits and commands slower than SLOW_COMMAND_MS. Stats of the
+report cache, single-flight, admission control and payment gateway are read from
+app.extensions when /metrics is scraped.
+"""
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, g, request
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class Histogram:
+    """Non-cumulative bucket counts (the last slot is +Inf) plus sum and count; callers hold the lock."""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(pairs):
+    return ','.join('%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs)
+
+
+def _series(name, labels):
+    return '%s{%s}' % (name, _labels(labels)) if labels else name
+
+
+def _histogram_lines(name, labels, hist):
+    lines = []
+    running = 0
+    for bound, n in zip(hist.buckets + ('+Inf',), hist.counts):
+        running += n
+        le = bound if bound == '+Inf' else repr(float(bound))
+        lines.append('%s %d' % (_series(name + '_bucket', labels + [('le', le)]), running))
+    lines.append('%s %.6f' % (_series(name + '_sum', labels), hist.sum))
+    lines.append('%s %d' % (_series(name + '_count', labels), hist.count))
+    return lines
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.latency = {}
+        self.statuses = {}
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, blueprint, route, method, status, seconds):
+        with self._lock:
+            hist = self.latency.get((blueprint, route))
+            if hist is None:
+                hist = self.latency[(blueprint, route)] = Histogram(LATENCY_BUCKETS)
+            hist.observe(seconds)
+            key = (blueprint, route, method, status)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def ended(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def render(self):
+        with self._lock:
+            lines = [
+                '# HELP http_requests_in_flight Requests currently being handled.',
+                '# TYPE http_requests_in_flight gauge',
+                'http_requests_in_flight %d' % self.in_flight,
+                '# HELP http_request_duration_seconds Request latency by blueprint and route.',
+                '# TYPE http_request_duration_seconds histogram'
+            ]
+            for (blueprint, route), hist in sorted(self.latency.items()):
+                lines.extend(_histogram_lines('http_request_duration_seconds', [('blueprint', blueprint), ('route', route)], hist))
+            lines.append('# HELP http_requests_total Responses by blueprint, route, method and status.')
+            lines.append('# TYPE http_requests_total counter')
+            for (blueprint, route, method, status), n in sorted(self.statuses.items()):
+                labels = [('blueprint', blueprint), ('route', route), ('method', method), ('status', status)]
+                lines.append('http_requests_total{%s} %d' % (_labels(labels), n))
+        return lines
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection counts per server and time spent waiting for a pooled connection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.connections = {}
+        self.checked_out = {}
+        self.checkout_failures = 0
+        self.checkout_wait = Histogram(CHECKOUT_BUCKETS)
+
+    def _add(self, gauge, address, delta):
+        key = '%s:%s' % address
+        with self._lock:
+            gauge[key] = gauge.get(key, 0) + delta
+
+    def pool_created(self, event):
+        self._add(self.connections, event.address, 0)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(self.connections, event.address, 1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(self.connections, event.address, -1)
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, 'started', None)
+        self._local.started = None
+        with self._lock:
+            if started is not None:
+                self.checkout_wait.observe(time.perf_counter() - started)
+        self._add(self.checked_out, event.address, 1)
+
+    def connection_checked_in(self, event):
+        self._add(self.checked_out, event.address, -1)
+
+    def render(self):
+        with self._lock:
+            lines = ['# HELP mongodb_pool_connections Open connections per server.', '# TYPE mongodb_pool_connections gauge']
+            lines += ['mongodb_pool_connections{%s} %d' % (_labels([('address', a)]), n) for a, n in sorted(self.connections.items())]
+            lines += ['# HELP mongodb_pool_checked_out Connections in use per server.', '# TYPE mongodb_pool_checked_out gauge']
+            lines += ['mongodb_pool_checked_out{%s} %d' % (_labels([('address', a)]), n) for a, n in sorted(self.checked_out.items())]
+            lines += ['# HELP mongodb_pool_checkout_failures_total Failed connection checkouts.',
+                      '# TYPE mongodb_pool_checkout_failures_total counter',
+                      'mongodb_pool_checkout_failures_total %d' % self.checkout_failures,
+                      '# HELP mongodb_pool_checkout_wait_seconds Time spent waiting for a pooled connection.',
+                      '# TYPE mongodb_pool_checkout_wait_seconds histogram']
+            lines += _histogram_lines('mongodb_pool_checkout_wait_seconds', [], self.checkout_wait)
+        return lines
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Counts commands, and commands slower than slow_ms, by command name."""
+
+    def __init__(self, slow_ms=100):
+        self.slow_micros = slow_ms * 1000
+        self._lock = threading.Lock()
+        self.commands = {}
+        self.slow = {}
+        self.failed_count = 0
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        name = event.command_name
+        with self._lock:
+            self.commands[name] = self.commands.get(name, 0) + 1
+            if event.duration_micros >= self.slow_micros:
+                self.slow[name] = self.slow.get(name, 0) + 1
+
+    def failed(self, event):
+        with self._lock:
+            self.failed_count += 1
+
+    def render(self):
+        with self._lock:
+            lines = ['# HELP mongodb_commands_total Completed MongoDB commands by name.', '# TYPE mongodb_commands_total counter']
+            lines += ['mongodb_commands_total{%s} %d' % (_labels([('command', c)]), n) for c, n in sorted(self.commands.items())]
+            lines += ['# HELP mongodb_slow_commands_total Commands slower than SLOW_COMMAND_MS by name.',
+                      '# TYPE mongodb_slow_commands_total counter']
+            lines += ['mongodb_slow_commands_total{%s} %d' % (_labels([('command', c)]), n) for c, n in sorted(self.slow.items())]
+            lines += ['# HELP mongodb_failed_commands_total Commands that returned an error.',
+                      '# TYPE mongodb_failed_commands_total counter',
+                      'mongodb_failed_commands_total %d' % self.failed_count]
+        return lines
+
+
+request_metrics = RequestMetrics()
+pool_metrics = PoolMetrics()
+command_metrics = CommandMetrics()
+
+
+def _metric(name, help_text, value, kind='gauge'):
+    return ['# HELP %s %s' % (name, help_text), '# TYPE %s %s' % (name, kind), '%s %s' % (name, value)]
+
+
+def _extension_lines(extensions):
+    lines = []
+    cache = extensions.get('report_cache')
+    if cache is not None:
+        s = cache.stats()
+        lookups = s['hits'] + s['misses']
+        lines += _metric('report_cache_hits_total', 'Report cache hits.', s['hits'], 'counter')
+        lines += _metric('report_cache_misses_total', 'Report cache misses.', s['misses'], 'counter')
+        lines += _metric('report_cache_hit_ratio', 'Report cache hits / lookups since start.', '%.4f' % (s['hits'] / lookups if lookups else 0))
+        if 'bytes' in s:
+            lines += _metric('report_cache_bytes', 'Bytes held by the in-process report cache.', s['bytes'])
+    flight = extensions.get('singleflight')
+    if flight is not None:
+        s = flight.stats()
+        lines += _metric('singleflight_coalesced_total', 'Requests answered from another in-flight computation.', s['coalesced'], 'counter')
+        lines += _metric('singleflight_timeouts_total', 'Waiters that gave up and computed themselves.', s['timeouts'], 'counter')
+    admission = extensions.get('admission')
+    if admission is not None:
+        lines += ['# HELP admission_running Requests running per concurrency class.', '# TYPE admission_running gauge']
+        stats = admission.stats()
+        for name, s in sorted(stats.items()):
+            lines.append('admission_running{%s} %d' % (_labels([('class', name)]), s['running']))
+        lines += ['# HELP admission_rejected_total Requests shed with 503 per class.', '# TYPE admission_rejected_total counter']
+        for name, s in sorted(stats.items()):
+            lines.append('admission_rejected_total{%s} %d' % (_labels([('class', name)]), s['rejected']))
+        lines += ['# HELP admission_queue_wait_seconds Time admitted requests waited for a slot.', '# TYPE admission_queue_wait_seconds histogram']
+        for name, s in sorted(stats.items()):
+            wait = s['wait_seconds']
+            for bound, n in sorted(wait['buckets'].items()):
+                lines.append('admission_queue_wait_seconds_bucket{%s} %d' % (_labels([('class', name), ('le', repr(float(bound)))]), n))
+            lines.append('admission_queue_wait_seconds_bucket{%s} %d' % (_labels([('class', name), ('le', '+Inf')]), wait['count']))
+            lines.append('admission_queue_wait_seconds_sum{%s} %.6f' % (_labels([('class', name)]), wait['sum']))
+            lines.append('admission_queue_wait_seconds_count{%s} %d' % (_labels([('class', name)]), wait['count']))
+    gateway = extensions.get('payment_gateway')
+    if gateway is not None:
+        s = gateway.stats()
+        lines += _metric('payment_gateway_in_flight', 'Payment provider calls running or queued.', s['in_flight'])
+        lines += _metric('payment_gateway_rejected_total', 'Calls refused because the pool was full.', s['rejected'], 'counter')
+        lines += _metric('payment_gateway_timeouts_total', 'Calls that exceeded PAYMENT_GATEWAY_TIMEOUT.', s['timeouts'], 'counter')
+    return lines
+
+
+def render_metrics(app):
+    lines = request_metrics.render() + pool_metrics.render() + command_metrics.render() + _extension_lines(app.extensions)
+    return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app):
+    """Time every request and serve GET /metrics; SLOW_COMMAND_MS sets the slow-command threshold."""
+    command_metrics.slow_micros = app.config.get('SLOW_COMMAND_MS', 100) * 1000
+
+    @app.before_request
+    def _metrics_start():
+        g.metrics_start = time.perf_counter()
+        request_metrics.started()
+
+    @app.after_request
+    def _metrics_finish(resp):
+        start = g.get('metrics_start')
+        if start is not None:
+            rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            request_metrics.finished(request.blueprint or 'app', rule, request.method, resp.status_code, time.perf_counter() - start)
+        return resp
+
+    @app.teardown_request
+    def _metrics_end(exc):
+        if g.pop('metrics_start', None) is not None:
+            request_metrics.ended()
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(render_metrics(app), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,108 @@
+# backend/app/utils/pagination.py
+"""
+Keyset pagination and field projection shared by the list endpoints.
+
+Pages are ordered by (sort key, _id) and the opaque ?cursor= carries the last row's
+pair, so page N costs the same index seek as page 1. ?limit= defaults to
+Constants.DEFAULT_PAGE_SIZE and is capped at MAX_PAGE_SIZE; ?fields=a,b is pushed down
+into the MongoDB projection. The cursor for the next page is returned in the
+X-Next-Cursor response header (absent on the last page).
+"""
+import base64
+import json
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING
+from utils.constants import Constants
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+class PaginationError(ValueError):
+    """Bad limit/cursor/fields argument; handlers answer 400 with the message."""
+
+
+def int_arg(args, name, default):
+    """Integer query argument; raises PaginationError if it is not one."""
+    try:
+        return int(args.get(name, default))
+    except (TypeError, ValueError):
+        raise PaginationError(f'{name} must be an integer')
+
+
+def page_limit(args):
+    return min(max(int_arg(args, 'limit', Constants.DEFAULT_PAGE_SIZE), 1), Constants.MAX_PAGE_SIZE)
+
+
+def encode_cursor(value, _id):
+    if isinstance(value, datetime):
+        tagged = ['d', value.isoformat()]
+    elif value is None:
+        tagged = ['z', None]
+    elif isinstance(value, (int, float)):
+        tagged = ['n', value]
+    else:
+        tagged = ['s', str(value)]
+    raw = json.dumps(tagged + [str(_id)], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        tag, value, _id = json.loads(raw)
+        if tag == 'd':
+            value = datetime.fromisoformat(value)
+        return value, ObjectId(_id)
+    except (ValueError, TypeError, InvalidId):
+        raise PaginationError('Invalid cursor')
+
+
+def field_projection(args, allowed, required=()):
+    """MongoDB projection for ?fields=a,b restricted to allowed; None when no fields were asked for."""
+    raw = args.get('fields')
+    if not raw:
+        return None
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise PaginationError('Unknown field(s): ' + ', '.join(unknown))
+    return {f: 1 for f in list(fields) + list(required)}
+
+
+def _after(sort_key, value, _id, direction):
+    """Filter for rows strictly after (value, _id) in the given order; nulls sort lowest."""
+    if direction == DESCENDING:
+        if value is None:
+            return {sort_key: None, '_id': {'$lt': _id}}
+        return {'$or': [
+            {sort_key: {'$lt': value}},
+            {sort_key: value, '_id': {'$lt': _id}},
+            {sort_key: None}
+        ]}
+    if value is None:
+        return {'$or': [{sort_key: {'$ne': None}}, {sort_key: None, '_id': {'$gt': _id}}]}
+    return {'$or': [{sort_key: {'$gt': value}}, {sort_key: value, '_id': {'$gt': _id}}]}
+
+
+def paginate(collection, query, sort_key, args, direction=DESCENDING, allowed_fields=(), required_fields=()):
+    """One page of collection.find(query) ordered by (sort_key, _id); returns (docs, next_cursor)."""
+    limit = page_limit(args)
+    q = query
+    if args.get('cursor'):
+        value, last_id = decode_cursor(args['cursor'])
+        after = _after(sort_key, value, last_id, direction)
+        q = {'$and': [query, after]} if query else after
+    projection = field_projection(args, allowed_fields, (sort_key,) + tuple(required_fields))
+    docs = list(collection.find(q, projection).sort([(sort_key, direction), ('_id', direction)]).limit(limit + 1))
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1].get(sort_key), docs[-1]['_id'])
+    return docs, next_cursor
+
+
+def cursor_headers(next_cursor):
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+
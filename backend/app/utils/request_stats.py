@@ -0,0 +1,151 @@
+# backend/app/utils/request_stats.py
+"""
+Per-request MongoDB command counting. query_counter is registered as a pymongo
+CommandListener in init_mongodb and adds every command's duration to the stats of
+the request running on the same thread (pymongo publishes events synchronously).
+init_request_stats(app) opens and closes the stats around each request, adds a
+Server-Timing header (db;dur, db-count, serialize;dur) and logs a warning when a
+request runs more than QUERY_COUNT_WARN commands.
+
+max_queries(n) is the test helper:
+    with max_queries(3):
+        client.get('/api/invoices/', headers=auth)
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from flask import request
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class RequestStats:
+    __slots__ = ('count', 'micros', 'collections', 'serialize_seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.micros = 0
+        self.collections = {}
+        self.serialize_seconds = 0.0
+
+    def add(self, collection, micros):
+        self.count += 1
+        self.micros += micros
+        entry = self.collections.get(collection)
+        if entry is None:
+            self.collections[collection] = [1, micros]
+        else:
+            entry[0] += 1
+            entry[1] += micros
+
+    def summary(self):
+        """'transactions=12 (3.4ms), invoices=1 (0.2ms)', busiest collection first."""
+        parts = sorted(self.collections.items(), key=lambda kv: -kv[1][0])
+        return ', '.join('%s=%d (%.1fms)' % (name, n, us / 1000.0) for name, (n, us) in parts)
+
+
+def _targets():
+    targets = list(getattr(_local, 'captures', ()))
+    stats = getattr(_local, 'request', None)
+    if stats is not None:
+        targets.append(stats)
+    return targets
+
+
+def _collection(event):
+    value = event.command.get(event.command_name)
+    if event.command_name == 'getMore':
+        value = event.command.get('collection')
+    return value if isinstance(value, str) else event.database_name
+
+
+class QueryCounter(monitoring.CommandListener):
+    """Attributes each command (count, duration, collection) to the current request's stats."""
+
+    def started(self, event):
+        if getattr(_local, 'request', None) is None and not getattr(_local, 'captures', None):
+            return
+        pending = getattr(_local, 'pending', None)
+        if pending is None:
+            pending = _local.pending = {}
+        pending[event.request_id] = _collection(event)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        pending = getattr(_local, 'pending', None)
+        if not pending:
+            return
+        collection = pending.pop(event.request_id, None)
+        if collection is None:
+            return
+        for stats in _targets():
+            stats.add(collection, event.duration_micros)
+
+
+query_counter = QueryCounter()
+
+
+def current():
+    """RequestStats of the request on this thread, or None outside a request."""
+    return getattr(_local, 'request', None)
+
+
+def record_serialize(seconds):
+    stats = getattr(_local, 'request', None)
+    if stats is not None:
+        stats.serialize_seconds += seconds
+
+
+@contextmanager
+def max_queries(limit):
+    """Fail with AssertionError if the block runs more than limit MongoDB commands on this thread."""
+    stats = RequestStats()
+    captures = getattr(_local, 'captures', None)
+    if captures is None:
+        captures = _local.captures = []
+    captures.append(stats)
+    try:
+        yield stats
+    finally:
+        captures.remove(stats)
+    if stats.count > limit:
+        raise AssertionError('expected at most %d MongoDB commands, ran %d: %s' % (limit, stats.count, stats.summary()))
+
+
+def server_timing(stats):
+    return 'db;dur=%.2f, db-count;desc="%d", serialize;dur=%.2f' % (
+        stats.micros / 1000.0, stats.count, stats.serialize_seconds * 1000.0)
+
+
+def init_request_stats(app):
+    """Collect per-request command stats; QUERY_COUNT_WARN sets the warning threshold (0 disables it)."""
+    warn_at = app.config.get('QUERY_COUNT_WARN', 25)
+
+    @app.before_request
+    def _start_stats():
+        _local.request = RequestStats()
+        _local.pending = {}
+
+    @app.after_request
+    def _report_stats(resp):
+        stats = getattr(_local, 'request', None)
+        if stats is None:
+            return resp
+        resp.headers['Server-Timing'] = server_timing(stats)
+        if warn_at and stats.count > warn_at:
+            logger.warning("%s %s ran %d MongoDB commands in %.1fms: %s",
+                           request.method, request.path, stats.count, stats.micros / 1000.0, stats.summary())
+        return resp
+
+    @app.teardown_request
+    def _end_stats(exc):
+        _local.request = None
+        _local.pending = None
@@ -0,0 +1,65 @@
+# backend/app/utils/serialization.py
+"""
+The one JSON encoder for API responses. ObjectId, date and datetime are encoded while
+the payload is written (no sanitizing copy beforehand). orjson is used when it is
+installed, otherwise the stdlib json module with the same output conventions.
+"""
+import json
+from datetime import date, datetime
+from bson import ObjectId
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from flask.json.provider import DefaultJSONProvider
+except ImportError:  # Flask < 2.2
+    DefaultJSONProvider = None
+
+
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj):
+        """Serialize obj to UTF-8 JSON bytes."""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(obj):
+        """Serialize obj to UTF-8 JSON bytes."""
+        return json.dumps(obj, default=_default, separators=(',', ':')).encode()
+
+
+def dumps_str(obj):
+    return dumps(obj).decode()
+
+
+class _StdlibEncoder(json.JSONEncoder):
+    def default(self, o):
+        return _default(o)
+
+
+if DefaultJSONProvider is not None:
+    class FastJSONProvider(DefaultJSONProvider):
+        """Routes flask.jsonify (error handlers, leftovers) through dumps()."""
+
+        def dumps(self, obj, **kwargs):
+            return dumps_str(obj)
+else:
+    FastJSONProvider = None
+
+
+def install_json_provider(app):
+    if FastJSONProvider is not None:
+        app.json = FastJSONProvider(app)
+    else:
+        app.json_encoder = _StdlibEncoder
@@ -0,0 +1,67 @@
+# backend/app/utils/streaming.py
+"""
+Streaming CSV / NDJSON exports. Rows are pulled from a MongoDB cursor (opened with
+EXPORT_BATCH_SIZE) and written through a generator Response in small chunks, so
+memory stays flat however many rows the export has.
+"""
+import csv
+import io
+from datetime import date, datetime
+from flask import Response, stream_with_context
+from app.utils.serialization import dumps_str
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_BATCH_SIZE = 1000
+_FLUSH_ROWS = 500
+
+
+class ExportFormatError(ValueError):
+    """Unsupported ?format= value; handlers answer 400 with the message."""
+
+
+def export_format(args):
+    """'csv' or 'ndjson' when ?format= asks for a streamed export, None for the regular JSON body."""
+    fmt = (args.get('format') or '').lower()
+    if fmt in ('', 'json'):
+        return None
+    if fmt not in EXPORT_FORMATS:
+        raise ExportFormatError("format must be 'json', 'csv' or 'ndjson'")
+    return fmt
+
+
+def _csv_value(v):
+    if v is None:
+        return ''
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    if isinstance(v, (dict, list)):
+        return dumps_str(v)
+    return v
+
+
+def stream_rows(rows, fmt, columns, filename):
+    """Response streaming dict rows as CSV (columns in order, header first) or NDJSON."""
+    def generate():
+        buf = io.StringIO()
+        writer = csv.writer(buf) if fmt == 'csv' else None
+        if writer:
+            writer.writerow(columns)
+        n = 0
+        for row in rows:
+            if writer:
+                writer.writerow([_csv_value(row.get(c)) for c in columns])
+            else:
+                buf.write(dumps_str(row))
+                buf.write('\n')
+            n += 1
+            if n % _FLUSH_ROWS == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        if buf.tell():
+            yield buf.getvalue()
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    resp = Response(stream_with_context(generate()), mimetype=mimetype)
+    resp.headers['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return resp
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Time GET endpoints against the configured MongoDB.
+
+Usage:
+  python scripts/bench_endpoints.py /api/reports/dashboard-stats /api/budgets/ -n 50
+"""
+
+import sys
+import os
+import argparse
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def run_bench(paths, iterations):
+    from app.main import create_app
+
+    app = create_app()
+    client = app.test_client()
+    login = client.post('/api/auth/demo')
+    if login.status_code != 200:
+        print("Demo login failed:", login.get_json())
+        sys.exit(1)
+    headers = {'Authorization': 'Bearer ' + login.get_json()['access_token']}
+
+    print("%-40s %8s %8s %8s %10s" % ('endpoint', 'p50 ms', 'p95 ms', 'max ms', 'bytes'))
+    for path in paths:
+        client.get(path, headers=headers)  # warm-up
+        samples = []
+        size = 0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            r = client.get(path, headers=headers)
+            samples.append((time.perf_counter() - start) * 1000)
+            size = len(r.get_data())
+        print("%-40s %8.1f %8.1f %8.1f %10d" % (path, _percentile(samples, 50), _percentile(samples, 95), max(samples), size))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('-n', '--iterations', type=int, default=20)
+    args = parser.parse_args()
+    run_bench(args.paths, args.iterations)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Compare the old sanitize-then-encode JSON path with app.utils.serialization on transaction-like rows.
+
+Usage:
+  python scripts/bench_serialization.py -n 50000 --repeat 5
+"""
+
+import sys
+import os
+import argparse
+import json
+import time
+from datetime import datetime, date, timedelta
+
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_rows(n):
+    base = datetime(2024, 1, 1)
+    rows = []
+    for i in range(n):
+        rows.append({
+            '_id': ObjectId(),
+            'transaction_type': 'expense' if i % 3 else 'income',
+            'amount': round(100 + i * 0.37, 2),
+            'description': 'Row %d' % i,
+            'cost_center_id': ObjectId(),
+            'product_id': ObjectId() if i % 2 else None,
+            'transaction_date': base + timedelta(days=i % 365),
+            'created_by': ObjectId(),
+            'created_at': base + timedelta(minutes=i),
+            'tags': ['bench', date(2024, 1, 1 + i % 28)]
+        })
+    return rows
+
+
+def _legacy_serialize_dates(d):
+    for k, v in list(d.items()):
+        if isinstance(v, (datetime, date)):
+            d[k] = v.isoformat()
+        elif isinstance(v, dict):
+            _legacy_serialize_dates(v)
+        elif isinstance(v, list):
+            for i, item in enumerate(v):
+                if isinstance(item, (datetime, date)):
+                    v[i] = item.isoformat()
+                elif isinstance(item, dict):
+                    _legacy_serialize_dates(item)
+    return d
+
+
+def _legacy_sanitize(obj):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, dict):
+        return {k: _legacy_sanitize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_legacy_sanitize(v) for v in obj]
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    return obj
+
+
+def _legacy_default(o):
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if isinstance(o, ObjectId):
+        return str(o)
+    raise TypeError(type(o).__name__)
+
+
+def _to_dict(doc):
+    d = dict(doc)
+    d['id'] = str(d.pop('_id'))
+    return d
+
+
+def legacy(rows):
+    """to_dict + _serialize_dates, then the jsonify sanitize copy, then json.dumps with a default hook."""
+    out = [_legacy_serialize_dates(_to_dict(r)) for r in rows]
+    return json.dumps(_legacy_sanitize(out), default=_legacy_default).encode()
+
+
+def stdlib_single_pass(rows):
+    from app.utils import serialization
+    out = [_to_dict(r) for r in rows]
+    return json.dumps(out, default=serialization._default, separators=(',', ':')).encode()
+
+
+def current(rows):
+    from app.utils.serialization import dumps
+    return dumps([_to_dict(r) for r in rows])
+
+
+def time_it(fn, rows, repeat):
+    best = None
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(fn(rows))
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', type=int, default=50000, help='rows to encode')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from app.utils import serialization
+    rows = make_rows(args.n)
+    cases = [('legacy (sanitize x3)', legacy), ('single pass, stdlib', stdlib_single_pass)]
+    if serialization.orjson is not None:
+        cases.append(('single pass, orjson', current))
+    else:
+        print("orjson not installed; dumps() uses the stdlib encoder")
+
+    print("%-24s %10s %12s" % ('path', 'best ms', 'bytes'))
+    baseline = None
+    for name, fn in cases:
+        ms, size = time_it(fn, rows, args.repeat)
+        baseline = baseline or ms
+        print("%-24s %10.1f %12d  (%.1fx)" % (name, ms, size, baseline / ms))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Stripe API's PaymentIntent endpoint, with configurable latency.
+
+Usage:
+  python scripts/fake_stripe.py --port 12111 --delay 0.5
+  STRIPE_API_BASE=http://localhost:12111 python run.py
+"""
+
+import sys
+import argparse
+import json
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+def make_handler(delay):
+    intents_by_key = {}
+
+    class FakeStripeHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            form = parse_qs(self.rfile.read(length).decode())
+            if self.path.rstrip('/') != '/v1/payment_intents':
+                return self._reply(404, {'error': {'type': 'invalid_request_error', 'message': 'Unrecognized request URL'}})
+            key = self.headers.get('Idempotency-Key')
+            if key and key in intents_by_key:
+                return self._reply(200, intents_by_key[key])
+            time.sleep(delay)
+            intent_id = 'pi_fake_' + uuid.uuid4().hex[:24]
+            metadata = {k[len('metadata['):-1]: v[0] for k, v in form.items() if k.startswith('metadata[')}
+            intent = {
+                'id': intent_id,
+                'object': 'payment_intent',
+                'amount': int(form.get('amount', ['0'])[0]),
+                'currency': form.get('currency', ['usd'])[0],
+                'description': form.get('description', [None])[0],
+                'metadata': metadata,
+                'status': 'requires_payment_method',
+                'client_secret': intent_id + '_secret_' + uuid.uuid4().hex[:12]
+            }
+            if key:
+                intents_by_key[key] = intent
+            self._reply(200, intent)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return FakeStripeHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=12111)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds to wait before answering')
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(args.delay))
+    print("Fake Stripe API on http://127.0.0.1:%d (delay %.2fs)" % (args.port, args.delay))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
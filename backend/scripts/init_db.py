@@ -13,6 +13,7 @@ from bson import ObjectId
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database.connection import init_mongodb
+from app.database.versions import bump_version
 from app.database.models import (
     User, Contact, Product, AnalyticalAccount, 
     AutoAnalyticalModel, Budget, Transaction, Invoice, Payment,
@@ -263,6 +264,7 @@ def seed_sample_data(db):
         budget['remaining_amount'] = budget['allocated_amount'] - budget['actual_amount']
         result = db.budgets.insert_one(budget)
         budget_ids.append(str(result.inserted_id))
+    bump_version(db, 'budgets')
     
     print(f"Created {len(budget_ids)} budgets")
     
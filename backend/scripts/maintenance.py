@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Rebuild and verify derived data (transaction rollups, budget spend and invoice paid counters).
+
+Usage:
+  python scripts/maintenance.py rollups rebuild
+  python scripts/maintenance.py rollups verify [--fix]
+  python scripts/maintenance.py budgets reconcile [--fix]
+  python scripts/maintenance.py invoices reconcile [--fix]
+"""
+
+import sys
+import os
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def rollups(db, action, fix=False):
+    from app.database.rollups import rebuild_rollups, verify_rollups, repair_rollups
+
+    if action == 'rebuild':
+        rows = rebuild_rollups(db)
+        if rows is None:
+            print("transaction_rollups: another process is rebuilding; try again later")
+            return 1
+        print("Rebuilt transaction_rollups: %d rows" % rows)
+        return 0
+    mismatches = verify_rollups(db)
+    for m in mismatches[:50]:
+        print("  %s stored=%s expected=%s" % (m['key'], m['stored'], m['expected']))
+    print("transaction_rollups: %s" % ("OK" if not mismatches else "%d mismatched rows" % len(mismatches)))
+    if mismatches and fix:
+        print("transaction_rollups: repaired %d rows" % repair_rollups(db))
+        return 0 if not verify_rollups(db) else 1
+    return 1 if mismatches else 0
+
+
+def budgets(db, action, fix=False):
+    from app.database.budget_spend import reconcile_budget_spend
+
+    drift = reconcile_budget_spend(db, fix=fix)
+    for d in drift[:50]:
+        print("  budget %s stored=%s expected=%s" % (d['budget_id'], d['stored'], d['expected']))
+    if not drift:
+        print("budgets.actual_spent: OK")
+        return 0
+    print("budgets.actual_spent: %d drifted%s" % (len(drift), " (fixed)" if fix else ""))
+    return 0 if fix else 1
+
+
+def invoices(db, action, fix=False):
+    from app.database.invoice_payments import reconcile_invoice_paid
+
+    drift = reconcile_invoice_paid(db, fix=fix)
+    for d in drift[:50]:
+        print("  invoice %s stored=%s expected=%s" % (d['invoice_id'], d['stored'], d['expected']))
+    if not drift:
+        print("invoices.paid_amount: OK")
+        return 0
+    print("invoices.paid_amount: %d drifted%s" % (len(drift), " (fixed)" if fix else ""))
+    return 0 if fix else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest='target', required=True)
+    p = sub.add_parser('rollups', help='transaction_rollups collection')
+    p.add_argument('action', choices=['rebuild', 'verify'])
+    p.add_argument('--fix', action='store_true', help='with verify: repair mismatched rows in place')
+    p = sub.add_parser('budgets', help='actual_spent counters on budgets')
+    p.add_argument('action', choices=['reconcile'])
+    p.add_argument('--fix', action='store_true', help='overwrite drifted counters with the recount')
+    p = sub.add_parser('invoices', help='paid_amount counters on invoices')
+    p.add_argument('action', choices=['reconcile'])
+    p.add_argument('--fix', action='store_true', help='overwrite drifted counters with the recount')
+    args = parser.parse_args()
+
+    from app.main import create_app
+    from app.database.connection import get_db
+
+    app = create_app()
+    with app.app_context():
+        db = get_db()
+        if args.target == 'rollups':
+            return rollups(db, args.action, fix=args.fix)
+        if args.target == 'budgets':
+            return budgets(db, args.action, fix=args.fix)
+        if args.target == 'invoices':
+            return invoices(db, args.action, fix=args.fix)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,6 +13,7 @@ from app.database.models import user_set_password
 def run_seed():
     from app.main import create_app
     from app.database.connection import get_db
+    from app.database.versions import bump_version
 
     app = create_app()
     with app.app_context():
@@ -34,6 +35,7 @@ def run_seed():
                     'created_at': datetime.utcnow()
                 })
                 print(f"  Created cost center: {c['name']} ({c['code']})")
+        bump_version(db, 'cost_centers')
 
         if not db.master_budget.find_one({}):
             db.master_budget.insert_one({'amount': 1500000, 'updated_at': datetime.utcnow()})
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Send payment_intent.succeeded events to a running backend, as Stripe would (including redeliveries).
+
+Usage:
+  python scripts/send_webhooks.py <invoice_id> -n 200 --amount 10 --redeliver 2 --concurrency 16
+  python scripts/send_webhooks.py <invoice_id> --url http://localhost:5000/api/payments/stripe-webhook
+"""
+
+import sys
+import argparse
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import Request, urlopen
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def make_event(invoice_id, amount):
+    intent_id = 'pi_local_' + uuid.uuid4().hex[:24]
+    return {
+        'id': 'evt_local_' + uuid.uuid4().hex[:24],
+        'type': 'payment_intent.succeeded',
+        'data': {'object': {
+            'id': intent_id,
+            'object': 'payment_intent',
+            'amount': int(round(amount * 100)),
+            'currency': 'usd',
+            'metadata': {'invoice_id': invoice_id}
+        }}
+    }
+
+
+def send(url, event):
+    body = json.dumps(event).encode()
+    req = Request(url, data=body, headers={'Content-Type': 'application/json', 'Stripe-Signature': 'local'})
+    start = time.perf_counter()
+    with urlopen(req, timeout=30) as resp:
+        result = json.loads(resp.read().decode() or '{}')
+    return (time.perf_counter() - start) * 1000, result.get('duplicate', False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('invoice_id')
+    parser.add_argument('-n', type=int, default=100, help='distinct payment intents to send')
+    parser.add_argument('--amount', type=float, default=1.0, help='amount per payment')
+    parser.add_argument('--redeliver', type=int, default=1, help='extra deliveries of every event')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--url', default='http://localhost:5000/api/payments/stripe-webhook')
+    args = parser.parse_args()
+
+    events = [make_event(args.invoice_id, args.amount) for _ in range(args.n)]
+    deliveries = events * (1 + args.redeliver)
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda e: send(args.url, e), deliveries))
+
+    samples = [ms for ms, _ in results]
+    duplicates = sum(1 for _, dup in results if dup)
+    print("deliveries=%d duplicates=%d expected paid=%.2f" % (len(results), duplicates, args.n * args.amount))
+    print("ack latency ms: p50=%.1f p95=%.1f max=%.1f" % (_percentile(samples, 50), _percentile(samples, 95), max(samples)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
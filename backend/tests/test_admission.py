@@ -0,0 +1,52 @@
+# backend/tests/test_admission.py
+from flask import Flask, Response
+from app.services.admission import admit, init_admission
+from app.utils.json_response import json_response
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config.update(ADMISSION_REPORT_LIMIT=1, ADMISSION_REPORT_QUEUE=0, ADMISSION_CRUD_LIMIT=0)
+    controller = init_admission(app)
+    app.seen_running = []
+
+    @app.route('/export')
+    @admit('report')
+    def export():
+        def rows():
+            for i in range(3):
+                app.seen_running.append(controller.stats()['report']['running'])
+                yield '%d\n' % i
+        return Response(rows(), mimetype='text/csv')
+
+    @app.route('/report')
+    @admit('report')
+    def report():
+        return json_response({'ok': True}, 200)
+
+    return app, controller
+
+
+def running(controller):
+    return controller.stats()['report']['running']
+
+
+def test_streamed_export_holds_its_slot_until_the_body_is_closed():
+    app, controller = make_app()
+    client = app.test_client()
+    resp = client.get('/export')
+    assert resp.status_code == 200
+    assert running(controller) == 1
+    assert client.get('/report').status_code == 503
+    assert resp.get_data() == b'0\n1\n2\n'
+    assert app.seen_running == [1, 1, 1]
+    resp.close()
+    assert running(controller) == 0
+    assert client.get('/report').status_code == 200
+
+
+def test_regular_response_releases_its_slot_on_return():
+    app, controller = make_app()
+    client = app.test_client()
+    assert client.get('/report').status_code == 200
+    assert running(controller) == 0
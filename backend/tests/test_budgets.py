@@ -0,0 +1,85 @@
+# backend/tests/test_budgets.py
+import pytest
+
+
+@pytest.fixture
+def cost_center(mongo_app):
+    db = mongo_app.config['MONGO_DB']
+    return str(db.cost_centers.insert_one({'name': 'Production', 'code': 'PROD'}).inserted_id)
+
+
+def create_budget(client, headers, cc, start, end, amount=1000):
+    return client.post('/api/budgets/', headers=headers, json={
+        'cost_center_id': cc, 'amount': amount, 'period_start': start, 'period_end': end})
+
+
+def test_overlapping_budgets_are_accepted_and_reported(mongo_app, auth_headers, cost_center):
+    client, headers = mongo_app.test_client(), auth_headers()
+    annual = create_budget(client, headers, cost_center, '2024-01-01', '2024-12-31', 12000)
+    assert annual.status_code == 201
+    assert annual.get_json()['overlapping_budget_ids'] == []
+    monthly = create_budget(client, headers, cost_center, '2024-03-01', '2024-03-31')
+    assert monthly.status_code == 201
+    assert monthly.get_json()['overlapping_budget_ids'] == [annual.get_json()['budget']['id']]
+
+    r = client.put('/api/budgets/%s' % monthly.get_json()['budget']['id'], headers=headers,
+                   json={'period_end': '2024-04-30'})
+    assert r.status_code == 200
+    assert r.get_json()['overlapping_budget_ids'] == [annual.get_json()['budget']['id']]
+
+
+def test_period_start_after_end_is_rejected(mongo_app, auth_headers, cost_center):
+    r = create_budget(mongo_app.test_client(), auth_headers(), cost_center, '2024-05-01', '2024-04-01')
+    assert r.status_code == 400
+    assert r.get_json()['error'] == 'period_start must be on or before period_end'
+
+
+def budget_spent(db, budget_id):
+    from bson import ObjectId
+    return db.budgets.find_one({'_id': ObjectId(budget_id)})['actual_spent']
+
+
+def test_transactions_count_against_budgets_this_worker_has_not_indexed(mongo_app, auth_headers, cost_center):
+    from datetime import datetime
+    from app.database.budget_index import budget_index
+
+    db, client, headers = mongo_app.config['MONGO_DB'], mongo_app.test_client(), auth_headers()
+    budget_index.sync(db)
+    # written by "another worker": no version bump reaches this process's index
+    bid = str(db.budgets.insert_one({'cost_center_id': db.cost_centers.find_one()['_id'], 'amount': 1000.0,
+                                     'period_start': datetime(2024, 1, 1), 'period_end': datetime(2024, 12, 31),
+                                     'actual_spent': 0}).inserted_id)
+    tx = {'type': 'purchase', 'amount': 40, 'cost_center_id': cost_center, 'transaction_date': '2024-03-05'}
+    assert client.post('/api/transactions/', headers=headers, json=tx).status_code == 201
+    body = '\n'.join('{"type": "purchase", "amount": %d, "cost_center_id": "%s", "transaction_date": "%s"}' % (a, cost_center, d)
+                     for a, d in [(10, '2024-03-05'), (5, '2024-06-30'), (7, '2025-01-01')])
+    r = client.post('/api/transactions/import?format=ndjson', headers=headers, data=body.encode())
+    assert r.get_json()['inserted'] == 3
+    assert budget_spent(db, bid) == 55
+
+
+def test_recount_does_not_overwrite_a_concurrent_increment(mongo_app, auth_headers, cost_center, monkeypatch):
+    from app.database import budget_spend
+
+    db, client, headers = mongo_app.config['MONGO_DB'], mongo_app.test_client(), auth_headers()
+    tx = {'type': 'purchase', 'amount': 40, 'cost_center_id': cost_center, 'transaction_date': '2024-03-05'}
+    client.post('/api/transactions/', headers=headers, json=tx)
+    bid = create_budget(client, headers, cost_center, '2024-01-01', '2024-12-31').get_json()['budget']['id']
+    assert budget_spent(db, bid) == 40
+
+    compute = budget_spend.compute_budgets_spent
+    calls = []
+
+    def racing_compute(db_, docs):
+        result = compute(db_, docs)
+        if not calls:
+            # another request's transaction lands between the recount's read and its $set
+            client.post('/api/transactions/', headers=headers, json=dict(tx, amount=2))
+        calls.append(1)
+        return result
+
+    monkeypatch.setattr(budget_spend, 'compute_budgets_spent', racing_compute)
+    r = client.put('/api/budgets/%s' % bid, headers=headers, json={'period_start': '2024-02-01'})
+    assert r.status_code == 200
+    assert len(calls) == 2
+    assert budget_spent(db, bid) == 42
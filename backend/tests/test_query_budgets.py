@@ -0,0 +1,70 @@
+# backend/tests/test_query_budgets.py
+"""
+MongoDB command budgets for the list and report endpoints. Each endpoint is called
+over enough rows that a per-row lookup would blow the budget many times over.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from app.database.versions import bump_version
+from app.utils.request_stats import max_queries
+
+ROWS = 60
+
+
+@pytest.fixture
+def seeded(mongo_app):
+    db = mongo_app.config['MONGO_DB']
+    ccs = [db.cost_centers.insert_one({'name': 'CC%d' % i, 'code': 'C%d' % i}).inserted_id for i in range(3)]
+    customers = [db.users.insert_one({'email': 'c%d@example.com' % i, 'role': 'customer'}).inserted_id for i in range(ROWS)]
+    start = datetime(2024, 1, 1)
+    db.transactions.insert_many([{
+        'type': 'purchase' if i % 2 else 'sale', 'amount': float(i + 1), 'status': 'paid',
+        'cost_center_id': ccs[i % 3], 'product_id': None, 'quantity': 1, 'description': 'row %d' % i,
+        'transaction_date': start + timedelta(days=i), 'created_at': start
+    } for i in range(ROWS)])
+    db.budgets.insert_many([{
+        'cost_center_id': ccs[i % 3], 'amount': 100.0, 'actual_spent': float(50 + i),
+        'period_start': start + timedelta(days=i), 'period_end': start + timedelta(days=i + 30), 'created_at': start
+    } for i in range(ROWS)])
+    db.invoices.insert_many([{
+        'invoice_number': 'INV-20240101-%04d' % i, 'customer_id': customers[i], 'amount': 100.0, 'paid_amount': 0.0,
+        'status': 'unpaid', 'due_date': start + timedelta(days=i), 'created_at': start + timedelta(minutes=i)
+    } for i in range(ROWS)])
+    db.payments.insert_one({'invoice_id': ObjectId(), 'amount': 1.0, 'payment_method': 'cash', 'payment_date': start})
+    bump_version(db, 'cost_centers')
+    return mongo_app
+
+
+def get_within(app, headers, url, limit):
+    client = app.test_client()
+    with max_queries(limit) as stats:
+        r = client.get(url, headers=headers)
+        body = r.get_data()
+    assert r.status_code == 200, body
+    assert stats.count > 0
+    return r
+
+
+def test_dashboard_stats(seeded, auth_headers):
+    seeded.extensions['report_cache'] = None
+    r = get_within(seeded, auth_headers(), '/api/reports/dashboard-stats', 8)
+    assert r.get_json()['summary']['total_budgets'] == ROWS
+
+
+def test_budgets_list(seeded, auth_headers):
+    r = get_within(seeded, auth_headers(), '/api/budgets/?limit=100', 4)
+    assert len(r.get_json()) == ROWS
+    assert all(b['cost_center_name'] for b in r.get_json())
+
+
+def test_invoices_list(seeded, auth_headers):
+    r = get_within(seeded, auth_headers(), '/api/invoices/?limit=100', 3)
+    assert len(r.get_json()) == ROWS
+    assert all(inv['customer_email'] for inv in r.get_json())
+
+
+def test_transaction_export(seeded, auth_headers):
+    r = get_within(seeded, auth_headers(), '/api/transactions/?format=ndjson', 4)
+    assert len(r.get_data().splitlines()) == ROWS
@@ -0,0 +1,137 @@
+# backend/tests/test_report_cache.py
+import fakeredis
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required
+from app.services.report_cache import MemoryBackend, RedisBackend, ReportCache, bump_versions, cached_report, init_report_cache
+from app.utils.json_response import json_response
+
+
+def make_app(client=None):
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'report-cache-test-secret-key-0123456789'
+    app.config['JWT_VERIFY_SUB'] = False
+    JWTManager(app)
+    init_report_cache(app, client=client)
+    app.computed = 0
+
+    @app.route('/report')
+    @jwt_required()
+    @cached_report('transactions')
+    def report():
+        app.computed += 1
+        return json_response({'computed': app.computed}, 200)
+
+    @app.route('/transactions', methods=['POST'])
+    @jwt_required()
+    def create_transaction():
+        bump_versions('transactions')
+        return json_response({'ok': True}, 201)
+
+    @app.route('/budgets', methods=['POST'])
+    @jwt_required()
+    def create_budget():
+        bump_versions('budgets')
+        return json_response({'ok': True}, 201)
+
+    return app
+
+
+def auth(app, role='admin'):
+    with app.app_context():
+        token = create_access_token(identity={'id': 'u1', 'email': 'a@b.c', 'role': role})
+    return {'Authorization': 'Bearer ' + token}
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def app(request):
+    return make_app(fakeredis.FakeRedis() if request.param == 'redis' else None)
+
+
+def test_second_request_is_a_hit(app):
+    client, headers = app.test_client(), auth(app)
+    first = client.get('/report', headers=headers)
+    second = client.get('/report', headers=headers)
+    assert first.get_json() == second.get_json() == {'computed': 1}
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert app.extensions['report_cache'].stats()['hits'] == 1
+
+
+def test_write_handler_bump_invalidates(app):
+    client, headers = app.test_client(), auth(app)
+    client.get('/report', headers=headers)
+    assert client.post('/transactions', headers=headers).status_code == 201
+    assert client.get('/report', headers=headers).get_json() == {'computed': 2}
+    assert client.get('/report', headers=headers).get_json() == {'computed': 2}
+
+
+def test_unrelated_bump_keeps_entry(app):
+    client, headers = app.test_client(), auth(app)
+    client.get('/report', headers=headers)
+    client.post('/budgets', headers=headers)
+    assert client.get('/report', headers=headers).get_json() == {'computed': 1}
+
+
+def test_key_is_scoped_by_role(app):
+    client = app.test_client()
+    assert client.get('/report', headers=auth(app, 'admin')).get_json() == {'computed': 1}
+    assert client.get('/report', headers=auth(app, 'customer')).get_json() == {'computed': 2}
+    assert client.get('/report', headers=auth(app, 'admin')).get_json() == {'computed': 1}
+
+
+def test_key_is_scoped_by_query_args(app):
+    client, headers = app.test_client(), auth(app)
+    client.get('/report?start_date=2024-01-01', headers=headers)
+    assert client.get('/report?start_date=2024-02-01', headers=headers).get_json() == {'computed': 2}
+
+
+def test_memory_backend_evicts_least_recently_used_by_size():
+    backend = MemoryBackend(max_bytes=30)
+    backend.set('a', b'x' * 10)
+    backend.set('b', b'x' * 10)
+    backend.set('c', b'x' * 10)
+    assert backend.get('a') is not None
+    backend.set('d', b'x' * 10)
+    assert backend.get('b') is None
+    assert backend.get('a') is not None
+    assert backend.stats() == {'entries': 3, 'bytes': 30, 'evictions': 1}
+
+
+def test_memory_backend_skips_oversized_values():
+    backend = MemoryBackend(max_bytes=10)
+    backend.set('a', b'x' * 11)
+    assert backend.get('a') is None
+    assert backend.stats()['bytes'] == 0
+
+
+def test_memory_backend_expires_entries():
+    backend = MemoryBackend(ttl=-1)
+    backend.set('a', b'x')
+    assert backend.get('a') is None
+
+
+def test_redis_backend_versions_and_ttl():
+    client = fakeredis.FakeRedis()
+    backend = RedisBackend(client, ttl=60)
+    assert backend.versions(['transactions', 'budgets']) == [0, 0]
+    backend.bump(['transactions'])
+    backend.bump(['transactions', 'budgets'])
+    assert backend.versions(['transactions', 'budgets']) == [2, 1]
+    backend.set('k', b'etag\nbody')
+    assert backend.get('k') == b'etag\nbody'
+    assert 0 < client.ttl('report_cache:e:k') <= 60
+
+
+def test_memory_backend_versions_are_shared_through_the_database(mongo_db):
+    worker_a = MemoryBackend(db=mongo_db)
+    worker_b = MemoryBackend(db=mongo_db)
+    app_a = make_app()
+    app_a.extensions['report_cache'] = ReportCache(worker_a)
+    client, headers = app_a.test_client(), auth(app_a)
+    assert client.get('/report', headers=headers).get_json() == {'computed': 1}
+    assert client.get('/report', headers=headers).get_json() == {'computed': 1}
+    # a write handled by another worker bumps the shared stamp, so this worker misses
+    ReportCache(worker_b).bump('transactions')
+    assert client.get('/report', headers=headers).get_json() == {'computed': 2}
+    assert worker_a.versions(['transactions', 'budgets']) == [1, 0]
+
@@ -0,0 +1,22 @@
+# backend/tests/test_reports.py
+import pytest
+
+
+@pytest.mark.parametrize('url, message', [
+    ('/api/reports/chart-data?start_date=2024-13-01', 'start_date must be YYYY-MM-DD'),
+    ('/api/reports/chart-data?include_transactions=true&page=two', 'page must be an integer'),
+    ('/api/reports/chart-data?include_transactions=true&page_size=', 'page_size must be an integer'),
+    ('/api/reports/budget-vs-actual?end_date=31/12/2024', 'end_date must be YYYY-MM-DD'),
+    ('/api/reports/budget-vs-actual?format=csv&start_date=x', 'start_date must be YYYY-MM-DD'),
+    ('/api/reports/cost-center-performance?start_date=yesterday', 'start_date must be YYYY-MM-DD'),
+    ('/api/transactions/?end_date=2024-02-30', 'end_date must be YYYY-MM-DD'),
+])
+def test_malformed_query_arguments_are_400(mongo_app, auth_headers, url, message):
+    r = mongo_app.test_client().get(url, headers=auth_headers())
+    assert r.status_code == 400
+    assert r.get_json() == {'error': message}
+
+
+def test_well_formed_dates_are_accepted(mongo_app, auth_headers):
+    r = mongo_app.test_client().get('/api/reports/chart-data?start_date=2024-01-01&end_date=2024-12-31', headers=auth_headers())
+    assert r.status_code == 200
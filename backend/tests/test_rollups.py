@@ -0,0 +1,66 @@
+# backend/tests/test_rollups.py
+from datetime import datetime
+
+import pytest
+from app.database import rollups
+
+
+@pytest.fixture
+def db(mongo_app, monkeypatch):
+    monkeypatch.setattr(rollups.time, 'sleep', lambda seconds: None)
+    return mongo_app.config['MONGO_DB']
+
+
+def transaction(cc_id, amount, day=5, typ='purchase'):
+    return {'type': typ, 'amount': amount, 'cost_center_id': cc_id, 'transaction_date': datetime(2024, 3, day)}
+
+
+def test_string_amounts_are_not_reported_as_drift(db):
+    cc_id = db.cost_centers.insert_one({'name': 'CC', 'code': 'C'}).inserted_id
+    db.transactions.insert_many([transaction(cc_id, 10.0), transaction(cc_id, '12.5'), transaction(cc_id, 'n/a')])
+    assert rollups.rebuild_rollups(db) == 1
+    assert rollups.verify_rollups(db) == []
+    row = db[rollups.ROLLUPS].find_one()
+    assert (row['amount'], row['count']) == (22.5, 3)
+
+
+def test_rebuild_repairs_writes_lost_during_the_swap(db, monkeypatch):
+    cc_id = db.cost_centers.insert_one({'name': 'CC', 'code': 'C'}).inserted_id
+    db.transactions.insert_one(transaction(cc_id, 10.0))
+    expected_rollups = rollups._expected_rollups
+    calls = []
+
+    def recompute_then_write(db_):
+        expected = expected_rollups(db_)
+        if not calls:
+            # a worker inserts a transaction after the recompute; its $inc lands on the old collection
+            db_.transactions.insert_one(transaction(cc_id, 7.0, day=6, typ='sale'))
+            db_.transactions.insert_one(transaction(cc_id, 3.0))
+        calls.append(1)
+        return expected
+
+    monkeypatch.setattr(rollups, '_expected_rollups', recompute_then_write)
+    assert rollups.rebuild_rollups(db) == 1
+    assert rollups.verify_rollups(db) == []
+    rows = {(r['type'], r['day'].day): (r['amount'], r['count']) for r in db[rollups.ROLLUPS].find()}
+    assert rows == {('purchase', 5): (13.0, 2), ('sale', 6): (7.0, 1)}
+
+
+def test_repair_skips_rows_that_move_between_passes(db, monkeypatch):
+    cc_id = db.cost_centers.insert_one({'name': 'CC', 'code': 'C'}).inserted_id
+    db.transactions.insert_one(transaction(cc_id, 10.0))
+    rollups.rebuild_rollups(db)
+    db.transactions.insert_one(transaction(cc_id, 5.0))
+    stored = db[rollups.ROLLUPS].find_one()
+    writes = iter([5.0])
+
+    def inc_in_flight(seconds):
+        # the missing transaction's own $inc arrives between the two passes
+        amount = next(writes, None)
+        if amount:
+            db[rollups.ROLLUPS].update_one({'_id': stored['_id']}, {'$inc': {'amount': amount, 'count': 1}})
+
+    monkeypatch.setattr(rollups.time, 'sleep', inc_in_flight)
+    assert rollups.repair_rollups(db) == 0
+    row = db[rollups.ROLLUPS].find_one()
+    assert (row['amount'], row['count']) == (15.0, 2)
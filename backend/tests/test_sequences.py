@@ -0,0 +1,28 @@
+# backend/tests/test_sequences.py
+from app.api.invoices import _last_invoice_suffix
+from app.database.sequences import SequenceAllocator
+
+PREFIX = 'INV-20261017-'
+
+
+def test_last_invoice_suffix_orders_numerically(mongo_db):
+    for number in ['0042', '9999', '10000', 'abc']:
+        mongo_db.invoices.insert_one({'invoice_number': PREFIX + number})
+    mongo_db.invoices.insert_one({'invoice_number': 'INV-20261016-99999'})
+    assert _last_invoice_suffix(mongo_db, PREFIX) == 10000
+    assert _last_invoice_suffix(mongo_db, 'INV-20261018-') == 0
+
+
+def test_sequence_starts_above_the_floor_and_keeps_one_block_per_family(mongo_db):
+    allocator = SequenceAllocator(block_size=5)
+    assert allocator.next(mongo_db, 'invoice_number:20261016') == 1
+    assert allocator.next(mongo_db, 'other:1') == 1
+    assert allocator.next(mongo_db, 'invoice_number:20261017', floor=lambda: 10000) == 10001
+    assert sorted(allocator._blocks) == ['invoice_number:20261017', 'other:1']
+
+
+def test_a_restarted_process_skips_the_rest_of_its_block(mongo_db):
+    first = SequenceAllocator(block_size=5)
+    assert [first.next(mongo_db, 'invoice_number:20261017') for _ in range(2)] == [1, 2]
+    restarted = SequenceAllocator(block_size=5)
+    assert restarted.next(mongo_db, 'invoice_number:20261017') == 6
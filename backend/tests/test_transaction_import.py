@@ -0,0 +1,74 @@
+# backend/tests/test_transaction_import.py
+import json
+
+import pytest
+from app.api import transactions
+
+
+def ndjson(*rows):
+    return '\n'.join(r if isinstance(r, str) else json.dumps(r) for r in rows).encode()
+
+
+@pytest.fixture
+def cost_center(mongo_app):
+    db = mongo_app.config['MONGO_DB']
+    return str(db.cost_centers.insert_one({'name': 'Production', 'code': 'PROD'}).inserted_id)
+
+
+def row(cc, **overrides):
+    base = {'type': 'purchase', 'amount': 100, 'cost_center_id': cc, 'transaction_date': '2024-03-05'}
+    base.update(overrides)
+    return base
+
+
+def post_import(app, headers, body):
+    return app.test_client().post('/api/transactions/import?format=ndjson', data=body,
+                                  headers=dict(headers, **{'Content-Type': 'application/x-ndjson'}))
+
+
+@pytest.mark.parametrize('bad, message', [
+    ({'cost_center_id': {'$oid': '65f000000000000000000000'}}, 'cost_center_id must be a string id'),
+    ({'product_id': {'$oid': '65f000000000000000000000'}}, 'product_id must be a string id'),
+    ({'transaction_date': ['2024-03-05']}, 'transaction_date must be YYYY-MM-DD'),
+    ({'amount': 'NaN'}, 'amount must be a finite number'),
+    ({'amount': 'inf'}, 'amount must be a finite number'),
+    ({'amount': True}, 'amount must be a number'),
+    ({'quantity': 1.5}, 'quantity must be a whole number'),
+    ({'quantity': 'two'}, 'quantity must be a whole number'),
+    ({'quantity': [1]}, 'quantity must be a whole number'),
+])
+def test_bad_row_is_reported_not_500(mongo_app, auth_headers, cost_center, bad, message):
+    r = post_import(mongo_app, auth_headers(), ndjson(row(cost_center), row(cost_center, **bad)))
+    assert r.status_code == 200
+    body = r.get_json()
+    assert (body['rows'], body['inserted'], body['failed']) == (2, 1, 1)
+    assert body['errors'] == [{'row': 2, 'error': message}]
+
+
+def test_whole_number_quantities_are_stored_as_int(mongo_app, auth_headers, cost_center):
+    r = post_import(mongo_app, auth_headers(), ndjson(row(cost_center, quantity=3.0), row(cost_center, quantity='4')))
+    assert r.get_json()['inserted'] == 2
+    db = mongo_app.config['MONGO_DB']
+    assert sorted(t['quantity'] for t in db.transactions.find()) == [3, 4]
+
+
+def test_partial_failure_keeps_good_rows_across_chunks(mongo_app, auth_headers, cost_center, monkeypatch):
+    monkeypatch.setattr(transactions, 'IMPORT_CHUNK', 2)
+    body = ndjson(
+        row(cost_center, amount=10),
+        row(cost_center, amount=20),
+        row(cost_center, cost_center_id={'$oid': cost_center}),
+        'not json',
+        row(cost_center, amount=30),
+        row(cost_center, transaction_date=['2024-03-05']),
+        row(cost_center, amount=40),
+    )
+    r = post_import(mongo_app, auth_headers(), body)
+    assert r.status_code == 200
+    result = r.get_json()
+    assert (result['rows'], result['inserted'], result['failed']) == (7, 4, 3)
+    assert [e['row'] for e in result['errors']] == [3, 4, 6]
+    db = mongo_app.config['MONGO_DB']
+    assert sorted(t['amount'] for t in db.transactions.find()) == [10, 20, 30, 40]
+    rollups = list(db.transaction_rollups.find())
+    assert (sum(r['amount'] for r in rollups), sum(r['count'] for r in rollups)) == (100, 4)
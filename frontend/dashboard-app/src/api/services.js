@@ -1,5 +1,34 @@
 import api from './api';
 
+export const PAGE_SIZE = 25;
+
+/**
+ * List endpoints are keyset-paginated. getPage fetches one page and returns
+ * { items, nextCursor } (nextCursor is null on the last page).
+ */
+export async function getPage(url, { cursor = null, limit = PAGE_SIZE, ...params } = {}) {
+  const res = await api.get(url, { params: { ...params, limit, ...(cursor ? { cursor } : {}) } });
+  return {
+    items: Array.isArray(res.data) ? res.data : [],
+    nextCursor: res.headers['x-next-cursor'] || null,
+  };
+}
+
+/**
+ * Follow X-Next-Cursor to the last page. Only for small reference lists such as
+ * cost centers; record lists are paged in the UI with usePagedList.
+ */
+export async function getAllPages(url, params = {}) {
+  const items = [];
+  let cursor = null;
+  do {
+    const res = await api.get(url, { params: { ...params, limit: 100, ...(cursor ? { cursor } : {}) } });
+    items.push(...(Array.isArray(res.data) ? res.data : []));
+    cursor = res.headers['x-next-cursor'] || null;
+  } while (cursor);
+  return items;
+}
+
 export async function getChartData() {
   const { data } = await api.get('/reports/chart-data');
   return data;
@@ -16,8 +45,7 @@ export async function updateMasterBudget(amount) {
 }
 
 export async function getTransactions(params = {}) {
-  const { data } = await api.get('/transactions/', { params });
-  return data;
+  return getPage('/transactions/', params);
 }
 
 export async function createTransaction(payload) {
@@ -31,13 +59,23 @@ export async function updateTransaction(id, payload) {
 }
 
 export async function getCostCenters() {
-  const { data } = await api.get('/cost-centers/');
-  return data;
+  return getAllPages('/cost-centers/');
 }
 
-export async function getBudgets() {
-  const { data } = await api.get('/budgets/');
-  return data;
+export async function getBudgets(params = {}) {
+  return getPage('/budgets/', params);
+}
+
+export async function getInvoices(params = {}) {
+  return getPage('/invoices/', params);
+}
+
+/**
+ * Sum of all transaction amounts, from the chart-data report's monthly totals.
+ */
+export function chartTotal(chart) {
+  const total = (chart?.datasets || []).find((d) => d.label === 'Total');
+  return (total?.data || []).reduce((acc, v) => acc + (v || 0), 0);
 }
 
 export async function createBudget(payload) {
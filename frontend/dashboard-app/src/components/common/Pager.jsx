@@ -0,0 +1,24 @@
+export default function Pager({ list, className = '' }) {
+  if (!list.hasPrev && !list.hasNext) return null;
+  return (
+    <div className={`flex items-center justify-between px-6 py-4 border-t border-slate-100 text-sm ${className}`}>
+      <button
+        type="button"
+        onClick={list.prev}
+        disabled={!list.hasPrev || list.loading}
+        className="font-bold text-slate-600 hover:text-amber-600 disabled:text-slate-300"
+      >
+        ← Previous
+      </button>
+      <span className="text-slate-400">Page {list.page}</span>
+      <button
+        type="button"
+        onClick={list.next}
+        disabled={!list.hasNext || list.loading}
+        className="font-bold text-slate-600 hover:text-amber-600 disabled:text-slate-300"
+      >
+        Next →
+      </button>
+    </div>
+  );
+}
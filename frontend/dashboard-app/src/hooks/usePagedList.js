@@ -0,0 +1,65 @@
+import { useState, useEffect, useCallback } from 'react';
+
+/**
+ * One page of a cursor-paginated list at a time, with next/prev navigation.
+ * fetchPage({ cursor }) must resolve to { items, nextCursor } (see getPage in api/services).
+ * Cursors of the pages already visited are kept so prev can go back.
+ */
+export function usePagedList(fetchPage) {
+  const [items, setItems] = useState([]);
+  const [cursors, setCursors] = useState([null]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loading, setLoading] = useState(true);
+  const [error, setError] = useState(null);
+  const [reloads, setReloads] = useState(0);
+  const cursor = cursors[cursors.length - 1];
+
+  useEffect(() => {
+    let cancelled = false;
+    setLoading(true);
+    setError(null);
+    fetchPage({ cursor })
+      .then((page) => {
+        if (!cancelled) {
+          setItems(page.items);
+          setNextCursor(page.nextCursor);
+        }
+      })
+      .catch((err) => {
+        if (!cancelled) {
+          setError(err.response?.data?.error || err.message);
+          setItems([]);
+        }
+      })
+      .finally(() => {
+        if (!cancelled) setLoading(false);
+      });
+    return () => { cancelled = true; };
+  }, [cursor, reloads]);
+
+  const next = useCallback(() => {
+    if (nextCursor) setCursors((prev) => [...prev, nextCursor]);
+  }, [nextCursor]);
+  const prev = useCallback(() => {
+    setCursors((prev) => (prev.length > 1 ? prev.slice(0, -1) : prev));
+  }, []);
+  const reload = useCallback(() => setReloads((n) => n + 1), []);
+  const reset = useCallback(() => {
+    setCursors([null]);
+    setReloads((n) => n + 1);
+  }, []);
+
+  return {
+    items,
+    setItems,
+    loading,
+    error,
+    page: cursors.length,
+    hasNext: Boolean(nextCursor),
+    hasPrev: cursors.length > 1,
+    next,
+    prev,
+    reload,
+    reset,
+  };
+}
@@ -1,9 +1,12 @@
 import { useState, useEffect } from 'react';
 import { getBudgets, createBudget, getCostCenters } from '../../api/services';
 import api from '../../api/api';
+import { usePagedList } from '../../hooks/usePagedList';
+import Pager from '../../components/common/Pager';
 
 export default function BudgetManagement() {
-  const [budgets, setBudgets] = useState([]);
+  const budgetList = usePagedList(getBudgets);
+  const { items: budgets, setItems: setBudgets } = budgetList;
   const [costCenters, setCostCenters] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -14,25 +17,13 @@ export default function BudgetManagement() {
     period_end: new Date().toISOString().slice(0, 7) + '-28',
   });
 
-  const fetchData = async () => {
+  useEffect(() => {
     setLoading(true);
     setError(null);
-    try {
-      const [budgetRes, ccRes] = await Promise.all([getBudgets(), getCostCenters()]);
-      setBudgets(Array.isArray(budgetRes) ? budgetRes : []);
-      setCostCenters(Array.isArray(ccRes) ? ccRes : []);
-      if (costCenters.length && !form.cost_center_id) {
-        setForm((f) => ({ ...f, cost_center_id: ccRes[0]?.id || '' }));
-      }
-    } catch (err) {
-      setError(err.response?.data?.error || err.message);
-    } finally {
-      setLoading(false);
-    }
-  };
-
-  useEffect(() => {
-    fetchData();
+    getCostCenters()
+      .then((ccRes) => setCostCenters(Array.isArray(ccRes) ? ccRes : []))
+      .catch((err) => setError(err.response?.data?.error || err.message))
+      .finally(() => setLoading(false));
   }, []);
 
   useEffect(() => {
@@ -61,7 +52,7 @@ export default function BudgetManagement() {
         period_start: new Date().toISOString().slice(0, 7) + '-01',
         period_end: new Date().toISOString().slice(0, 7) + '-28',
       });
-      fetchData();
+      budgetList.reset();
     } catch (err) {
       setError(err.response?.data?.error || err.message);
     }
@@ -77,15 +68,15 @@ export default function BudgetManagement() {
     }
   };
 
-  if (loading) return <div className="p-8">Loading...</div>;
+  if (loading || (budgetList.loading && budgetList.page === 1 && !budgets.length)) return <div className="p-8">Loading...</div>;
 
   return (
     <div>
       <h2 className="text-3xl font-bold mb-6">Budget Management</h2>
 
-      {error && (
+      {(error || budgetList.error) && (
         <div className="mb-6 p-4 bg-red-50 border border-red-200 rounded-xl text-red-700 text-sm">
-          {error}
+          {error || budgetList.error}
         </div>
       )}
 
@@ -196,6 +187,7 @@ export default function BudgetManagement() {
             )}
           </tbody>
         </table>
+        <Pager list={budgetList} />
       </div>
     </div>
   );
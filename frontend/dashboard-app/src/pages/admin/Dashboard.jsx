@@ -25,8 +25,10 @@ import {
   Truck,
   Target,
 } from 'lucide-react';
-import { getChartData, getMasterBudget, updateMasterBudget, getTransactions, updateTransaction } from '../../api/services';
+import { getChartData, getMasterBudget, updateMasterBudget, getTransactions, updateTransaction, chartTotal } from '../../api/services';
 import { getAnalyticalAccount } from '../../utils/analyticalEngine';
+import { usePagedList } from '../../hooks/usePagedList';
+import Pager from '../../components/common/Pager';
 
 ChartJS.register(BarElement, CategoryScale, LinearScale, Tooltip, Legend);
 
@@ -47,7 +49,8 @@ const StatusBadge = ({ status }) => {
 export default function Dashboard() {
   const [chartData, setChartData] = useState(null);
   const [masterBudget, setMasterBudget] = useState(1500000);
-  const [transactions, setTransactions] = useState([]);
+  const txList = usePagedList(getTransactions);
+  const { items: transactions, setItems: setTransactions } = txList;
   const [isEditingBudget, setIsEditingBudget] = useState(false);
   const [tempBudget, setTempBudget] = useState(1500000);
   const [loading, setLoading] = useState(true);
@@ -58,15 +61,10 @@ export default function Dashboard() {
     setLoading(true);
     setError(null);
     try {
-      const [chartRes, budgetRes, txRes] = await Promise.all([
-        getChartData(),
-        getMasterBudget(),
-        getTransactions(),
-      ]);
+      const [chartRes, budgetRes] = await Promise.all([getChartData(), getMasterBudget()]);
       setChartData(chartRes);
       setMasterBudget(budgetRes.amount ?? 1500000);
       setTempBudget(budgetRes.amount ?? 1500000);
-      setTransactions(Array.isArray(txRes) ? txRes : []);
     } catch (err) {
       setError(err.response?.data?.error || err.message);
     } finally {
@@ -79,13 +77,13 @@ export default function Dashboard() {
   }, []);
 
   const stats = useMemo(() => {
-    const totalActual = transactions.reduce((acc, t) => acc + (t.amount || 0), 0);
+    const totalActual = chartTotal(chartData);
     return {
       totalActual,
       remaining: masterBudget - totalActual,
       achievement: masterBudget > 0 ? ((totalActual / masterBudget) * 100).toFixed(1) : '0',
     };
-  }, [transactions, masterBudget]);
+  }, [chartData, masterBudget]);
 
   const filteredTransactions = useMemo(() => {
     if (!filterQuery.trim()) return transactions;
@@ -169,9 +167,9 @@ export default function Dashboard() {
         </div>
       </header>
 
-      {error && (
+      {(error || txList.error) && (
         <div className="mb-6 p-4 bg-red-50 border border-red-200 rounded-xl text-red-700 text-sm">
-          {error}
+          {error || txList.error}
         </div>
       )}
 
@@ -359,6 +357,7 @@ export default function Dashboard() {
             )}
           </tbody>
         </table>
+        <Pager list={txList} />
       </div>
     </div>
   );
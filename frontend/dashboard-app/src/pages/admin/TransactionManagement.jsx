@@ -7,9 +7,12 @@ import {
   updateTransaction,
 } from '../../api/services';
 import api from '../../api/api';
+import { usePagedList } from '../../hooks/usePagedList';
+import Pager from '../../components/common/Pager';
 
 export default function TransactionManagement() {
-  const [transactions, setTransactions] = useState([]);
+  const txList = usePagedList(getTransactions);
+  const { items: transactions, setItems: setTransactions } = txList;
   const [costCenters, setCostCenters] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -21,22 +24,13 @@ export default function TransactionManagement() {
     status: 'not_paid',
   });
 
-  const fetchData = async () => {
+  useEffect(() => {
     setLoading(true);
     setError(null);
-    try {
-      const [txRes, ccRes] = await Promise.all([getTransactions(), getCostCenters()]);
-      setTransactions(Array.isArray(txRes) ? txRes : []);
-      setCostCenters(Array.isArray(ccRes) ? ccRes : []);
-    } catch (err) {
-      setError(err.response?.data?.error || err.message);
-    } finally {
-      setLoading(false);
-    }
-  };
-
-  useEffect(() => {
-    fetchData();
+    getCostCenters()
+      .then((ccRes) => setCostCenters(Array.isArray(ccRes) ? ccRes : []))
+      .catch((err) => setError(err.response?.data?.error || err.message))
+      .finally(() => setLoading(false));
   }, []);
 
   const suggestedAccount = getAnalyticalAccount(form.description);
@@ -66,7 +60,7 @@ export default function TransactionManagement() {
         status: form.status || 'not_paid',
       });
       setForm({ description: '', amount: '', transaction_date: new Date().toISOString().slice(0, 10), type: 'purchase', status: 'not_paid' });
-      fetchData();
+      txList.reset();
     } catch (err) {
       setError(err.response?.data?.error || err.message);
     }
@@ -91,7 +85,7 @@ export default function TransactionManagement() {
     }
   };
 
-  if (loading) {
+  if (loading || (txList.loading && txList.page === 1 && !transactions.length)) {
     return <div className="p-8">Loading...</div>;
   }
 
@@ -99,9 +93,9 @@ export default function TransactionManagement() {
     <div>
       <h2 className="text-3xl font-bold mb-6">Transaction Management</h2>
 
-      {error && (
+      {(error || txList.error) && (
         <div className="mb-6 p-4 bg-red-50 border border-red-200 rounded-xl text-red-700 text-sm">
-          {error}
+          {error || txList.error}
         </div>
       )}
 
@@ -233,6 +227,7 @@ export default function TransactionManagement() {
             )}
           </tbody>
         </table>
+        <Pager list={txList} />
       </div>
     </div>
   );
@@ -1,8 +1,10 @@
-import { useState, useEffect } from 'react';
+import { useState } from 'react';
 import { FileText, Download, CreditCard, AlertCircle } from 'lucide-react';
 import { getTransactions, updateTransaction } from '../../api/services';
 import { getAnalyticalAccount } from '../../utils/analyticalEngine';
 import { generateInvoicePDF } from '../../utils/pdfgenerate';
+import { usePagedList } from '../../hooks/usePagedList';
+import Pager from '../../components/common/Pager';
 
 const StatusBadge = ({ status }) => {
   const s = status === 'paid' ? 'Paid' : status === 'not_paid' ? 'Not Paid' : 'Partially Paid';
@@ -19,27 +21,11 @@ const StatusBadge = ({ status }) => {
 };
 
 export default function CustomerDashboard() {
-  const [transactions, setTransactions] = useState([]);
+  const txList = usePagedList(getTransactions);
+  const { items: transactions, setItems: setTransactions } = txList;
   const [selectedTransaction, setSelectedTransaction] = useState(null);
-  const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
-
-  const fetchData = async () => {
-    setLoading(true);
-    setError(null);
-    try {
-      const res = await getTransactions();
-      setTransactions(Array.isArray(res) ? res : []);
-    } catch (err) {
-      setError(err.response?.data?.error || err.message);
-    } finally {
-      setLoading(false);
-    }
-  };
-
-  useEffect(() => {
-    fetchData();
-  }, []);
+  const loading = txList.loading && txList.page === 1 && !transactions.length;
 
   const handlePayment = async (id) => {
     try {
@@ -71,9 +57,9 @@ export default function CustomerDashboard() {
         </p>
       </div>
 
-      {error && (
+      {(error || txList.error) && (
         <div className="mb-6 p-4 bg-red-50 border border-red-200 rounded-xl text-red-700 text-sm">
-          {error}
+          {error || txList.error}
         </div>
       )}
 
@@ -195,6 +181,7 @@ export default function CustomerDashboard() {
               </div>
             ))
           )}
+          <Pager list={txList} className="bg-white rounded-[2rem] border border-slate-100" />
         </div>
       )}
     </div>
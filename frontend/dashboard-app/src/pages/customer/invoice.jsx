@@ -1,11 +1,13 @@
 import React from 'react';
 import { useInvoices } from '../../hooks/useInvoices';
 import { generateInvoicePDF } from '../../components/invoices/InvoicePDF';
+import Pager from '../../components/common/Pager';
 
 const MyInvoices = () => {
-  const { invoices, loading, error } = useInvoices();
+  const list = useInvoices();
+  const { invoices, loading, error } = list;
 
-  if (loading) return <div className="p-8 text-center">Loading your billing history...</div>;
+  if (loading && list.page === 1 && !invoices.length) return <div className="p-8 text-center">Loading your billing history...</div>;
   if (error) return <div className="p-8 text-center text-red-600">Error: {error}. Ensure you are logged in and the backend is running.</div>;
 
   return (
@@ -50,6 +52,7 @@ const MyInvoices = () => {
             )}
           </tbody>
         </table>
+        <Pager list={list} />
       </div>
     </div>
   );
@@ -1,25 +1,24 @@
 import { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import { getTransactions, getMasterBudget } from '../../api/services';
+import { getChartData, getMasterBudget, chartTotal } from '../../api/services';
 
 export default function PaymentPage() {
-  const [transactions, setTransactions] = useState([]);
+  const [totalActual, setTotalActual] = useState(0);
   const [masterBudget, setMasterBudget] = useState(1500000);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
   useEffect(() => {
     setLoading(true);
-    Promise.all([getTransactions(), getMasterBudget()])
-      .then(([txRes, budgetRes]) => {
-        setTransactions(Array.isArray(txRes) ? txRes : []);
+    Promise.all([getChartData(), getMasterBudget()])
+      .then(([chartRes, budgetRes]) => {
+        setTotalActual(chartTotal(chartRes));
         setMasterBudget(budgetRes?.amount ?? 1500000);
       })
       .catch((err) => setError(err.response?.data?.error || err.message))
       .finally(() => setLoading(false));
   }, []);
 
-  const totalActual = transactions.reduce((acc, t) => acc + (t.amount || 0), 0);
   const remaining = masterBudget - totalActual;
   const achievement = masterBudget > 0 ? ((totalActual / masterBudget) * 100).toFixed(1) : 0;
 